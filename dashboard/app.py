@@ -2,6 +2,7 @@ import itertools
 import os
 from dataclasses import dataclass
 
+import results_db
 import tyro
 import yaml
 from flask import Flask, render_template, request, send_file
@@ -16,6 +17,7 @@ args = tyro.cli(Args)
 
 app = Flask(__name__)
 BASE_LOG_DIR = "logs"
+DB_PATH = os.path.join(BASE_LOG_DIR, "results.db")
 
 
 class Image:
@@ -25,7 +27,7 @@ class Image:
 
 
 class TestCase:
-    def __init__(self, simulator, task, robot, command_name):
+    def __init__(self, simulator, task, robot, command_name, status="unfinished"):
         self.simulator = simulator
         self.task = task
         self.robot = robot
@@ -35,8 +37,7 @@ class TestCase:
         self.stderr_log = os.path.join(self.path, "stderr.log")
         self.command = os.path.join(self.path, "command.sh")
         self.results_dir = os.path.join(self.path, "results")
-        status_file = os.path.join(self.path, "status.txt")
-        self.status = open(status_file).read().strip() if os.path.exists(status_file) else "unfinished"
+        self.status = status
         self.video_path = os.path.join(self.results_dir, "video.mp4")
 
     @property
@@ -85,9 +86,11 @@ def index():
     tasks = task_groups.get(selected_group, [])
 
     # Generate test cases only for tasks in the selected task group.
+    statuses = results_db.load_statuses(DB_PATH, tasks)
     cases = []
     for simulator, task, robot, command_name in itertools.product(simulators, tasks, robots, command_names):
-        cases.append(TestCase(simulator, task, robot, command_name))
+        status = statuses.get((task, robot, simulator, command_name), "unfinished")
+        cases.append(TestCase(simulator, task, robot, command_name, status))
 
     # Group cases by (task, robot) for each simulator.
     grouped_cases = {}
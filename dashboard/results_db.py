@@ -0,0 +1,78 @@
+"""SQLite store of the dashboard test results, shared by ``run_test.py`` and ``app.py``.
+
+Each (task, robot, simulator, command) case has a single row. Its ``status`` is the return code of the last run as a
+string, ``"unfinished"`` while the case is queued or running, or ``"timeout"``.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    task TEXT NOT NULL,
+    robot TEXT NOT NULL,
+    simulator TEXT NOT NULL,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (task, robot, simulator, command)
+);
+CREATE INDEX IF NOT EXISTS results_status ON results (status);
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open the store, creating it if needed. Writers from several threads are serialized by SQLite."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def get_status(db_path: str, task: str, robot: str, simulator: str, command: str) -> str | None:
+    """Status of one case, or None if it was never scheduled."""
+    with closing(connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT status FROM results WHERE task=? AND robot=? AND simulator=? AND command=?",
+            (task, robot, simulator, command),
+        ).fetchone()
+    return None if row is None else row[0]
+
+
+def set_status(
+    db_path: str,
+    task: str,
+    robot: str,
+    simulator: str,
+    command: str,
+    status: str,
+    attempts: int = 0,
+    duration: float | None = None,
+) -> None:
+    """Insert or overwrite the status of one case."""
+    with closing(connect(db_path)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (task, robot, simulator, command, status, attempts, duration, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (task, robot, simulator, command, status, attempts, duration, time.time()),
+        )
+
+
+def load_statuses(db_path: str, tasks: list[str] | None = None) -> dict[tuple[str, str, str, str], str]:
+    """Statuses keyed by (task, robot, simulator, command), optionally restricted to some tasks."""
+    if not os.path.exists(db_path):
+        return {}
+    query = "SELECT task, robot, simulator, command, status FROM results"
+    params: list[str] = []
+    if tasks is not None:
+        query += f" WHERE task IN ({','.join('?' * len(tasks))})"
+        params = list(tasks)
+    with closing(connect(db_path)) as conn:
+        return {tuple(row[:4]): row[4] for row in conn.execute(query, params)}
@@ -3,9 +3,16 @@ from __future__ import annotations
 import itertools
 import os
 import shutil
+import signal
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from queue import Queue
 
+import results_db
 import tyro
 import yaml
 from loguru import logger as log
@@ -22,6 +29,16 @@ conda_envs = {
     "isaacgym": "metasim_isaacgym",
 }
 
+## GPU simulators get exclusive slots, CPU simulators share a larger pool
+sim_resources = {
+    "isaaclab": "gpu",
+    "isaacgym": "gpu",
+    "genesis": "gpu",
+    "mujoco": "cpu",
+    "sapien3": "cpu",
+    "pybullet": "cpu",
+}
+
 
 @dataclass
 class Args:
@@ -35,6 +52,15 @@ class Args:
     sims: list[str] | None = None
     commands: list[str] | None = None
 
+    gpu_workers: int = 1
+    """Number of cases of GPU simulators that run at the same time"""
+    cpu_workers: int = 4
+    """Number of cases of CPU simulators that run at the same time"""
+    timeout: float | None = 1800
+    """Timeout of a single case in seconds, None to disable"""
+    retries: int = 1
+    """Number of times a failed or timed out case is rerun"""
+
     def __post_init__(self):
         assert self.run_all or self.run_failed or self.run_unfinished, (
             "At least one of run_all, run_failed, or run_unfinished must be True"
@@ -44,38 +70,105 @@ class Args:
 args = tyro.cli(Args)
 
 
-def single(command, log_dir, result_dir):
+base_log_dir = "dashboard/logs"
+db_path = os.path.join(base_log_dir, "results.db")
+
+
+## Process groups of the running cases, killed when the run is interrupted
+live_procs: set[subprocess.Popen] = set()
+live_procs_lock = threading.Lock()
+stopping = threading.Event()
+
+
+def kill_live_procs():
+    with live_procs_lock:
+        stopping.set()
+        for proc in live_procs:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+def single(command, log_dir, result_dir, env=None):
     log.info(f'Running command: "{command}"')
     with open(os.path.join(log_dir, "command.sh"), "w") as f:
         f.write(command)
-    result = subprocess.run(
-        command,
-        shell=True,
-        stdout=open(os.path.join(log_dir, "stdout.log"), "w"),
-        stderr=open(os.path.join(log_dir, "stderr.log"), "w"),
-        text=True,
-        check=False,
-    )
-    if result.returncode == 0:
-        log.info("Command executed successfully")
+    with open(os.path.join(log_dir, "stdout.log"), "w") as stdout, open(
+        os.path.join(log_dir, "stderr.log"), "w"
+    ) as stderr:
+        ## Run in a new session so that a timeout kills conda and all its children
+        with live_procs_lock:
+            if stopping.is_set():
+                return "unfinished"
+            proc = subprocess.Popen(
+                command, shell=True, stdout=stdout, stderr=stderr, text=True, start_new_session=True, env=env
+            )
+            live_procs.add(proc)
+        try:
+            returncode = proc.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            log.error(f"Command timed out after {args.timeout}s: {log_dir}")
+            return "timeout"
+        finally:
+            with live_procs_lock:
+                live_procs.discard(proc)
+    if stopping.is_set():
+        return "unfinished"
+    if returncode == 0:
+        log.info(f"Command executed successfully: {log_dir}")
     else:
-        log.error(f"Command failed with return code {result.returncode}")
-    return result.returncode
-
-
-def should_run(log_dir):
+        log.error(f"Command failed with return code {returncode}: {log_dir}")
+    return str(returncode)
+
+
+def gpu_devices():
+    """Queue of the devices handed to the GPU cases, one per GPU worker, or None to leave the device unset."""
+    if args.gpu_workers <= 1:
+        return None
+    visible = os.environ.get("CUDA_VISIBLE_DEVICES")
+    devices = visible.split(",") if visible else [str(i) for i in range(args.gpu_workers)]
+    queue = Queue()
+    for slot in range(args.gpu_workers):
+        queue.put(devices[slot % len(devices)])
+    return queue
+
+
+def run_case(case, command, devices=None):
+    log_dir = os.path.join(base_log_dir, f"{case[0]}_{case[1]}_{case[2]}", case[3])
+    result_dir = os.path.join(log_dir, "results")
+    tic = time.time()
+    for attempt in range(1, args.retries + 2):
+        shutil.rmtree(log_dir, ignore_errors=True)
+        os.makedirs(result_dir, exist_ok=True)
+        if devices is None:
+            status = single(command, log_dir, result_dir)
+        else:
+            device = devices.get()
+            try:
+                status = single(command, log_dir, result_dir, env={**os.environ, "CUDA_VISIBLE_DEVICES": device})
+            finally:
+                devices.put(device)
+        if status == "unfinished":
+            ## Interrupted, the case stays unfinished in the database
+            return status
+        if status == "0":
+            break
+        if attempt <= args.retries:
+            log.warning(f"Retrying {log_dir} ({attempt}/{args.retries})")
+    results_db.set_status(db_path, *case, status, attempts=attempt, duration=time.time() - tic)
+    return status
+
+
+def should_run(case):
     if args.run_all:
         return True
-    if args.run_unfinished and (
-        not os.path.exists(os.path.join(log_dir, "status.txt"))
-        or open(os.path.join(log_dir, "status.txt")).read() == "unfinished"
-    ):
+    status = results_db.get_status(db_path, *case)
+    if args.run_unfinished and (status is None or status == "unfinished"):
         return True
-    if (
-        args.run_failed
-        and os.path.exists(os.path.join(log_dir, "status.txt"))
-        and open(os.path.join(log_dir, "status.txt")).read() != "0"
-    ):
+    if args.run_failed and status is not None and status != "0":
         return True
     return False
 
@@ -100,8 +193,7 @@ def main():
     simulators = conf["simulators"] if args.sims is None else args.sims
     command_names = conf["commands"] if args.commands is None else args.commands
 
-    base_log_dir = "dashboard/logs"
-
+    jobs = []
     for task, robot, simulator, command_name in itertools.product(tasks, robots, simulators, command_names):
         log_dir = os.path.join(base_log_dir, f"{task}_{robot}_{simulator}", command_name)
         result_dir = os.path.join(log_dir, "results")
@@ -112,23 +204,40 @@ def main():
         else:
             raise ValueError(f"Command {command_name} not found")
 
-        if not should_run(log_dir):
+        case = (task, robot, simulator, command_name)
+        if not should_run(case):
             log.info(f"Skipping {log_dir} because it is already finished")
             continue
 
-        shutil.rmtree(log_dir, ignore_errors=True)
-        shutil.rmtree(result_dir, ignore_errors=True)
-
-        os.makedirs(log_dir, exist_ok=True)
-        os.makedirs(result_dir, exist_ok=True)
-
-        with open(os.path.join(log_dir, "status.txt"), "w") as f:
-            f.write("unfinished")
-
-        returncode = single(command, log_dir, result_dir)
-
-        with open(os.path.join(log_dir, "status.txt"), "w") as f:
-            f.write(f"{returncode}")
+        ## Mark as unfinished before anything runs, so that an interrupted run can be resumed with --run-unfinished
+        results_db.set_status(db_path, *case, "unfinished")
+        jobs.append((case, command))
+
+    pools = {
+        "gpu": ThreadPoolExecutor(max_workers=args.gpu_workers),
+        "cpu": ThreadPoolExecutor(max_workers=args.cpu_workers),
+    }
+    devices = gpu_devices()
+    futures = []
+    for case, command in jobs:
+        resource = sim_resources.get(case[2], "gpu")
+        futures.append(pools[resource].submit(run_case, case, command, devices if resource == "gpu" else None))
+
+    def on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        statuses = [future.result() for future in futures]
+    except KeyboardInterrupt:
+        log.warning("Interrupted, killing the running cases. Resume with --run-unfinished")
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        kill_live_procs()
+        sys.exit(130)
+    for pool in pools.values():
+        pool.shutdown()
+    log.info(f"Finished {len(statuses)} cases, {statuses.count('0')} succeeded")
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 
 from .base_checker import BaseChecker
 from .checker_operators import AndOp, NotOp, OrOp
+from .checker_plan import CheckerPlan, CheckerStates
 from .checkers import (
     DetectedChecker,
     EmptyChecker,
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import torch
+
 from metasim.cfg.objects import BaseObjCfg
 from metasim.utils.configclass import configclass
 
@@ -19,11 +21,28 @@ class BaseChecker:
 
     def check(self, handler: BaseSimHandler):
         """Check whether the task is executed successfully."""
-        import torch
-
         # log.warning("Checker not implemented, task will never succeed")
         return torch.zeros(handler.num_envs, dtype=torch.bool, device=handler.device)
 
     def get_debug_viewers(self) -> list[BaseObjCfg]:
         """Get the viewers to be used for debugging the checker."""
         return []
+
+    ############################################################
+    ## Compiled evaluation, see :class:`CheckerPlan`
+    ############################################################
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        """Objects whose root state, and (object, joint) pairs whose position, :meth:`_check_states` reads."""
+        return [], []
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        """Same as :meth:`check`, reading the quantities of :meth:`_state_requests` through ``states``.
+
+        ``states`` provides ``get_pos``, ``get_rot`` and ``get_dof_pos`` for all envs; it is either a
+        :class:`CheckerStates` or the handler itself.
+        """
+        return self.check(handler)
+
+    def _compile(self, program: list[tuple]) -> None:
+        """Append the postfix evaluation of this checker to ``program``."""
+        program.append(("leaf", self))
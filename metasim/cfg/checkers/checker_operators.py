@@ -10,6 +10,7 @@ from metasim.cfg.objects import BaseObjCfg
 from metasim.utils.configclass import configclass
 
 from .base_checker import BaseChecker
+from .checker_plan import CheckerPlan
 
 try:
     from metasim.sim import BaseSimHandler
@@ -26,12 +27,18 @@ class AndOp(BaseChecker):
     def reset(self, handler: BaseSimHandler, env_ids: list[int] | None = None):
         for checker in self.checkers:
             checker.reset(handler, env_ids=env_ids)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        success = torch.ones(handler.num_envs, dtype=torch.bool, device=handler.device)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
+        return self._plan.check(handler)
+
+    def _compile(self, program: list[tuple]) -> None:
         for checker in self.checkers:
-            success = success & checker.check(handler)
-        return success
+            checker._compile(program)
+        program.append(("and", len(self.checkers)))
 
     def get_debug_viewers(self) -> list[BaseObjCfg]:
         viewers = []
@@ -49,12 +56,18 @@ class OrOp(BaseChecker):
     def reset(self, handler: BaseSimHandler, env_ids: list[int] | None = None):
         for checker in self.checkers:
             checker.reset(handler, env_ids=env_ids)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        success = torch.zeros(handler.num_envs, dtype=torch.bool, device=handler.device)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
+        return self._plan.check(handler)
+
+    def _compile(self, program: list[tuple]) -> None:
         for checker in self.checkers:
-            success = success | checker.check(handler)
-        return success
+            checker._compile(program)
+        program.append(("or", len(self.checkers)))
 
     def get_debug_viewers(self) -> list[BaseObjCfg]:
         viewers = []
@@ -71,9 +84,17 @@ class NotOp(BaseChecker):
 
     def reset(self, handler: BaseSimHandler, env_ids: list[int] | None = None):
         self.checker.reset(handler, env_ids=env_ids)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        return ~self.checker.check(handler)
+        if not hasattr(self, "_plan"):
+            self._plan = CheckerPlan(self)
+        return self._plan.check(handler)
+
+    def _compile(self, program: list[tuple]) -> None:
+        self.checker._compile(program)
+        program.append(("not", None))
 
     def get_debug_viewers(self) -> list[BaseObjCfg]:
         return self.checker.get_debug_viewers()
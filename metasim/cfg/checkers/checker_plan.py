@@ -0,0 +1,111 @@
+"""Flat evaluation plan of a checker tree."""
+
+from __future__ import annotations
+
+import torch
+
+from .base_checker import BaseChecker
+
+try:
+    from metasim.sim import BaseSimHandler
+except:
+    pass
+
+
+class CheckerStates:
+    """Quantities read by a checker tree, fetched for all envs in one batched read per check.
+
+    Args:
+        root_state: Root states of ``root_names``, shape (num_envs, len(root_names), 13), or None.
+        root_names: Names of the objects in ``root_state``.
+        dof_pos: Joint positions of each object, shape (num_envs, len(joint_names)).
+        dof_names: Joint names of the columns of ``dof_pos`` for each object.
+    """
+
+    def __init__(
+        self,
+        root_state: torch.Tensor | None,
+        root_names: list[str],
+        dof_pos: dict[str, torch.Tensor],
+        dof_names: dict[str, list[str]],
+    ):
+        self._root_state = root_state
+        self._root_index = {name: i for i, name in enumerate(root_names)}
+        self._dof_pos = dof_pos
+        self._dof_index = {obj: {joint: i for i, joint in enumerate(joints)} for obj, joints in dof_names.items()}
+
+    def get_pos(self, obj_name: str) -> torch.FloatTensor:
+        """Positions of ``obj_name``, shape (num_envs, 3)."""
+        return self._root_state[:, self._root_index[obj_name], :3]
+
+    def get_rot(self, obj_name: str) -> torch.FloatTensor:
+        """Quaternions (wxyz) of ``obj_name``, shape (num_envs, 4)."""
+        return self._root_state[:, self._root_index[obj_name], 3:7]
+
+    def get_dof_pos(self, obj_name: str, joint_name: str) -> torch.FloatTensor:
+        """Positions of the joint ``joint_name`` of ``obj_name``, shape (num_envs,)."""
+        return self._dof_pos[obj_name][:, self._dof_index[obj_name][joint_name]]
+
+
+class CheckerPlan:
+    """A checker tree compiled into a postfix program over its leaves.
+
+    The quantities needed by all leaves are fetched once per check, with one batched root state read and one joint
+    read per object, and ``AndOp``/``OrOp`` nodes reduce their children with a single stacked ``all``/``any``.
+
+    Args:
+        checker: The root of the checker tree.
+    """
+
+    def __init__(self, checker: BaseChecker):
+        self.program: list[tuple] = []
+        checker._compile(self.program)
+
+        root_names: dict[str, None] = {}
+        dof_names: dict[str, dict[str, None]] = {}
+        for op, arg in self.program:
+            if op != "leaf":
+                continue
+            roots, dofs = arg._state_requests()
+            root_names.update(dict.fromkeys(roots))
+            for obj_name, joint_name in dofs:
+                dof_names.setdefault(obj_name, {})[joint_name] = None
+        self.root_names = list(root_names)
+        self.dof_names = {obj_name: list(joints) for obj_name, joints in dof_names.items()}
+
+    def read_states(self, handler: BaseSimHandler) -> CheckerStates | BaseSimHandler:
+        """Fetch all quantities of the plan. Backends with their own pose accessors are read directly instead."""
+        from metasim.sim.base import BaseSimHandler
+
+        handler_cls = type(handler)
+        if (
+            handler_cls.get_pos is not BaseSimHandler.get_pos
+            or handler_cls.get_rot is not BaseSimHandler.get_rot
+            or handler_cls.get_dof_pos is not BaseSimHandler.get_dof_pos
+        ):
+            return handler
+
+        root_state = handler.get_root_state(self.root_names) if self.root_names else None
+        dof_pos = {
+            obj_name: handler.get_dof_pos_batch(obj_name, joint_names)
+            for obj_name, joint_names in self.dof_names.items()
+        }
+        return CheckerStates(root_state, self.root_names, dof_pos, self.dof_names)
+
+    def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
+        """Evaluate the checker tree for all envs."""
+        states = self.read_states(handler)
+        stack: list[torch.BoolTensor] = []
+        for op, arg in self.program:
+            if op == "leaf":
+                stack.append(arg._check_states(handler, states))
+            elif op == "not":
+                stack.append(~stack.pop())
+            elif arg == 0:
+                fill = torch.ones if op == "and" else torch.zeros
+                stack.append(fill(handler.num_envs, dtype=torch.bool, device=handler.device))
+            else:
+                children = torch.stack([value.to(torch.bool) for value in stack[-arg:]])
+                del stack[-arg:]
+                stack.append(children.all(dim=0) if op == "and" else children.any(dim=0))
+        return stack.pop()
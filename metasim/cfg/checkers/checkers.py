@@ -56,7 +56,13 @@ class DetectedChecker(BaseChecker):
         self.detector.reset(handler, env_ids=env_ids)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        success = self.detector.is_detected(handler, self.obj_name)
+        return self._check_states(handler, handler)
+
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        return [self.obj_name, *self.detector._state_requests()], []
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        success = self.detector._is_detected_states(handler, states, self.obj_name)
         if self.ignore_if_first_check_success:
             self._ignore[self._first_check & success] = True
         self._first_check[self._first_check] = False
@@ -86,7 +92,13 @@ class JointPosChecker(BaseChecker):
     """The threshold for the joint position. (in radian)"""
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        dof_pos = handler.get_dof_pos(self.obj_name, self.joint_name)
+        return self._check_states(handler, handler)
+
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        return [], [(self.obj_name, self.joint_name)]
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        dof_pos = states.get_dof_pos(self.obj_name, self.joint_name)
         log.debug(f"Joint {self.joint_name} of object {self.obj_name} has position {tensor_to_str(dof_pos)}")
         if self.mode == "ge":
             return dof_pos >= self.radian_threshold
@@ -123,7 +135,13 @@ class JointPosShiftChecker(BaseChecker):
         self.init_joint_pos[env_ids] = handler.get_dof_pos(self.obj_name, self.joint_name, env_ids=env_ids)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        cur_joint_pos = handler.get_dof_pos(self.obj_name, self.joint_name)
+        return self._check_states(handler, handler)
+
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        return [], [(self.obj_name, self.joint_name)]
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        cur_joint_pos = states.get_dof_pos(self.obj_name, self.joint_name)
         joint_pos_diff = cur_joint_pos - self.init_joint_pos
 
         log.debug(f"Joint {self.joint_name} of object {self.obj_name} moved {tensor_to_str(joint_pos_diff)} units")
@@ -161,7 +179,13 @@ class RotationShiftChecker(BaseChecker):
         self.init_quat[env_ids] = handler.get_rot(self.obj_name, env_ids=env_ids)
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        cur_quat = handler.get_rot(self.obj_name)
+        return self._check_states(handler, handler)
+
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        return [self.obj_name], []
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        cur_quat = states.get_rot(self.obj_name)
         init_rot_mat = matrix_from_quat(self.init_quat)
         cur_rot_mat = matrix_from_quat(cur_quat)
         rot_diff = torch.matmul(cur_rot_mat, init_rot_mat.transpose(-1, -2))
@@ -211,7 +235,13 @@ class PositionShiftChecker(BaseChecker):
         self.init_pos[env_ids] = tmp
 
     def check(self, handler: BaseSimHandler) -> torch.BoolTensor:
-        cur_pos = handler.get_pos(self.obj_name)
+        return self._check_states(handler, handler)
+
+    def _state_requests(self) -> tuple[list[str], list[tuple[str, str]]]:
+        return [self.obj_name], []
+
+    def _check_states(self, handler: BaseSimHandler, states) -> torch.BoolTensor:
+        cur_pos = states.get_pos(self.obj_name)
         if torch.isnan(cur_pos).any():
             log.debug(f"Object {self.obj_name} moved to nan position")
             return torch.ones(cur_pos.shape[0], dtype=torch.bool, device=handler.device)
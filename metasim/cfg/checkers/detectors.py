@@ -29,6 +29,14 @@ class BaseDetector:
 
     def is_detected(self, handler: BaseSimHandler, obj_name: str) -> torch.BoolTensor:
         """Check if the object is inside the detector."""
+        return self._is_detected_states(handler, handler, obj_name)
+
+    def _state_requests(self) -> list[str]:
+        """Objects whose root state :meth:`_is_detected_states` reads, besides the detected object."""
+        return []
+
+    def _is_detected_states(self, handler: BaseSimHandler, states, obj_name: str) -> torch.BoolTensor:
+        """Same as :meth:`is_detected`, reading poses through ``states`` (see :meth:`BaseChecker._check_states`)."""
         raise NotImplementedError
 
     def get_debug_viewers(self) -> list[BaseObjCfg]:
@@ -64,23 +72,35 @@ class RelativeBboxDetector(BaseDetector):
     fixed: bool = True
     """The pose of the bbox detector is fixed once reset. Otherwise, it will be updated every step in correspond to the base object. Default to True."""
 
-    def _update_checker(self, handler: BaseSimHandler, env_ids: list[int] | None = None):
-        if env_ids is None:
-            env_ids = list(range(handler.num_envs))
-
-        relative_rot_mat = matrix_from_quat(
-            torch.tensor(self.relative_quat, dtype=torch.float32, device=handler.device)
-        )  # [3, 3]
-        relative_pos = torch.tensor(self.relative_pos, dtype=torch.float32, device=handler.device)  # [3]
-        base_pos = handler.get_pos(self.base_obj_name, env_ids=env_ids)
-        if self.ignore_base_ori:
-            base_quat = torch.zeros((len(env_ids), 4), dtype=torch.float32, device=handler.device)
-            base_quat[:, 0] = 1.0
+    def _get_relative_transform(self, device: torch.device) -> tuple[torch.Tensor, torch.Tensor]:
+        """Constant relative position [3] and rotation matrix [3, 3] of the detector, cached per device."""
+        ## Keyed on the requested device, as the tensor device is resolved, e.g. "cuda:0" for "cuda"
+        if not hasattr(self, "_relative_transform") or self._relative_transform[0] != str(device):
+            relative_pos = torch.tensor(self.relative_pos, dtype=torch.float32, device=device)
+            relative_rot_mat = matrix_from_quat(torch.tensor(self.relative_quat, dtype=torch.float32, device=device))
+            self._relative_transform = (str(device), relative_pos, relative_rot_mat)
+        return self._relative_transform[1:]
+
+    def _update_checker(self, handler: BaseSimHandler, env_ids: list[int] | None = None, states=None):
+        if states is not None:
+            ## All envs, read from the states of a compiled checker
+            base_pos = states.get_pos(self.base_obj_name)
+            base_quat = None if self.ignore_base_ori else states.get_rot(self.base_obj_name)
+            env_ids = slice(None)
+        else:
+            if env_ids is None:
+                env_ids = list(range(handler.num_envs))
+            base_pos = handler.get_pos(self.base_obj_name, env_ids=env_ids)
+            base_quat = None if self.ignore_base_ori else handler.get_rot(self.base_obj_name, env_ids=env_ids)
+
+        relative_pos, relative_rot_mat = self._get_relative_transform(handler.device)  # [3], [3, 3]
+        if base_quat is None:
+            checker_pos = base_pos + relative_pos  # [n_env, 3]
+            checker_rot_mat = relative_rot_mat.expand(base_pos.shape[0], 3, 3)  # [n_env, 3, 3]
         else:
-            base_quat = handler.get_rot(self.base_obj_name, env_ids=env_ids)
-        base_rot_mat = matrix_from_quat(base_quat)  # [n_env, 3, 3]
-        checker_pos = base_pos + torch.matmul(base_rot_mat, relative_pos.unsqueeze(-1)).squeeze(-1)  # [n_env, 3]
-        checker_rot_mat = torch.matmul(base_rot_mat, relative_rot_mat)  # [n_env, 3, 3]
+            base_rot_mat = matrix_from_quat(base_quat)  # [n_env, 3, 3]
+            checker_pos = base_pos + torch.matmul(base_rot_mat, relative_pos.unsqueeze(-1)).squeeze(-1)  # [n_env, 3]
+            checker_rot_mat = torch.matmul(base_rot_mat, relative_rot_mat)  # [n_env, 3, 3]
 
         if not hasattr(self, "checker_pos"):
             self.checker_pos = torch.zeros((handler.num_envs, 3), dtype=torch.float32, device=handler.device)
@@ -104,11 +124,14 @@ class RelativeBboxDetector(BaseDetector):
         ## Reset debug viewer
         self.reset_debug_viewer(handler, env_ids)
 
-    def is_detected(self, handler: BaseSimHandler, obj_name: str) -> torch.BoolTensor:
+    def _state_requests(self) -> list[str]:
+        return [] if self.fixed else [self.base_obj_name]
+
+    def _is_detected_states(self, handler: BaseSimHandler, states, obj_name: str) -> torch.BoolTensor:
         if not self.fixed:
-            self._update_checker(handler)
+            self._update_checker(handler, states=states)
 
-        obj_pos = handler.get_pos(obj_name)
+        obj_pos = states.get_pos(obj_name)
 
         # [n_env, 3]
         obj_pos_checker_local = torch.matmul(
@@ -180,8 +203,8 @@ class Relative2DSphereDetector(BaseDetector):
 
         self.checker_pos = base_pos + relative_pos
 
-    def is_detected(self, handler: BaseSimHandler, obj_name: str) -> torch.BoolTensor:
-        obj_pos = handler.get_pos(obj_name)
+    def _is_detected_states(self, handler: BaseSimHandler, states, obj_name: str) -> torch.BoolTensor:
+        obj_pos = states.get_pos(obj_name)
 
         object_in_checker = (
             torch.norm(obj_pos[:, self.axis] - self.checker_pos[:, self.axis], p=2, dim=-1) < self.radius
@@ -223,8 +246,8 @@ class Relative3DSphereDetector(BaseDetector):
 
         self.checker_pos = base_pos + relative_pos
 
-    def is_detected(self, handler: BaseSimHandler, obj_name: str) -> torch.BoolTensor:
-        obj_pos = handler.get_pos(obj_name)
+    def _is_detected_states(self, handler: BaseSimHandler, states, obj_name: str) -> torch.BoolTensor:
+        obj_pos = states.get_pos(obj_name)
 
         object_in_checker = torch.norm(obj_pos - self.checker_pos, p=2, dim=-1) < self.radius
 
@@ -0,0 +1,164 @@
+"""Unit tests for the compiled evaluation of checker trees."""
+
+from __future__ import annotations
+
+import pytest
+import torch
+
+from metasim.cfg.checkers import (
+    AndOp,
+    JointPosChecker,
+    JointPosShiftChecker,
+    NotOp,
+    OrOp,
+    PositionShiftChecker,
+    RotationShiftChecker,
+)
+from metasim.cfg.checkers.base_checker import BaseChecker
+from metasim.sim.base import BaseSimHandler
+from metasim.utils.state import ObjectState, TensorState
+
+NUM_ENVS = 64
+
+
+class _StaticHandler(BaseSimHandler):
+    """Handler serving fixed states through the base accessors, counting the batched reads."""
+
+    def __init__(self, states: TensorState, joint_names: dict[str, list[str]]):
+        self._num_envs = NUM_ENVS
+        self._states = states
+        self._joint_names = joint_names
+        self._state_cache = None
+        self._state_cache_valid = {}
+        self.num_root_reads = 0
+
+    def _get_states(self, env_ids: list[int] | None = None) -> TensorState:
+        return self._states
+
+    def _simulate(self):
+        pass
+
+    def get_root_state(self, obj_names, env_ids=None):
+        self.num_root_reads += 1
+        return super().get_root_state(obj_names, env_ids=env_ids)
+
+    def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        return sorted(self._joint_names.get(obj_name, []))
+
+    @property
+    def device(self) -> torch.device:
+        return torch.device("cpu")
+
+
+def _random_quat(n: int, generator: torch.Generator) -> torch.Tensor:
+    """Random rotations around z, as wxyz quaternions."""
+    angle = (torch.rand(n, generator=generator) * 2 - 1) * torch.pi
+    return torch.stack([torch.cos(angle / 2), torch.zeros(n), torch.zeros(n), torch.sin(angle / 2)], dim=-1)
+
+
+def _make_states(seed: int) -> TensorState:
+    generator = torch.Generator().manual_seed(seed)
+    objects = {}
+    for name in ("cube", "box"):
+        root_state = torch.zeros(NUM_ENVS, 13)
+        root_state[:, :3] = torch.rand(NUM_ENVS, 3, generator=generator) - 0.5
+        root_state[:, 3:7] = _random_quat(NUM_ENVS, generator)
+        joint_pos = torch.rand(NUM_ENVS, 2, generator=generator) * 2 - 1 if name == "box" else None
+        objects[name] = ObjectState(root_state=root_state, joint_pos=joint_pos)
+    return TensorState(objects=objects, robots={}, cameras={}, sensors={})
+
+
+def _tree_check(checker: BaseChecker, handler: BaseSimHandler) -> torch.BoolTensor:
+    """Reference evaluation: recurse over the tree and call the leaves one by one."""
+    if isinstance(checker, AndOp):
+        result = torch.ones(handler.num_envs, dtype=torch.bool)
+        for child in checker.checkers:
+            result = result & _tree_check(child, handler).bool()
+        return result
+    if isinstance(checker, OrOp):
+        result = torch.zeros(handler.num_envs, dtype=torch.bool)
+        for child in checker.checkers:
+            result = result | _tree_check(child, handler).bool()
+        return result
+    if isinstance(checker, NotOp):
+        return ~_tree_check(checker.checker, handler).bool()
+    return checker.check(handler).bool()
+
+
+def _leaves():
+    return {
+        "hinge_ge": JointPosChecker(obj_name="box", joint_name="hinge", mode="ge", radian_threshold=0.0),
+        "slider_le": JointPosChecker(obj_name="box", joint_name="slider", mode="le", radian_threshold=0.3),
+        "hinge_shift": JointPosShiftChecker(obj_name="box", joint_name="hinge", threshold=-0.2),
+        "cube_x": PositionShiftChecker(obj_name="cube", distance=0.1, axis="x"),
+        "box_z": PositionShiftChecker(obj_name="box", distance=-0.1, axis="z"),
+        "cube_rot": RotationShiftChecker(obj_name="cube", radian_threshold=0.5, axis="z"),
+    }
+
+
+def _trees():
+    leaf = _leaves()
+    return {
+        "and": AndOp(checkers=[leaf["hinge_ge"], leaf["cube_x"]]),
+        "or": OrOp(checkers=[leaf["slider_le"], leaf["box_z"], leaf["cube_rot"]]),
+        "not": NotOp(checker=leaf["hinge_shift"]),
+        "nested": AndOp(
+            checkers=[
+                OrOp(checkers=[leaf["hinge_ge"], NotOp(checker=leaf["cube_x"])]),
+                NotOp(checker=AndOp(checkers=[leaf["slider_le"], leaf["cube_rot"]])),
+                OrOp(checkers=[leaf["box_z"], leaf["hinge_shift"]]),
+            ]
+        ),
+        "double_not": NotOp(checker=NotOp(checker=OrOp(checkers=[leaf["hinge_ge"], leaf["box_z"]]))),
+        "empty_and": AndOp(checkers=[]),
+        "empty_or": OrOp(checkers=[leaf["cube_x"], OrOp(checkers=[])]),
+    }
+
+
+class TestCheckerPlan:
+    """Test suite for the compiled checker plan."""
+
+    @pytest.fixture
+    def handler(self):
+        """Create a handler with random poses and joint positions."""
+        return _StaticHandler(_make_states(seed=0), {"box": ["slider", "hinge"]})
+
+    @pytest.mark.parametrize("tree_name", list(_trees()))
+    def test_plan_matches_tree(self, handler, tree_name):
+        """The plan and the recursive evaluation agree for every env."""
+        tree = _trees()[tree_name]
+        tree.reset(handler)
+        handler._states = _make_states(seed=1)
+        handler._invalidate_state_cache()
+
+        expected = _tree_check(tree, handler)
+        actual = tree.check(handler)
+        assert actual.dtype == torch.bool
+        assert actual.shape == (NUM_ENVS,)
+        assert torch.equal(actual, expected)
+
+    def test_results_are_mixed(self, handler):
+        """The trees are not trivially constant, so the comparison above is meaningful."""
+        tree = _trees()["nested"]
+        tree.reset(handler)
+        handler._states = _make_states(seed=1)
+        handler._invalidate_state_cache()
+        result = tree.check(handler)
+        assert result.any() and not result.all()
+
+    def test_single_root_read(self, handler):
+        """All the poses of the tree are fetched with one batched read per check."""
+        tree = _trees()["nested"]
+        tree.reset(handler)
+        handler.num_root_reads = 0
+        tree.check(handler)
+        assert handler.num_root_reads == 1
+
+    def test_program_is_postfix(self):
+        """Each operator follows its operands in the program."""
+        leaf = _leaves()
+        tree = OrOp(checkers=[leaf["hinge_ge"], NotOp(checker=leaf["cube_x"])])
+        program = []
+        tree._compile(program)
+        assert [op for op, _ in program] == ["leaf", "leaf", "not", "or"]
+        assert program[-1][1] == 2
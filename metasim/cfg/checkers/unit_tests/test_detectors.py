@@ -0,0 +1,26 @@
+"""Unit tests for the detectors of the checkers."""
+
+from __future__ import annotations
+
+import torch
+
+from metasim.cfg.checkers.detectors import RelativeBboxDetector
+
+
+class TestRelativeBboxDetector:
+    """Test suite for the relative bbox detector."""
+
+    def test_relative_transform_is_cached_for_unresolved_devices(self):
+        """A device that resolves to another name, e.g. "cpu:0" to "cpu", still reuses the cached transform."""
+        detector = RelativeBboxDetector(
+            base_obj_name="table",
+            relative_pos=(0.1, 0.2, 0.3),
+            relative_quat=(1.0, 0.0, 0.0, 0.0),
+            checker_lower=(-0.1, -0.1, -0.1),
+            checker_upper=(0.1, 0.1, 0.1),
+        )
+        relative_pos, relative_rot_mat = detector._get_relative_transform("cpu:0")
+        assert relative_pos.device != torch.device("cpu:0")
+        cached_pos, cached_rot_mat = detector._get_relative_transform("cpu:0")
+        assert cached_pos is relative_pos and cached_rot_mat is relative_rot_mat
+        assert torch.equal(relative_rot_mat, torch.eye(3))
@@ -57,6 +57,14 @@ class ScenarioCfg:
     """environment spacing for parallel environments"""
     env_spacing: float = 1.0
 
+    ## Parallel
+    parallel_transport: Literal["pipe", "shm"] = "pipe"
+    """How :func:`metasim.sim.parallel.ParallelSimWrapper` workers return states. ``"pipe"`` pickles every state through the worker pipe, ``"shm"`` writes them into shared-memory buffers preallocated by the parent."""
+    envs_per_worker: int = 1
+    """Number of environments owned by each :func:`metasim.sim.parallel.ParallelSimWrapper` worker process. Each worker gets a contiguous slice of environments. Natively batched simulators (MJX, Genesis) only use workers when this is between 1 and ``num_envs``, exclusive, and run one batched handler per worker."""
+    parallel_backend: Literal["process", "thread"] = "process"
+    """How simulators without native batching run several environments. ``"process"`` uses :func:`metasim.sim.parallel.ParallelSimWrapper` worker processes. ``"thread"`` keeps all environments in one process sharing one model, stepped from a thread pool. Only MuJoCo supports ``"thread"``."""
+
     def __post_init__(self):
         """Post-initialization configuration."""
         ### Align configurations
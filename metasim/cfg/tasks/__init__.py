@@ -2,61 +2,59 @@
 
 """Sub-module containing the task configuration."""
 
+import importlib
 import time
 
 from loguru import logger as log
 
 from .base_task_cfg import BaseTaskCfg
 
-
-def __get_quick_ref():
-    tic = time.time()
-
-    from .calvin.calvin import MoveSliderLeftACfg
-    from .debug.reach_cfg import ReachOriginCfg
-    from .dmcontrol.walker_walk_cfg import WalkerWalkCfg
-    from .fetch import FetchCloseBoxCfg
-    from .gapartnet import GapartnetOpenDrawerCfg
-    from .humanoidbench import StandCfg
-    from .isaacgym_envs.allegrohand_cfg import AllegroHandCfg
-    from .isaacgym_envs.ant_isaacgym_cfg import AntIsaacGymCfg
-    from .isaacgym_envs.anymal_cfg import AnymalCfg
-    from .libero.libero_objects.libero_pick_alphabet_soup import LiberoPickAlphabetSoupCfg
-    from .libero.libero_objects.libero_pick_bbq_sauce import LiberoPickBbqSauceCfg
-    from .libero.libero_objects.libero_pick_butter import LiberoPickButterCfg
-    from .libero.libero_objects.libero_pick_chocolate_pudding import LiberoPickChocolatePuddingCfg
-    from .libero.libero_objects.libero_pick_cream_cheese import LiberoPickCreamCheeseCfg
-    from .libero.libero_objects.libero_pick_ketchup import LiberoPickKetchupCfg
-    from .libero.libero_objects.libero_pick_milk import LiberoPickMilkCfg
-    from .libero.libero_objects.libero_pick_orange_juice import LiberoPickOrangeJuiceCfg
-    from .libero.libero_objects.libero_pick_salad_dressing import LiberoPickSaladDressingCfg
-    from .libero.libero_objects.libero_pick_tomato_sauce import LiberoPickTomatoSauceCfg
-    from .maniskill.pick_cube_cfg import PickCubeCfg
-    from .maniskill.pick_single_ycb import PickSingleYcbCrackerBoxCfg
-    from .maniskill.stack_cube_cfg import StackCubeCfg
-    from .rlafford.rl_afford_open_door_cfg import RlAffordOpenDoorCfg
-    from .rlbench.basketball_in_hoop_cfg import BasketballInHoopCfg
-    from .rlbench.close_box_cfg import CloseBoxCfg
-    from .robosuite import SquareD0Cfg, SquareD1Cfg, SquareD2Cfg, StackD0Cfg
-    from .simpler_env.simpler_env_grasp_opened_coke_can_cfg import SimplerEnvGraspOpenedCokeCanCfg
-    from .simpler_env.simpler_env_move_near import SimplerEnvMoveNearCfg
-
-    # from .skillblender import G1BaseTaskCfg, H1BaseTaskCfg
-    from .uh1 import MabaoguoCfg
-
-    toc = time.time()
-
-    log.trace(f"Time taken to load quick ref: {toc - tic:.2f} seconds")
-
-    return locals()
-
-
-__quick_ref = __get_quick_ref()
+__QUICK_REF = {
+    "MoveSliderLeftACfg": ".calvin.calvin",
+    "ReachOriginCfg": ".debug.reach_cfg",
+    "WalkerWalkCfg": ".dmcontrol.walker_walk_cfg",
+    "FetchCloseBoxCfg": ".fetch",
+    "GapartnetOpenDrawerCfg": ".gapartnet",
+    "StandCfg": ".humanoidbench",
+    "AllegroHandCfg": ".isaacgym_envs.allegrohand_cfg",
+    "AntIsaacGymCfg": ".isaacgym_envs.ant_isaacgym_cfg",
+    "AnymalCfg": ".isaacgym_envs.anymal_cfg",
+    "LiberoPickAlphabetSoupCfg": ".libero.libero_objects.libero_pick_alphabet_soup",
+    "LiberoPickBbqSauceCfg": ".libero.libero_objects.libero_pick_bbq_sauce",
+    "LiberoPickButterCfg": ".libero.libero_objects.libero_pick_butter",
+    "LiberoPickChocolatePuddingCfg": ".libero.libero_objects.libero_pick_chocolate_pudding",
+    "LiberoPickCreamCheeseCfg": ".libero.libero_objects.libero_pick_cream_cheese",
+    "LiberoPickKetchupCfg": ".libero.libero_objects.libero_pick_ketchup",
+    "LiberoPickMilkCfg": ".libero.libero_objects.libero_pick_milk",
+    "LiberoPickOrangeJuiceCfg": ".libero.libero_objects.libero_pick_orange_juice",
+    "LiberoPickSaladDressingCfg": ".libero.libero_objects.libero_pick_salad_dressing",
+    "LiberoPickTomatoSauceCfg": ".libero.libero_objects.libero_pick_tomato_sauce",
+    "PickCubeCfg": ".maniskill.pick_cube_cfg",
+    "PickSingleYcbCrackerBoxCfg": ".maniskill",
+    "StackCubeCfg": ".maniskill.stack_cube_cfg",
+    "RlAffordOpenDoorCfg": ".rlafford.rl_afford_open_door_cfg",
+    "BasketballInHoopCfg": ".rlbench.basketball_in_hoop_cfg",
+    "CloseBoxCfg": ".rlbench.close_box_cfg",
+    "SquareD0Cfg": ".robosuite",
+    "SquareD1Cfg": ".robosuite",
+    "SquareD2Cfg": ".robosuite",
+    "StackD0Cfg": ".robosuite",
+    "SimplerEnvGraspOpenedCokeCanCfg": ".simpler_env.simpler_env_grasp_opened_coke_can_cfg",
+    "SimplerEnvMoveNearCfg": ".simpler_env.simpler_env_move_near",
+    # "G1BaseTaskCfg": ".skillblender",
+    # "H1BaseTaskCfg": ".skillblender",
+    "MabaoguoCfg": ".uh1",
+}
+"""Modules of the most used task configs, imported on first access."""
 
 
 def __getattr__(name):
-    if name in __quick_ref:
-        return __quick_ref[name]
+    if name in __QUICK_REF:
+        tic = time.time()
+        task_cls = getattr(importlib.import_module(__QUICK_REF[name], __name__), name)
+        log.trace(f"Time taken to load {name}: {time.time() - tic:.2f} seconds")
+        globals()[name] = task_cls
+        return task_cls
 
     if name.startswith("GraspNet") and name.endswith("Cfg"):
         from .graspnet import __getattr__ as graspnet_getattr
@@ -68,6 +66,12 @@ def __getattr__(name):
 
         return gapartmanip_getattr(name)
 
-    else:
-        raise AttributeError(f"Module {__name__} has no attribute {name}")
-        raise AttributeError(f"Module {__name__} has no attribute {name}")
+    elif name.endswith("Cfg"):
+        from .task_index import INDEXED_PACKAGES, get_task_cls
+
+        for package in INDEXED_PACKAGES:
+            task_cls = get_task_cls(package, name)
+            if task_cls is not None:
+                return task_cls
+
+    raise AttributeError(f"Module {__name__} has no attribute {name}")
@@ -14,13 +14,7 @@ from metasim.cfg.tasks.base_task_cfg import BaseRLTaskCfg, SimParamCfg
 from metasim.constants import BenchmarkType, TaskType
 from metasim.types import EnvState
 from metasim.utils import configclass, humanoid_reward_util
-from metasim.utils.humanoid_robot_util import (
-    actuator_forces_tensor,
-    neck_height_tensor,
-    robot_local_velocity_tensor,
-    robot_velocity_tensor,
-    torso_upright_tensor,
-)
+from metasim.utils.humanoid_robot_util import humanoid_features
 
 logging.addLevelName(5, "TRACE")
 log.configure(handlers=[{"sink": RichHandler(), "format": "{message}"}])
@@ -61,6 +55,53 @@ class HumanoidBaseReward:
             raise ValueError(f"Unknown robot {robot_name}")
 
 
+########################################################
+## Reward kernels
+########################################################
+
+
+def stable_reward_terms(
+    neck_height: torch.Tensor, torso_upright: torch.Tensor, actuator_forces: torch.Tensor, stand_neck_height: float
+) -> dict[str, torch.Tensor]:
+    """Terms of the stable reward. Pure tensor function, so it can be wrapped by ``torch.compile``."""
+    standing = humanoid_reward_util.tolerance_tensor(
+        neck_height,  # Adjust for neck height
+        bounds=(stand_neck_height, float("inf")),
+        margin=stand_neck_height / 4,
+    )
+    upright = humanoid_reward_util.tolerance_tensor(
+        torso_upright,
+        bounds=(0.9, float("inf")),
+        margin=1.9,
+        value_at_margin=0,
+        sigmoid="linear",
+    )
+    small_control = humanoid_reward_util.tolerance_tensor(
+        actuator_forces,
+        margin=10,
+        value_at_margin=0,
+        sigmoid="quadratic",
+    ).mean(dim=-1)
+    return {"standing": standing, "upright": upright, "small_control": (4 + small_control) / 5}
+
+
+def dont_move_reward_term(horizontal_velocity: torch.Tensor) -> torch.Tensor:
+    """Moving term of the locomotion reward for tasks that should stand still."""
+    return humanoid_reward_util.tolerance_tensor(horizontal_velocity, margin=2).mean(dim=-1)
+
+
+def move_reward_term(forward_velocity: torch.Tensor, move_speed: float) -> torch.Tensor:
+    """Moving term of the locomotion reward for tasks that should move forward at ``move_speed``."""
+    move = humanoid_reward_util.tolerance_tensor(
+        forward_velocity,
+        bounds=(move_speed, float("inf")),
+        margin=move_speed,
+        value_at_margin=0,
+        sigmoid="linear",
+    )
+    return (5 * move + 1) / 6
+
+
 class StableReward(HumanoidBaseReward):
     """Base class for locomotion rewards."""
 
@@ -73,31 +114,21 @@ class StableReward(HumanoidBaseReward):
         """Initialize the locomotion reward."""
         super().__init__(robot_name)
 
-    def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
-        """Compute the locomotion reward."""
-        ret_rewards = []
-        standing = humanoid_reward_util.tolerance_tensor(
-            neck_height_tensor(states, self.robot_name),  # Adjust for neck height
-            bounds=(self._stand_neck_height, float("inf")),
-            margin=self._stand_neck_height / 4,
-        )
-        upright = humanoid_reward_util.tolerance_tensor(
-            torso_upright_tensor(states, self.robot_name),
-            bounds=(0.9, float("inf")),
-            margin=1.9,
-            value_at_margin=0,
-            sigmoid="linear",
+    def terms(self, states: EnvState) -> dict[str, torch.Tensor]:
+        """Compute the terms of the stable reward, keyed by name."""
+        features = humanoid_features(states, self.robot_name)
+        return stable_reward_terms(
+            features.neck_height, features.torso_upright, features.actuator_forces, self._stand_neck_height
         )
-        stand_reward = standing * upright
-        small_control = humanoid_reward_util.tolerance_tensor(
-            actuator_forces_tensor(states, self.robot_name),
-            margin=10,
-            value_at_margin=0,
-            sigmoid="quadratic",
-        ).mean(dim=-1)
-        small_control = (4 + small_control) / 5
-        ret_rewards = small_control * stand_reward
-        return ret_rewards
+
+    @staticmethod
+    def combine(terms: dict[str, torch.Tensor]) -> torch.FloatTensor:
+        """Combine the terms returned by :meth:`terms` into the stable reward."""
+        return terms["small_control"] * (terms["standing"] * terms["upright"])
+
+    def __call__(self, states: EnvState) -> torch.FloatTensor:
+        """Compute the locomotion reward."""
+        return self.combine(self.terms(states))
 
 
 class BaseLocomotionReward(HumanoidBaseReward):
@@ -111,27 +142,22 @@ class BaseLocomotionReward(HumanoidBaseReward):
     def __init__(self, robot_name="h1"):
         """Initialize the locomotion reward."""
         super().__init__(robot_name)
+        self._stable = StableReward(robot_name)
 
-    def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
-        """Compute the locomotion reward."""
-        moving_reward = []
-        stable_rewards = StableReward(self.robot_name)(states)
+    def terms(self, states: EnvState) -> dict[str, torch.Tensor]:
+        """Compute the terms of the locomotion reward, keyed by name."""
+        terms = self._stable.terms(states)
+        features = humanoid_features(states, self.robot_name)
         if self._move_speed == 0:
-            horizontal_velocity = robot_velocity_tensor(states, self.robot_name)[:, [0, 1]]
-            dont_move = humanoid_reward_util.tolerance_tensor(horizontal_velocity, margin=2).mean(dim=-1)
-            moving_reward = dont_move
+            terms["move"] = dont_move_reward_term(features.velocity[:, :2])
         else:
-            com_x_velocity = robot_local_velocity_tensor(states, self.robot_name)[:, 0]
-            move = humanoid_reward_util.tolerance_tensor(
-                com_x_velocity,
-                bounds=(self._move_speed, float("inf")),
-                margin=self._move_speed,
-                value_at_margin=0,
-                sigmoid="linear",
-            )
-            move = (5 * move + 1) / 6
-            moving_reward = move
-        return stable_rewards * moving_reward
+            terms["move"] = move_reward_term(features.local_velocity[:, 0], self._move_speed)
+        return terms
+
+    def __call__(self, states: EnvState) -> torch.FloatTensor:
+        """Compute the locomotion reward."""
+        terms = self.terms(states)
+        return self._stable.combine(terms) * terms["move"]
 
 
 @configclass
@@ -20,6 +20,7 @@ class StandingReward(HumanoidBaseReward):
         """Initialize the standing reward."""
         super().__init__(robot_name)
         self._stand_height = 0.6
+        self._stable = StableReward(robot_name)
 
     def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
         """Compute the standing reward."""
@@ -31,7 +32,7 @@ class StandingReward(HumanoidBaseReward):
             still_reward = (still_x + still_y) / 2
             results_still.append(still_reward)
 
-        stable_rewards = StableReward(robot_name=self._robot_name)(states)
+        stable_rewards = self._stable(states)
         return torch.tensor(results_still) * stable_rewards
 
 
@@ -19,10 +19,13 @@ class DoorReward(HumanoidBaseReward):
     def __init__(self, robot_name="h1"):
         """Initialize the door reward."""
         super().__init__(robot_name)
+        self._stable = StableReward(robot_name)
 
     def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
         """Compute the door reward."""
         results = []
+        # Calculate stable reward
+        stable = self._stable(states)
         for state in states:
             # Get IMU position (for passage reward)
             imu_pos = state[f"metasim_site_{self.robot_name}/imu"]["pos"]
@@ -45,9 +48,6 @@ class DoorReward(HumanoidBaseReward):
             right_dist = torch.norm(right_hand_pos - door_handle_pos)
             min_hand_dist = torch.min(left_dist, right_dist)
 
-            # Calculate stable reward
-            stable = StableReward(robot_name=self.robot_name)(states)
-
             # Calculate each sub-reward
             # opendoor = min(1, θdoor**2)
             opendoor = min(1.0, door_hinge_angle**2)
@@ -20,10 +20,13 @@ class PackageReward(HumanoidBaseReward):
     def __init__(self, robot_name="h1"):
         """Initialize the package reward."""
         super().__init__(robot_name)
+        self._stable = StableReward(robot_name)
 
     def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
         """Compute the package reward."""
         rewards = torch.zeros(len(states))
+        # The robot's stability reward
+        stable = self._stable(states)
 
         for i, state in enumerate(states):
             # Retrieve package and target location
@@ -46,9 +49,6 @@ class PackageReward(HumanoidBaseReward):
             # Calculate the distance between the hands and the package
             d_hand = torch.norm(left_hand_pos - package_pos) + torch.norm(right_hand_pos - package_pos)
 
-            # The robot's stability reward
-            stable = StableReward(robot_name=self.robot_name)(states)
-
             # Calculate the total reward
             reward = (-3.0 * package_target_dist) - (0.1 * d_hand) + stable + height_package + (1000.0 * success)
 
@@ -23,10 +23,13 @@ class PowerliftReward(HumanoidBaseReward):
     def __init__(self, robot_name="h1"):
         """Initialize the powerlift reward."""
         super().__init__(robot_name)
+        self._stable = StableReward(robot_name)
 
     def __call__(self, states: list[EnvState]) -> torch.FloatTensor:
         """Compute the powerlift reward."""
         rewards = torch.zeros(len(states))
+        # The robot's stability reward
+        stable = self._stable(states)
 
         for i, state in enumerate(states):
             # Retrieve dumbbell and target location
@@ -34,9 +37,6 @@ class PowerliftReward(HumanoidBaseReward):
 
             reward_height = tolerance(dumbbell_pos[2], bounds=(1.9, 2.1), margin=2)
 
-            # The robot's stability reward
-            stable = StableReward(robot_name=self.robot_name)(states)
-
             # Calculate the total reward
             reward = 0.2 * stable + 0.8 * reward_height
 
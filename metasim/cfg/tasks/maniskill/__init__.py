@@ -2,14 +2,6 @@
 
 # ruff: noqa: F401
 
-import importlib
-
-__CANDIDATE_MODULES = [
-    "peg_insertion_side",
-    "pick_single_egad",
-    "pick_single_ycb",
-]
-
 
 def __getattr__(name):
     from .pick_cube_cfg import PickCubeCfg
@@ -19,10 +11,11 @@ def __getattr__(name):
     if name in locals():
         return locals()[name]
 
-    # Lazy load modules
-    for module_name in __CANDIDATE_MODULES:
-        module = importlib.import_module(f".{module_name}", __name__)
-        if name in module.__dict__:
-            return getattr(module, name)
+    # The generated tasks are built from the task index, without importing their modules
+    from ..task_index import get_task_cls
+
+    task_cls = get_task_cls("maniskill", name)
+    if task_cls is not None:
+        return task_cls
 
     raise AttributeError(f"module {__name__} has no attribute {name}")
@@ -0,0 +1,12 @@
+"""Task configurations for Open6DOR tasks."""
+
+
+def __getattr__(name):
+    # The generated tasks are built from the task index, without importing their modules
+    from ..task_index import get_task_cls
+
+    task_cls = get_task_cls("open6dor", name)
+    if task_cls is not None:
+        return task_cls
+
+    raise AttributeError(f"module {__name__} has no attribute {name}")
@@ -0,0 +1,393 @@
+"""On-disk index of the generated task configs.
+
+Some benchmarks (e.g. Open6DOR and ManiSkill's EGAD/YCB/peg tasks) ship tens of thousands of lines of generated
+``@configclass`` task classes. Importing those modules takes seconds, while a run only needs one task. This module
+parses the generated files once with :mod:`ast`, without importing them, and stores the literal class bodies in a
+user cache directory: a small manifest mapping each class to its source file, and one shard per source file holding
+the class bodies. Task classes are then built on demand from the index.
+
+The index is built on first use, and rebuilt when the size, mtime or content of a source file changed. It lives in
+``$METASIM_CACHE_DIR/task_index`` (``~/.cache/metasim/task_index`` by default), under a directory specific to this
+checkout, so read-only installs work. It can also be built ahead of time::
+
+    python -m metasim.cfg.tasks.task_index
+"""
+
+from __future__ import annotations
+
+import ast
+import glob
+import hashlib
+import importlib
+import json
+import os
+import time
+
+from loguru import logger as log
+
+from metasim.utils import configclass
+
+TASKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INDEXED_PACKAGES: dict[str, tuple[str, ...]] = {
+    "maniskill": ("peg_insertion_side.py", "pick_single_egad.py", "pick_single_ycb.py"),
+    "open6dor": ("task/*/*.py",),
+}
+"""Generated source files of each indexed package, as glob patterns relative to the package directory."""
+
+
+def _cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.environ.get("METASIM_CACHE_DIR", os.path.join(cache_home, "metasim"))
+
+
+INDEX_DIR = os.path.join(_cache_dir(), "task_index", hashlib.sha1(TASKS_DIR.encode()).hexdigest()[:12])
+"""Directory of the index of this checkout. Each indexed package has a subdirectory."""
+
+_manifests: dict[str, dict] = {}
+_shards: dict[tuple[str, str], dict] = {}
+_task_classes: dict[tuple[str, str], type] = {}
+
+
+class _Unindexable(Exception):
+    """Raised when a class body cannot be represented in the index. Such classes are imported normally."""
+
+
+############################################################
+## Build
+############################################################
+def _module_name(package: str, path: str) -> str:
+    rel = os.path.relpath(path, TASKS_DIR)
+    return "metasim.cfg.tasks." + os.path.splitext(rel)[0].replace(os.sep, ".")
+
+
+def _source_files(package: str) -> list[str]:
+    package_dir = os.path.join(TASKS_DIR, package)
+    paths = []
+    for pattern in INDEXED_PACKAGES[package]:
+        paths += sorted(glob.glob(os.path.join(package_dir, pattern)))
+    return [p for p in paths if os.path.basename(p) != "__init__.py"]
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_stats(package: str) -> dict[str, dict]:
+    """Size, mtime and content hash of each source file of ``package``, keyed by path relative to the package."""
+    package_dir = os.path.join(TASKS_DIR, package)
+    stats = {}
+    for path in _source_files(package):
+        st = os.stat(path)
+        stats[os.path.relpath(path, package_dir)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": _sha256(path),
+        }
+    return stats
+
+
+def _index_dir(package: str) -> str:
+    return os.path.join(INDEX_DIR, package)
+
+
+def _resolve_imports(tree: ast.Module, module: str) -> dict[str, str]:
+    """Map the names imported by a module to the absolute module they come from."""
+    parts = module.split(".")
+    imports = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        if node.level > 0:
+            base = ".".join(parts[: -node.level])
+            source = f"{base}.{node.module}" if node.module else base
+        else:
+            source = node.module
+        for alias in node.names:
+            if alias.name != "*":
+                imports[alias.asname or alias.name] = source
+    return imports
+
+
+def _encode(node: ast.expr, imports: dict[str, str]):
+    """Encode a literal expression as JSON. Names must be imported, so the value can be rebuilt without the module."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        return -node.operand.value
+    if isinstance(node, ast.List):
+        return [_encode(e, imports) for e in node.elts]
+    if isinstance(node, ast.Tuple):
+        return {"__tuple__": [_encode(e, imports) for e in node.elts]}
+    if isinstance(node, ast.Dict):
+        if any(k is None for k in node.keys):
+            raise _Unindexable("dict unpacking")
+        return {"__dict__": [[_encode(k, imports), _encode(v, imports)] for k, v in zip(node.keys, node.values)]}
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        return {"__ref__": _encode_ref(node, imports)}
+    if isinstance(node, ast.Call):
+        if any(kw.arg is None for kw in node.keywords) or any(isinstance(a, ast.Starred) for a in node.args):
+            raise _Unindexable("argument unpacking")
+        return {
+            "__call__": _encode_ref(node.func, imports),
+            "args": [_encode(a, imports) for a in node.args],
+            "kwargs": {kw.arg: _encode(kw.value, imports) for kw in node.keywords},
+        }
+    raise _Unindexable(type(node).__name__)
+
+
+def _encode_ref(node: ast.expr, imports: dict[str, str]) -> list[str]:
+    attrs = []
+    while isinstance(node, ast.Attribute):
+        attrs.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id not in imports:
+        raise _Unindexable("reference to a name that is not imported")
+    return [imports[node.id], ".".join([node.id, *reversed(attrs)])]
+
+
+def _index_class(node: ast.ClassDef, module: str, imports: dict[str, str], local_classes: set[str]) -> dict | None:
+    if len(node.bases) != 1 or node.keywords or len(node.decorator_list) != 1:
+        return None
+    decorator = node.decorator_list[0]
+    if not (isinstance(decorator, ast.Name) and imports.get(decorator.id) == "metasim.utils"):
+        return None
+
+    base = node.bases[0]
+    if isinstance(base, ast.Name) and base.id in local_classes:
+        base_ref = [module, base.id]
+    else:
+        try:
+            base_ref = _encode_ref(base, imports)
+        except _Unindexable:
+            return None
+
+    fields = {}
+    body = node.body
+    doc = ast.get_docstring(node, clean=False)
+    if doc is not None:
+        body = body[1:]
+    for stmt in body:
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            name, value = stmt.targets[0].id, stmt.value
+        elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name) and stmt.value is not None:
+            name, value = stmt.target.id, stmt.value
+        else:
+            return None
+        try:
+            fields[name] = _encode(value, imports)
+        except _Unindexable:
+            return None
+    return {"module": module, "base": base_ref, "doc": doc, "fields": fields}
+
+
+def _shard_name(package: str, path: str) -> str:
+    rel = os.path.relpath(path, os.path.join(TASKS_DIR, package))
+    return os.path.splitext(rel)[0].replace(os.sep, ".")
+
+
+def build_index(package: str) -> tuple[dict, dict[str, dict]]:
+    """Parse the generated sources of ``package`` and build its index.
+
+    Args:
+        package: Name of the task package, one of :data:`INDEXED_PACKAGES`.
+
+    Returns:
+        The manifest and the shards. The manifest holds the stats of each source file (to detect a stale index) and
+        the shard of each task class. There is one shard per source file, mapping class names to their entries.
+        Classes that cannot be represented only record their module and are imported normally.
+    """
+    manifest = {"sources": _source_stats(package), "tasks": {}}
+    shards = {}
+    for path in _source_files(package):
+        module = _module_name(package, path)
+        shard_name = _shard_name(package, path)
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+        imports = _resolve_imports(tree, module)
+        shard = {}
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                entry = _index_class(node, module, imports, set(shard.keys()))
+                shard[node.name] = entry if entry is not None else {"module": module}
+                if node.name in manifest["tasks"]:
+                    log.warning(
+                        f"Task class {node.name} is defined in both {manifest['tasks'][node.name]} and {shard_name}"
+                    )
+                manifest["tasks"][node.name] = shard_name
+        shards[shard_name] = shard
+    return manifest, shards
+
+
+def _write_json(path: str, data) -> None:
+    """Write ``data`` atomically, so that concurrent readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def write_index(package: str, manifest: dict, shards: dict[str, dict]) -> str:
+    """Write the index of ``package`` into its cache directory and return the directory.
+
+    The shards are written before the manifest, so a manifest always refers to complete shards.
+    """
+    index_dir = _index_dir(package)
+    os.makedirs(index_dir, exist_ok=True)
+    for shard_name, shard in shards.items():
+        _write_json(os.path.join(index_dir, f"{shard_name}.json"), shard)
+    _write_json(os.path.join(index_dir, "manifest.json"), manifest)
+    return index_dir
+
+
+############################################################
+## Load
+############################################################
+def _is_fresh(package: str, manifest: dict) -> bool:
+    """Whether the index described by ``manifest`` matches the current sources of ``package``.
+
+    A source whose size and mtime are unchanged is not read. One whose mtime changed (e.g. after a fresh checkout) but
+    whose content hash did not is still fresh, and its new mtime is saved to the manifest.
+    """
+    package_dir = os.path.join(TASKS_DIR, package)
+    sources = manifest.get("sources", {})
+    paths = {os.path.relpath(p, package_dir): p for p in _source_files(package)}
+    if set(paths) != set(sources):
+        return False
+
+    touched = False
+    for rel, path in paths.items():
+        entry, st = sources[rel], os.stat(path)
+        if not isinstance(entry, dict) or entry.get("size") != st.st_size:
+            return False
+        if entry.get("mtime_ns") == st.st_mtime_ns:
+            continue
+        if entry.get("sha256") != _sha256(path):
+            return False
+        entry["mtime_ns"] = st.st_mtime_ns
+        touched = True
+    if touched:
+        try:
+            _write_json(os.path.join(_index_dir(package), "manifest.json"), manifest)
+        except OSError as e:
+            log.warning(f"Failed to update task index {_index_dir(package)}: {e}")
+    return True
+
+
+def _load_manifest(package: str) -> dict:
+    """Load the manifest of ``package``, building the index if it is missing or its sources changed."""
+    if package in _manifests:
+        return _manifests[package]
+
+    index_dir = _index_dir(package)
+    manifest_path = os.path.join(index_dir, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            log.warning(f"Ignoring corrupted task index {index_dir}")
+        if manifest is not None and not _is_fresh(package, manifest):
+            log.warning(f"Task index {index_dir} is stale, rebuilding it")
+            manifest = None
+    if manifest is None:
+        tic = time.time()
+        manifest, shards = build_index(package)
+        log.info(f"Built task index of {package} in {time.time() - tic:.2f}s")
+        _shards.update({(package, shard_name): shard for shard_name, shard in shards.items()})
+        try:
+            write_index(package, manifest, shards)
+        except OSError as e:
+            log.warning(f"Failed to write task index {index_dir}, it will be rebuilt by the next process: {e}")
+
+    _manifests[package] = manifest
+    return manifest
+
+
+def _load_shard(package: str, shard_name: str) -> dict:
+    if (package, shard_name) not in _shards:
+        try:
+            with open(os.path.join(_index_dir(package), f"{shard_name}.json")) as f:
+                _shards[(package, shard_name)] = json.load(f)
+        except (OSError, ValueError):
+            ## The cache was cleared or corrupted after the manifest was loaded
+            log.warning(f"Task index shard {shard_name} of {package} is unreadable, rebuilding the index")
+            _, shards = build_index(package)
+            _shards.update({(package, name): shard for name, shard in shards.items()})
+    return _shards[(package, shard_name)]
+
+
+def list_tasks(package: str) -> list[str]:
+    """Names of the public task classes of an indexed package, without importing it."""
+    return [name for name in _load_manifest(package)["tasks"] if not name.startswith("_")]
+
+
+def _resolve_ref(ref: list[str]):
+    module, qualname = ref
+    obj = importlib.import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if "__tuple__" in value:
+            return tuple(_decode(v) for v in value["__tuple__"])
+        if "__dict__" in value:
+            return {_decode(k): _decode(v) for k, v in value["__dict__"]}
+        if "__ref__" in value:
+            return _resolve_ref(value["__ref__"])
+        if "__call__" in value:
+            func = _resolve_ref(value["__call__"])
+            return func(*_decode(value["args"]), **{k: _decode(v) for k, v in value["kwargs"].items()})
+    return value
+
+
+def get_task_cls(package: str, name: str) -> type | None:
+    """Get a task class of an indexed package, building it from the index.
+
+    The class is registered on the package module under ``name``, so it can be pickled by reference and later
+    lookups do not go through the index.
+
+    Args:
+        package: Name of the task package, one of :data:`INDEXED_PACKAGES`.
+        name: Name of the task class, e.g. ``PickSingleEgadA100Cfg``.
+
+    Returns:
+        The task class, or None if ``name`` is not in the index.
+    """
+    if (package, name) in _task_classes:
+        return _task_classes[(package, name)]
+
+    shard_name = _load_manifest(package)["tasks"].get(name)
+    if shard_name is None:
+        return None
+    entry = _load_shard(package, shard_name)[name]
+    if "fields" not in entry:
+        cls = getattr(importlib.import_module(entry["module"]), name)
+    else:
+        module, base_name = entry["base"]
+        if module == entry["module"]:
+            base = get_task_cls(package, base_name)
+        else:
+            base = _resolve_ref(entry["base"])
+        namespace = {k: _decode(v) for k, v in entry["fields"].items()}
+        namespace.update({"__module__": f"metasim.cfg.tasks.{package}", "__qualname__": name, "__doc__": entry["doc"]})
+        cls = configclass(type(name, (base,), namespace))
+
+    _task_classes[(package, name)] = cls
+    setattr(importlib.import_module(f"metasim.cfg.tasks.{package}"), name, cls)
+    return cls
+
+
+if __name__ == "__main__":
+    for package in INDEXED_PACKAGES:
+        manifest, shards = build_index(package)
+        index_dir = write_index(package, manifest, shards)
+        num_indexed = sum("fields" in entry for shard in shards.values() for entry in shard.values())
+        log.info(f"Indexed {num_indexed}/{len(manifest['tasks'])} classes of {package} into {index_dir}")
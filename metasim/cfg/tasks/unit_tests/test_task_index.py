@@ -0,0 +1,136 @@
+"""Unit tests for the on-disk index of the generated task configs."""
+
+from __future__ import annotations
+
+import ast
+import importlib
+import json
+import os
+
+import pytest
+
+from metasim.cfg.tasks import task_index
+
+PACKAGE = "maniskill"
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    """Point the index to an empty directory and clear the in-memory caches."""
+    monkeypatch.setattr(task_index, "INDEX_DIR", str(tmp_path))
+    _forget_loaded(monkeypatch)
+    return tmp_path
+
+
+def _forget_loaded(monkeypatch):
+    """Clear the in-memory caches, as in a new process."""
+    monkeypatch.setattr(task_index, "_manifests", {})
+    monkeypatch.setattr(task_index, "_shards", {})
+    monkeypatch.setattr(task_index, "_task_classes", {})
+
+
+def _fail_build(package):
+    raise AssertionError("the index was rebuilt")
+
+
+class TestTaskIndex:
+    """Test suite for building, storing and decoding the task index."""
+
+    def test_build_and_decode_round_trip(self, index_dir):
+        """Classes built from the index have the same fields as the imported ones."""
+        manifest, shards = task_index.build_index(PACKAGE)
+        for shard_name, shard in shards.items():
+            indexed = [name for name, entry in shard.items() if "fields" in entry and not name.startswith("_")]
+            assert indexed, f"no class of {shard_name} is indexed"
+            module = importlib.import_module(f"metasim.cfg.tasks.{PACKAGE}.{shard_name}")
+            for name in [*indexed[:2], indexed[-1]]:
+                assert manifest["tasks"][name] == shard_name
+                cls = task_index.get_task_cls(PACKAGE, name)
+                assert cls.__name__ == name
+                assert cls().to_dict() == getattr(module, name)().to_dict()
+
+    def test_unknown_task(self, index_dir):
+        """Names that are not in the index give None."""
+        assert task_index.get_task_cls(PACKAGE, "NotATaskCfg") is None
+
+    def test_written_index_is_reused(self, index_dir, monkeypatch):
+        """A new process loads the index from disk instead of rebuilding it."""
+        tasks = task_index.list_tasks(PACKAGE)
+        assert os.path.exists(os.path.join(index_dir, PACKAGE, "manifest.json"))
+
+        _forget_loaded(monkeypatch)
+        monkeypatch.setattr(task_index, "build_index", _fail_build)
+        assert task_index.list_tasks(PACKAGE) == tasks
+        assert task_index.get_task_cls(PACKAGE, tasks[0]).__name__ == tasks[0]
+
+    def test_touched_source_is_fresh(self, index_dir):
+        """A source whose mtime changed but whose content did not keeps the index, and records the new mtime."""
+        manifest, shards = task_index.build_index(PACKAGE)
+        task_index.write_index(PACKAGE, manifest, shards)
+        rel = next(iter(manifest["sources"]))
+        manifest["sources"][rel]["mtime_ns"] -= 1
+
+        assert task_index._is_fresh(PACKAGE, manifest)
+        with open(os.path.join(index_dir, PACKAGE, "manifest.json")) as f:
+            saved = json.load(f)
+        assert saved["sources"][rel]["mtime_ns"] == manifest["sources"][rel]["mtime_ns"]
+
+    @pytest.mark.parametrize("change", ["size", "content", "missing", "extra"])
+    def test_changed_source_is_stale(self, index_dir, change):
+        """A change of size, content or set of sources invalidates the index."""
+        manifest, _ = task_index.build_index(PACKAGE)
+        sources = manifest["sources"]
+        rel = next(iter(sources))
+        if change == "size":
+            sources[rel]["size"] += 1
+        elif change == "content":
+            sources[rel]["mtime_ns"] -= 1
+            sources[rel]["sha256"] = "0" * 64
+        elif change == "missing":
+            del sources[rel]
+        else:
+            sources["deleted.py"] = dict(sources[rel])
+        assert not task_index._is_fresh(PACKAGE, manifest)
+
+    def test_stale_index_is_rebuilt(self, index_dir):
+        """A stale manifest on disk is replaced by a fresh one."""
+        manifest, shards = task_index.build_index(PACKAGE)
+        rel = next(iter(manifest["sources"]))
+        manifest["sources"][rel]["size"] += 1
+        task_index.write_index(PACKAGE, manifest, shards)
+
+        task_index.list_tasks(PACKAGE)
+        with open(os.path.join(index_dir, PACKAGE, "manifest.json")) as f:
+            assert task_index._is_fresh(PACKAGE, json.load(f))
+
+    def test_corrupted_shard_is_rebuilt(self, index_dir, monkeypatch):
+        """An unreadable shard is rebuilt from the sources."""
+        tasks = task_index.list_tasks(PACKAGE)
+        shard_name = task_index._load_manifest(PACKAGE)["tasks"][tasks[0]]
+        with open(os.path.join(index_dir, PACKAGE, f"{shard_name}.json"), "w") as f:
+            f.write("{")
+
+        _forget_loaded(monkeypatch)
+        assert task_index.get_task_cls(PACKAGE, tasks[0]).__name__ == tasks[0]
+
+    def test_non_literal_class_is_not_indexed(self):
+        """Classes with statements other than literal fields are left to a normal import."""
+        source = (
+            "from metasim.utils import configclass\n"
+            "from metasim.cfg.tasks.base_task_cfg import BaseTaskCfg\n"
+            "@configclass\n"
+            "class LiteralCfg(BaseTaskCfg):\n"
+            "    episode_length: int = 250\n"
+            "@configclass\n"
+            "class MethodCfg(BaseTaskCfg):\n"
+            "    def reward(self):\n"
+            "        return 0\n"
+        )
+        module = "metasim.cfg.tasks.fake"
+        tree = ast.parse(source)
+        imports = task_index._resolve_imports(tree, module)
+        literal, method = (node for node in tree.body if isinstance(node, ast.ClassDef))
+        entry = task_index._index_class(literal, module, imports, set())
+        assert entry["fields"] == {"episode_length": 250}
+        assert entry["base"] == ["metasim.cfg.tasks.base_task_cfg", "BaseTaskCfg"]
+        assert task_index._index_class(method, module, imports, set()) is None
@@ -0,0 +1,341 @@
+"""Throughput benchmark of the simulator handlers over a grid of tasks, backends and numbers of environments.
+
+Each case runs in a fresh process, so startup time and memory are measured from scratch and a crashing backend does
+not stop the others. Results are written to a JSON file, which can be compared against a stored baseline.
+
+Example:
+    .. code-block:: bash
+
+        python metasim/scripts/benchmark.py --tasks close_box --backends mujoco mjx:cpu pybullet --num_envs 1 16
+        python metasim/scripts/benchmark.py --baseline benchmark_baseline.json  # compare with a previous run
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queue_mod
+import resource
+import statistics
+import subprocess
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import tyro
+from loguru import logger as log
+from rich.logging import RichHandler
+
+log.configure(handlers=[{"sink": RichHandler(), "format": "{message}"}])
+
+HIGHER_IS_BETTER = ("env_steps_per_sec",)
+LOWER_IS_BETTER = (
+    "step_ms",
+    "reset_ms",
+    "get_states_ms",
+    "get_states_cameras_ms",
+    "startup_s",
+    "memory_per_env_mb",
+)
+"""Metrics compared against the baseline."""
+
+
+@dataclass
+class Args:
+    tasks: list[str] = field(default_factory=lambda: ["close_box"])
+    robot: str = "franka"
+    backends: list[str] = field(default_factory=lambda: ["mujoco", "mjx:cpu", "pybullet", "sapien3", "genesis:cpu"])
+    """Simulators to benchmark. A ``:cpu`` suffix hides the GPUs from the case, e.g. ``mjx:cpu`` or ``genesis:cpu``"""
+    num_envs: list[int] = field(default_factory=lambda: [1, 16])
+
+    warmup_steps: int = 20
+    """Steps run before measuring, excluded from all metrics"""
+    steps: int = 200
+    """Steps timed for the throughput"""
+    resets: int = 10
+    """Resets timed for the reset latency"""
+    state_reads: int = 50
+    """State reads timed for each get_states latency"""
+    camera_width: int = 256
+    camera_height: int = 256
+    timeout: float = 900
+    """Timeout of a single case in seconds"""
+
+    output: str = "benchmark_results.json"
+    baseline: str | None = None
+    """Results file of a previous run to compare against"""
+    tolerance: float = 0.1
+    """Relative change of a metric beyond which it is reported as a regression"""
+    update_baseline: bool = False
+    """Also write the results to the baseline path"""
+
+
+########################################################
+## Measurements, run in the process of each case
+########################################################
+
+
+def _tree_rss_mb(pid: int) -> float | None:
+    """Resident memory of a process and all its descendants in MB, read from /proc. None if /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        children = []
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children += [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    total = rss_kb / 1024
+    for child in children:
+        total += _tree_rss_mb(child) or 0.0
+    return total
+
+
+def _median_ms(durations: list[float]) -> float:
+    return statistics.median(durations) * 1e3 if durations else float("nan")
+
+
+def _run_case(args: Args, task: str, backend: str, num_envs: int) -> dict:
+    import torch
+
+    from metasim.cfg.scenario import ScenarioCfg
+    from metasim.cfg.sensors import PinholeCameraCfg
+    from metasim.constants import SimType
+    from metasim.utils.setup_util import get_sim_env_class
+
+    def sync():
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+
+    sim = backend.partition(":")[0]
+    tic = time.perf_counter()
+    env_class = get_sim_env_class(SimType(sim))
+    ## Memory of the simulator module itself is not attributed to the environments
+    rss_before = _tree_rss_mb(os.getpid())
+    camera = PinholeCameraCfg(
+        width=args.camera_width, height=args.camera_height, pos=(1.5, 0.0, 1.5), look_at=(0.0, 0.0, 0.0)
+    )
+    scenario = ScenarioCfg(task=task, robots=[args.robot], cameras=[camera], sim=sim, num_envs=num_envs, headless=True)
+    env = env_class(scenario)
+    init_states, _ = env.reset()
+    sync()
+    startup_s = time.perf_counter() - tic
+
+    ## Random joint position targets within the joint limits, in sorted joint order
+    handler = env.handler
+    limits = []
+    for robot in scenario.robots:
+        limits += [robot.joint_limits[jn] for jn in handler.get_joint_names(robot.name, sort=True)]
+    low, high = torch.tensor(limits, dtype=torch.float32, device=handler.device).T
+    actions = [low + torch.rand(num_envs, len(limits), device=handler.device) * (high - low) for _ in range(16)]
+
+    for i in range(args.warmup_steps):
+        env.step(actions[i % len(actions)])
+    sync()
+
+    tic = time.perf_counter()
+    for i in range(args.steps):
+        env.step(actions[i % len(actions)])
+    sync()
+    step_s = (time.perf_counter() - tic) / args.steps
+
+    ## A simulate before each read, so that the state cache is stale and the simulator is actually queried
+    def time_reads(categories):
+        durations = []
+        for _ in range(args.state_reads):
+            handler.simulate()
+            sync()
+            tic = time.perf_counter()
+            handler.get_states(categories=categories)
+            sync()
+            durations.append(time.perf_counter() - tic)
+        return durations
+
+    get_states_s = time_reads(("objects", "robots"))
+    get_states_cameras_s = time_reads(None)
+
+    reset_s = []
+    for _ in range(args.resets):
+        tic = time.perf_counter()
+        env.reset(states=init_states)
+        sync()
+        reset_s.append(time.perf_counter() - tic)
+
+    rss_after = _tree_rss_mb(os.getpid())
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result = {
+        "env_steps_per_sec": num_envs / step_s,
+        "step_ms": step_s * 1e3,
+        "reset_ms": _median_ms(reset_s),
+        "get_states_ms": _median_ms(get_states_s),
+        "get_states_cameras_ms": _median_ms(get_states_cameras_s),
+        "startup_s": startup_s,
+        "memory_per_env_mb": (rss_after - rss_before) / num_envs if rss_before is not None else None,
+        "peak_rss_mb": peak_rss_mb,
+    }
+    if torch.cuda.is_available():
+        result["cuda_peak_mb"] = torch.cuda.max_memory_allocated() / 2**20
+    env.close()
+    return result
+
+
+def _case_main(args: Args, task: str, backend: str, num_envs: int, queue: mp.Queue) -> None:
+    try:
+        queue.put({"status": "ok", **_run_case(args, task, backend, num_envs)})
+    except Exception as e:
+        queue.put({"status": "error", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()})
+
+
+@contextmanager
+def _case_environ(backend: str):
+    """Environment variables inherited by the process of a case."""
+    overrides = {}
+    if backend.endswith(":cpu"):
+        overrides = {"CUDA_VISIBLE_DEVICES": "", "JAX_PLATFORMS": "cpu"}
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_case(args: Args, task: str, backend: str, num_envs: int) -> dict:
+    """Run one case in a fresh process and return its metrics, or its error."""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    with _case_environ(backend):
+        process = ctx.Process(target=_case_main, args=(args, task, backend, num_envs, queue))
+        process.start()
+    ## Poll, so that a case that crashes without reporting does not wait for the whole timeout
+    deadline = time.monotonic() + args.timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1.0)
+        except queue_mod.Empty:
+            if not process.is_alive():
+                try:
+                    result = queue.get(timeout=5.0)
+                except queue_mod.Empty:
+                    result = {"status": "error", "error": f"process exited with code {process.exitcode}"}
+            elif time.monotonic() > deadline:
+                result = {"status": "timeout"}
+    process.join(timeout=60)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    return {"task": task, "backend": backend, "num_envs": num_envs, **result}
+
+
+########################################################
+## Baseline comparison
+########################################################
+
+
+def _case_key(result: dict) -> tuple[str, str, int]:
+    return (result["task"], result["backend"], result["num_envs"])
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Metrics of ``results`` that got worse than in ``baseline`` by more than ``tolerance``, relatively."""
+    baseline_by_key = {_case_key(r): r for r in baseline if r.get("status") == "ok"}
+    regressions = []
+    for result in results:
+        old = baseline_by_key.get(_case_key(result))
+        if old is None:
+            continue
+        if result.get("status") != "ok":
+            regressions.append({
+                "case": _case_key(result),
+                "metric": "status",
+                "baseline": "ok",
+                "current": result["status"],
+            })
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None or old_value <= 0:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                regressions.append({
+                    "case": _case_key(result),
+                    "metric": metric,
+                    "baseline": old_value,
+                    "current": new_value,
+                    "change": change,
+                })
+    return regressions
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    args = tyro.cli(Args)
+
+    results = []
+    for task in args.tasks:
+        for backend in args.backends:
+            for num_envs in args.num_envs:
+                log.info(f"Benchmarking {task} on {backend} with {num_envs} envs")
+                result = run_case(args, task, backend, num_envs)
+                if result["status"] == "ok":
+                    log.info(
+                        f"{result['env_steps_per_sec']:.1f} env steps/s, step {result['step_ms']:.2f} ms, reset"
+                        f" {result['reset_ms']:.2f} ms, get_states {result['get_states_ms']:.2f} ms"
+                        f" ({result['get_states_cameras_ms']:.2f} ms with cameras), startup {result['startup_s']:.1f} s"
+                    )
+                else:
+                    log.error(f"Case {task}/{backend}/{num_envs} failed: {result.get('error', result['status'])}")
+                results.append(result)
+
+    report = {"meta": _metadata(), "args": vars(args), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    log.info(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        if args.update_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+            log.info(f"Baseline {args.baseline} updated")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+            regressions = compare(results, baseline, args.tolerance)
+            for r in regressions:
+                log.warning(
+                    f"Regression in {'/'.join(map(str, r['case']))} {r['metric']}: {r['baseline']} -> {r['current']}"
+                )
+            if regressions:
+                raise SystemExit(1)
+            log.info(f"No regression against {args.baseline}")
+        else:
+            log.warning(f"Baseline {args.baseline} not found, use --update_baseline to create it")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,6 @@ log.configure(handlers=[{"sink": RichHandler(), "format": "{message}"}])
 ### Add command line arguments
 #########################################
 import math
-from copy import deepcopy
 from dataclasses import dataclass
 from typing import Literal
 
@@ -91,7 +90,6 @@ args = tyro.cli(Args)
 #########################################
 ### Import packages
 #########################################
-import multiprocessing as mp
 import os
 
 try:
@@ -108,9 +106,9 @@ from metasim.cfg.sensors import PinholeCameraCfg
 from metasim.constants import SimType
 from metasim.sim import BaseSimHandler, EnvWrapper
 from metasim.utils.demo_util import get_traj
+from metasim.utils.save_util import DemoWriterV2
 from metasim.utils.setup_util import get_robot, get_sim_env_class, get_task
 from metasim.utils.state import state_tensor_to_nested
-from metasim.utils.tensor_util import tensor_to_cpu
 
 
 ###########################################################
@@ -132,16 +130,6 @@ def get_run_out(all_actions, env: EnvWrapper[BaseSimHandler], demo_idxs: list[in
     return run_out
 
 
-def save_demo_mp(save_req_queue: mp.Queue):
-    from metasim.utils.save_util import save_demo
-
-    while (save_request := save_req_queue.get()) is not None:
-        demo = save_request["demo"]
-        save_dir = save_request["save_dir"]
-        log.info(f"Received save request, saving to {save_dir}")
-        save_demo(save_dir, demo)
-
-
 ###########################################################
 ## Global Variables
 ###########################################################
@@ -160,10 +148,7 @@ class DemoCollector:
 
         assert isinstance(handler, BaseSimHandler)
         self.handler = handler
-        self.cache: dict[int, list[dict]] = {}
-        self.save_request_queue = mp.Queue()
-        self.save_proc = mp.Process(target=save_demo_mp, args=(self.save_request_queue,))
-        self.save_proc.start()
+        self.writers: dict[int, DemoWriterV2] = {}
 
         TaskName = self.handler.task.__class__.__name__.replace("Cfg", "")
         if args.cust_name is not None:
@@ -175,51 +160,41 @@ class DemoCollector:
         )
 
     def create(self, demo_idx: int, data_dict: dict):
-        assert demo_idx not in self.cache
+        assert demo_idx not in self.writers
         assert isinstance(demo_idx, int)
-        self.cache[demo_idx] = [data_dict]
-
-    def add(self, demo_idx: int, data_dict: dict):
-        if data_dict is None:
-            log.warning("Skipping adding obs to DemoCollector because obs is None")
-        assert demo_idx in self.cache
-        self.cache[demo_idx].append(deepcopy(tensor_to_cpu(data_dict)))
-
-    def save(self, demo_idx: int):
-        assert demo_idx in self.cache
-
         save_dir = os.path.join(self.base_save_dir, f"demo_{demo_idx:04d}")
         if os.path.exists(os.path.join(save_dir, "status.txt")):
             os.remove(os.path.join(save_dir, "status.txt"))
 
-        os.makedirs(save_dir, exist_ok=True)
-        log.info(f"Saving demo {demo_idx} to {save_dir}")
-
-        ## Option 1: Save immediately, blocking and slower
+        ## Frames are encoded and written to disk as they arrive, so no demo is kept in memory
+        self.writers[demo_idx] = DemoWriterV2(save_dir)
+        self.writers[demo_idx].append(data_dict)
 
-        from metasim.utils.save_util import save_demo
-
-        save_demo(save_dir, self.cache[demo_idx])
+    def add(self, demo_idx: int, data_dict: dict):
+        if data_dict is None:
+            log.warning("Skipping adding obs to DemoCollector because obs is None")
+        assert demo_idx in self.writers
+        self.writers[demo_idx].append(data_dict)
 
-        ## Option 2: Save in a separate process, non-blocking, not friendly to KeyboardInterrupt, TODO: fix
-        ## TODO: see https://isaac-sim.github.io/IsaacLab/main/source/refs/troubleshooting.html#preventing-memory-leaks-in-the-simulator
-        # self.save_request_queue.put({"demo": self.cache[demo_idx], "save_dir": save_dir})
+    def save(self, demo_idx: int):
+        assert demo_idx in self.writers
+        writer = self.writers[demo_idx]
+        log.info(f"Saving demo {demo_idx} to {writer.save_dir}")
+        writer.finalize()
 
     def mark_fail(self, demo_idx: int):
-        assert demo_idx in self.cache
-        save_dir = os.path.join(self.base_save_dir, f"demo_{demo_idx:04d}")
-        os.makedirs(save_dir, exist_ok=True)
-        with open(os.path.join(save_dir, "status.txt"), "w+") as f:
+        assert demo_idx in self.writers
+        writer = self.writers[demo_idx]
+        writer.abort()
+        with open(os.path.join(writer.save_dir, "status.txt"), "w+") as f:
             f.write("failed")
 
     def delete(self, demo_idx: int):
-        assert demo_idx in self.cache
-        del self.cache[demo_idx]
+        assert demo_idx in self.writers
+        del self.writers[demo_idx]
 
     def final(self):
-        self.save_request_queue.put(None)  # signal to save_demo_mp to exit
-        self.save_proc.join()
-        assert self.cache == {}
+        assert self.writers == {}
 
 
 def should_skip(log_dir):
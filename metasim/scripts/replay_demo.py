@@ -28,6 +28,7 @@ from metasim.constants import SimType
 from metasim.sim import HybridSimEnv
 from metasim.utils import configclass
 from metasim.utils.demo_util import get_traj
+from metasim.utils.profiler import span
 from metasim.utils.setup_util import get_sim_env_class
 from metasim.utils.state import TensorState
 
@@ -46,6 +47,8 @@ class Args:
     ## Handlers
     sim: Literal["isaaclab", "isaacgym", "genesis", "pybullet", "sapien2", "sapien3", "mujoco", "mjx"] = "isaaclab"
     renderer: Literal["isaaclab", "isaacgym", "genesis", "pybullet", "mujoco", "sapien2", "sapien3"] | None = None
+    render_every_n_steps: int = 1
+    """With a renderer, render the cameras every this many steps. 0 only renders the first frame"""
 
     ## Others
     num_envs: int = 1
@@ -162,7 +165,7 @@ def main():
         env_render = env_class_render(scenario)  # Isaaclab must launch right after import
         env_class_physics = get_sim_env_class(SimType(scenario.sim))
         env_physics = env_class_physics(scenario)  # Isaaclab must launch right after import
-        env = HybridSimEnv(env_physics, env_render)
+        env = HybridSimEnv(env_physics, env_render, render_every_n_steps=args.render_every_n_steps)
     toc = time.time()
     log.trace(f"Time to launch: {toc - tic:.2f}s")
 
@@ -194,43 +197,40 @@ def main():
     step = 0
     while True:
         log.debug(f"Step {step}")
-        tic = time.time()
-        if scenario.object_states:
-            ## TODO: merge states replay into env.step function
-            if all_states is None:
-                raise ValueError("All states are None, please check the trajectory file")
-            states = get_states(all_states, step, num_envs)
-            env.handler.set_states(states)
-            env.handler.refresh_render()
-            obs = env.handler.get_states()
-
-            ## XXX: hack
-            success = env.handler.task.checker.check(env.handler)
-            if success.any():
-                log.info(f"Env {success.nonzero().squeeze(-1).tolist()} succeeded!")
-            if success.all():
-                break
-
-        else:
-            actions = get_actions(all_actions, step, num_envs, scenario.robots[0])
-            obs, reward, success, time_out, extras = env.step(actions)
-
-            if success.any():
-                log.info(f"Env {success.nonzero().squeeze(-1).tolist()} succeeded!")
-
-            if time_out.any():
-                log.info(f"Env {time_out.nonzero().squeeze(-1).tolist()} timed out!")
-
-            if success.all() or time_out.all():
-                break
-
-        toc = time.time()
-        log.trace(f"Time to step: {toc - tic:.2f}s")
-
-        tic = time.time()
-        obs_saver.add(obs)
-        toc = time.time()
-        log.trace(f"Time to save obs: {toc - tic:.2f}s")
+        with span("replay.step"):
+            if scenario.object_states:
+                ## TODO: merge states replay into env.step function
+                if all_states is None:
+                    raise ValueError("All states are None, please check the trajectory file")
+                states = get_states(all_states, step, num_envs)
+                env.handler.set_states(states)
+                env.handler.refresh_render()
+                obs = env.handler.get_states()
+
+                ## XXX: hack
+                success = env.handler.task.checker.check(env.handler)
+                if success.any():
+                    log.info(f"Env {success.nonzero().squeeze(-1).tolist()} succeeded!")
+                if success.all():
+                    break
+
+            else:
+                actions = get_actions(all_actions, step, num_envs, scenario.robots[0])
+                obs, reward, success, time_out, extras = env.step(actions)
+
+                if success.any():
+                    log.info(f"Env {success.nonzero().squeeze(-1).tolist()} succeeded!")
+
+                if time_out.any():
+                    log.info(f"Env {time_out.nonzero().squeeze(-1).tolist()} timed out!")
+
+                if success.all() or time_out.all():
+                    break
+
+        ## Steps of a hybrid env that did not render have no cameras
+        if obs.cameras:
+            with span("replay.save_obs"):
+                obs_saver.add(obs)
         step += 1
 
         if args.stop_on_runout and get_runout(all_actions, step):
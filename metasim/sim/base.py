@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import inspect
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from dataclasses import fields
+from typing import TYPE_CHECKING, Literal
 
 import torch
 from loguru import logger as log
@@ -13,12 +15,38 @@ if TYPE_CHECKING:
     from metasim.cfg.scenario import ScenarioCfg
 from metasim.queries.base import BaseQueryType
 from metasim.types import Action, EnvState, Extra, Obs, Reward, Success, TimeOut
-from metasim.utils.state import TensorState, state_tensor_to_nested
+from metasim.utils.profiler import profiled, span
+from metasim.utils.state import (
+    STATE_CATEGORIES,
+    ObjectState,
+    RobotState,
+    TensorState,
+    _joint_index,
+    scatter_tensor_state,
+    slice_tensor_state,
+    state_tensor_to_nested,
+)
+
+_DOF_TARGET_KEYS = {"pos": "dof_pos_target", "vel": "dof_vel_target", "effort": "dof_effort_target"}
+"""Action dict key of each mode of :meth:`BaseSimHandler.set_dof_targets_tensor`."""
+
+
+def _num_rows(items: dict) -> int | None:
+    """Leading (env) dimension of the first tensor in a category of a :class:`TensorState`, or None if it has none."""
+    for item in items.values():
+        for f in fields(item):
+            value = getattr(item, f.name)
+            if isinstance(value, torch.Tensor):
+                return value.shape[0]
+    return None
 
 
 class BaseSimHandler(ABC):
     """Base class for simulation handler."""
 
+    step_state_categories: tuple[str, ...] | None = None
+    """Categories of the states returned by the env steps, see :meth:`get_states`. If None, all categories."""
+
     def __init__(self, scenario: ScenarioCfg, optional_queries: dict[str, BaseQueryType] | None = None):
         ## Overwrite scenario with task, TODO: this should happen in scenario class post_init
         if scenario.task is not None:
@@ -41,7 +69,8 @@ class BaseSimHandler(ABC):
         self.checker = scenario.checker
         self.object_dict = {obj.name: obj for obj in self.objects + self.robots + self.checker.get_debug_viewers()}
         """A dict mapping object names to object cfg instances. It includes objects, robot, and checker debug viewers."""
-        self._state_cache_expire = True
+        self._state_cache: TensorState | None = None
+        self._state_cache_valid: dict[str, torch.BoolTensor] = {}
 
     def launch(self) -> None:
         """Launch the simulation."""
@@ -79,19 +108,47 @@ class BaseSimHandler(ABC):
     ############################################################
     ## Set states
     ############################################################
-    def set_states(self, states: list[EnvState], env_ids: list[int] | None = None) -> None:
+    @profiled("handler.set_states")
+    def set_states(self, states: list[EnvState] | TensorState, env_ids: list[int] | None = None) -> None:
         """Set the states of the environment.
 
         Args:
-            states (dict): A dictionary containing the states of the environment
+            states (list[EnvState] | TensorState): The states of the environment, either as nested dicts or as a
+                :class:`TensorState`. A :class:`TensorState` may cover all environments, or only ``env_ids`` in order.
+                A :class:`TensorState` without robots or objects is a no-op.
             env_ids (list[int]): List of environment ids to set the states. If None, set the states of all environments
         """
-        self._state_cache_expire = True
-        self._set_states(states, env_ids=env_ids)
+        if isinstance(states, TensorState):
+            items = list(states.robots.values()) + list(states.objects.values())
+            if not items:
+                ## Nothing to write, e.g. a state with only cameras
+                return
+            self._invalidate_state_cache(env_ids)
+            if env_ids is None:
+                env_ids = list(range(self.num_envs))
+            num_rows = items[0].root_state.shape[0]
+            if num_rows != self.num_envs:
+                if num_rows != len(env_ids):
+                    raise ValueError(
+                        f"TensorState has {num_rows} envs, expected num_envs={self.num_envs} or len(env_ids)={len(env_ids)}"
+                    )
+                states = scatter_tensor_state(states, env_ids, self.num_envs)
+            self._set_states_tensor(states, env_ids=env_ids)
+        else:
+            self._invalidate_state_cache(env_ids)
+            self._set_states(states, env_ids=env_ids)
 
     def _set_states(self, states: list[EnvState], env_ids: list[int] | None = None) -> None:
         raise NotImplementedError
 
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        """Set the states from a :class:`TensorState` covering all environments, only writing ``env_ids``.
+
+        Backends that can write tensors in bulk should override this. The default implementation converts the states
+        to nested dicts and calls :meth:`_set_states`.
+        """
+        self._set_states(state_tensor_to_nested(self, states), env_ids=env_ids)
+
     def set_dof_targets(self, obj_name: str, actions: list[Action]) -> None:
         """Set the dof targets of the robot.
 
@@ -101,6 +158,82 @@ class BaseSimHandler(ABC):
         """
         raise NotImplementedError
 
+    def set_dof_targets_tensor(
+        self, obj_name: str, targets: torch.Tensor, mode: Literal["pos", "vel", "effort"] = "pos"
+    ) -> None:
+        """Set the dof targets of an object from a tensor, without building action dicts.
+
+        Args:
+            obj_name (str): The name of the object
+            targets (torch.Tensor): The targets of all environments, of shape (num_envs, num_dof). The columns follow
+                the sorted joint order, i.e. ``get_joint_names(obj_name, sort=True)``.
+            mode (str): Whether the targets are joint positions (``"pos"``), velocities (``"vel"``) or efforts
+                (``"effort"``).
+        """
+        if mode not in _DOF_TARGET_KEYS:
+            raise ValueError(f"Unknown dof target mode {mode}, expected one of {list(_DOF_TARGET_KEYS)}")
+        if targets.ndim != 2 or targets.shape[0] != self.num_envs:
+            raise ValueError(f"Expected dof targets of shape (num_envs={self.num_envs}, num_dof), got {targets.shape}")
+        self._set_dof_targets_tensor(obj_name, targets, mode)
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        """Set the dof targets from a tensor in sorted joint order, see :meth:`set_dof_targets_tensor`.
+
+        Backends that can write targets in bulk should override this. The default implementation converts the
+        targets to action dicts and calls :meth:`set_dof_targets`.
+        """
+        joint_names = self.get_joint_names(obj_name, sort=True)
+        key = _DOF_TARGET_KEYS[mode]
+        actions = [{obj_name: {key: dict(zip(joint_names, row))}} for row in targets.tolist()]
+        self.set_dof_targets(obj_name, actions)
+
+    @profiled("handler.set_dof_targets")
+    def set_robots_dof_targets(self, actions: list[Action] | torch.Tensor) -> None:
+        """Set the dof targets of all robots.
+
+        Args:
+            actions (list[Action] | torch.Tensor): Either action dicts, or a tensor of joint targets of shape
+                (num_envs, total_num_dof), whose columns are the sorted joints of each robot, in the order of
+                ``self.robots``. The targets of each robot are interpreted as :meth:`set_dof_targets` interprets its
+                action dicts, see :meth:`_get_dof_target_mode`.
+        """
+        if not isinstance(actions, torch.Tensor):
+            for robot in self.robots:
+                self.set_dof_targets(robot.name, actions)
+            return
+
+        start = 0
+        for robot in self.robots:
+            num_dof = len(self.get_joint_names(robot.name, sort=True))
+            self.set_dof_targets_tensor(
+                robot.name, actions[:, start : start + num_dof], mode=self._get_dof_target_mode(robot.name)
+            )
+            start += num_dof
+        if start != actions.shape[1]:
+            raise ValueError(f"Expected actions with {start} columns, got {actions.shape[1]}")
+
+    def _get_dof_target_mode(self, obj_name: str) -> Literal["pos", "vel", "effort"]:
+        """Mode of the tensor targets of ``obj_name`` in :meth:`set_robots_dof_targets`.
+
+        It must match the action dict key that :meth:`set_dof_targets` reads for the object. The default is
+        ``"pos"``, as backends that simulate effort actuators with a PD controller still take position targets.
+        """
+        return "pos"
+
+    def _get_native_dof_index(self, obj_name: str, device: torch.device | str) -> torch.LongTensor:
+        """Columns that reorder a sorted joint tensor of ``obj_name`` to the simulator's joint order.
+
+        Cached per object and device.
+        """
+        if not hasattr(self, "_native_dof_index_cache"):
+            self._native_dof_index_cache = {}
+        key = (obj_name, str(device))
+        if key not in self._native_dof_index_cache:
+            self._native_dof_index_cache[key] = torch.tensor(
+                self.get_joint_reindex(obj_name, inverse=True), dtype=torch.long, device=device
+            )
+        return self._native_dof_index_cache[key]
+
     def set_pose(self, obj_name: str, pos: torch.Tensor, rot: torch.Tensor, env_ids: list[int] | None = None) -> None:
         states = [{obj_name: {"pos": pos[env_id], "rot": rot[env_id]}} for env_id in range(self.num_envs)]
         self.set_states(states, env_ids=env_ids)
@@ -120,11 +253,109 @@ class BaseSimHandler(ABC):
         """
         pass
 
-    def get_states(self, env_ids: list[int] | None = None) -> list[EnvState]:
-        if self._state_cache_expire:
-            self._states = self._get_states(env_ids=env_ids)
-            self._state_cache_expire = False
-        return self._states
+    @profiled("handler.get_states")
+    def get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None) -> TensorState:
+        """Get the states of the environment.
+
+        States are cached per category and per environment. Only the categories and environments that were
+        invalidated since the last read (by :meth:`simulate` or :meth:`set_states`) are fetched from the simulator.
+
+        Args:
+            env_ids: List of environment ids to get the states from. If None, get the states of all environments.
+            categories: Categories to get, any of ``"objects"``, ``"robots"``, ``"cameras"``, ``"sensors"``. If None,
+                get all categories. Categories that are not requested are empty in the returned state, e.g.
+                ``("objects", "robots")`` skips the camera readback on backends that support it.
+
+        Returns:
+            The states of ``env_ids``, with one row per environment in the order of ``env_ids``.
+        """
+        if categories is None:
+            categories = STATE_CATEGORIES
+        self._refresh_state_cache(env_ids, categories)
+        states = TensorState(
+            objects={},
+            robots={},
+            cameras={},
+            sensors={},
+            extras=self._state_cache.extras,
+        )
+        for category in categories:
+            setattr(states, category, getattr(self._state_cache, category))
+        if env_ids is not None:
+            states = slice_tensor_state(states, env_ids)
+        return states
+
+    def _refresh_state_cache(self, env_ids: list[int] | None, categories: tuple[str, ...]) -> None:
+        """Fetch the invalid rows of ``categories`` for ``env_ids`` from the simulator."""
+        if self._state_cache is None:
+            self._reset_state_cache()
+
+        requested = torch.zeros(self.num_envs, dtype=torch.bool)
+        requested[slice(None) if env_ids is None else env_ids] = True
+        missing = torch.zeros(self.num_envs, dtype=torch.bool)
+        missing_categories = []
+        for category in categories:
+            category_missing = requested & ~self._state_cache_valid[category]
+            if category_missing.any():
+                missing |= category_missing
+                missing_categories.append(category)
+        if not missing_categories:
+            return
+
+        fetch_env_ids = None if missing.all() else missing.nonzero().squeeze(-1).tolist()
+        with span("handler.fetch_states"):
+            if self._get_states_takes_categories():
+                states = self._get_states(env_ids=fetch_env_ids, categories=tuple(missing_categories))
+            else:
+                states = self._get_states(env_ids=fetch_env_ids)
+                missing_categories = STATE_CATEGORIES
+        self._update_state_cache(states, fetch_env_ids, missing_categories)
+
+    def _get_states_takes_categories(self) -> bool:
+        if not hasattr(self, "_get_states_takes_categories_cache"):
+            params = inspect.signature(self._get_states).parameters
+            self._get_states_takes_categories_cache = "categories" in params
+        return self._get_states_takes_categories_cache
+
+    def _update_state_cache(
+        self, states: TensorState, env_ids: list[int] | None = None, categories: tuple[str, ...] = STATE_CATEGORIES
+    ) -> None:
+        """Store fetched states in the cache and mark them valid.
+
+        Args:
+            states: States of ``env_ids``. Categories whose tensors cover all environments are stored as a whole, so
+                backends that ignore ``env_ids`` for some categories are handled too.
+            env_ids: Environments covered by ``states``. If None, all environments.
+            categories: Categories of ``states`` to store.
+        """
+        if self._state_cache is None:
+            self._reset_state_cache()
+
+        self._state_cache.extras = states.extras
+        for category in categories:
+            items = getattr(states, category)
+            num_rows = _num_rows(items)
+            if env_ids is None or num_rows in (None, self.num_envs):
+                setattr(self._state_cache, category, items)
+                self._state_cache_valid[category][:] = True
+            else:
+                partial = TensorState(objects={}, robots={}, cameras={}, sensors={})
+                setattr(partial, category, items)
+                merged = scatter_tensor_state(partial, env_ids, self.num_envs, base=self._state_cache)
+                setattr(self._state_cache, category, getattr(merged, category))
+                self._state_cache_valid[category][env_ids] = True
+
+    def _reset_state_cache(self) -> None:
+        self._state_cache = TensorState(objects={}, robots={}, cameras={}, sensors={})
+        self._state_cache_valid = {c: torch.zeros(self.num_envs, dtype=torch.bool) for c in STATE_CATEGORIES}
+
+    def _invalidate_state_cache(
+        self, env_ids: list[int] | None = None, categories: tuple[str, ...] = STATE_CATEGORIES
+    ) -> None:
+        """Mark the cached states of ``categories`` for ``env_ids`` as stale. If ``env_ids`` is None, all envs."""
+        for category in categories:
+            if category in self._state_cache_valid:
+                self._state_cache_valid[category][slice(None) if env_ids is None else env_ids] = False
 
     def get_extra(self):
         """Get the extra information of the environment."""
@@ -133,71 +364,93 @@ class BaseSimHandler(ABC):
             ret_dict[query_name] = query_type()
         return ret_dict
 
-    def get_vel(self, obj_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
-        if self.num_envs > 1:
-            log.warning(
-                "You are using the unoptimized get_pos method, which could be slow, please contact the maintainer to"
-                " support the optimized version if necessary"
-            )
-        if env_ids is None:
-            env_ids = list(range(self.num_envs))
-
-        states = self.get_states(env_ids=env_ids)
+    ############################################################
+    ## Fast accessors
+    ############################################################
+    def _get_obj_state(self, obj_name: str) -> ObjectState | RobotState:
+        """Tensor state of one object or robot, taken from the cached states of all envs. Cameras are not read."""
+        states = self.get_states(categories=("objects", "robots"))
         if obj_name in states.objects:
-            return states.objects[obj_name].root_state[:, 7:10]
+            return states.objects[obj_name]
         elif obj_name in states.robots:
-            return states.robots[obj_name].root_state[:, 7:10]
+            return states.robots[obj_name]
         else:
             raise ValueError(f"Object {obj_name} not found in states")
 
-    def get_pos(self, obj_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
-        if self.num_envs > 1:
-            log.warning(
-                "You are using the unoptimized get_pos method, which could be slow, please contact the maintainer to"
-                " support the optimized version if necessary"
+    def _get_dof_index(self, obj_name: str, joint_names: tuple[str, ...], device: torch.device) -> torch.LongTensor:
+        """Columns of ``joint_names`` in the joint tensors of ``obj_name``. Cached per object, joint tuple and device."""
+        if not hasattr(self, "_dof_index_cache"):
+            self._dof_index_cache = {}
+        key = (obj_name, joint_names, device)
+        if key not in self._dof_index_cache:
+            _, index = _joint_index(self, obj_name)
+            missing = [jn for jn in joint_names if jn not in index]
+            if missing:
+                raise ValueError(f"Joints {missing} not found in {obj_name}")
+            self._dof_index_cache[key] = torch.tensor(
+                [index[jn] for jn in joint_names], dtype=torch.long, device=device
             )
-        if env_ids is None:
-            env_ids = list(range(self.num_envs))
+        return self._dof_index_cache[key]
 
-        states = self.get_states(env_ids=env_ids)
-        if obj_name in states.objects:
-            return states.objects[obj_name].root_state[:, :3]
-        elif obj_name in states.robots:
-            return states.robots[obj_name].root_state[:, :3]
-        else:
-            raise ValueError(f"Object {obj_name} not found in states")
+    @staticmethod
+    def _select_envs(tensor: torch.Tensor, env_ids: list[int] | None) -> torch.Tensor:
+        return tensor if env_ids is None else tensor[env_ids]
+
+    def get_root_state(self, obj_names: list[str], env_ids: list[int] | None = None) -> torch.FloatTensor:
+        """Get the root states of several objects at once.
+
+        Args:
+            obj_names: Names of the objects or robots.
+            env_ids: Environments to read. If None, read all environments.
+
+        Returns:
+            Tensor of shape (num_envs, len(obj_names), 13) with pos, quat (wxyz), lin vel and ang vel.
+        """
+        root_states = [self._select_envs(self._get_obj_state(name).root_state, env_ids) for name in obj_names]
+        return torch.stack(root_states, dim=1)
+
+    def get_vel(self, obj_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
+        return self._select_envs(self._get_obj_state(obj_name).root_state[:, 7:10], env_ids)
+
+    def get_pos(self, obj_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
+        return self._select_envs(self._get_obj_state(obj_name).root_state[:, :3], env_ids)
 
     def get_rot(self, obj_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
-        if self.num_envs > 1:
-            log.warning(
-                "You are using the unoptimized get_rot method, which could be slow, please contact the maintainer to"
-                " support the optimized version if necessary"
-            )
-        if env_ids is None:
-            env_ids = list(range(self.num_envs))
+        return self._select_envs(self._get_obj_state(obj_name).root_state[:, 3:7], env_ids)
 
-        states = self.get_states(env_ids=env_ids)
-        if obj_name in states.objects:
-            return states.objects[obj_name].root_state[:, 3:7]
-        elif obj_name in states.robots:
-            return states.robots[obj_name].root_state[:, 3:7]
-        else:
-            raise ValueError(f"Object {obj_name} not found in states")
+    def get_pos_batch(self, obj_names: list[str], env_ids: list[int] | None = None) -> torch.FloatTensor:
+        """Positions of several objects, shape (num_envs, len(obj_names), 3)."""
+        return self.get_root_state(obj_names, env_ids)[..., :3]
+
+    def get_rot_batch(self, obj_names: list[str], env_ids: list[int] | None = None) -> torch.FloatTensor:
+        """Quaternions (wxyz) of several objects, shape (num_envs, len(obj_names), 4)."""
+        return self.get_root_state(obj_names, env_ids)[..., 3:7]
+
+    def get_vel_batch(self, obj_names: list[str], env_ids: list[int] | None = None) -> torch.FloatTensor:
+        """Linear velocities of several objects, shape (num_envs, len(obj_names), 3)."""
+        return self.get_root_state(obj_names, env_ids)[..., 7:10]
 
     def get_dof_pos(self, obj_name: str, joint_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
-        if self.num_envs > 1:
-            log.warning(
-                "You are using the unoptimized get_dof_pos method, which could be slow, please contact the maintainer"
-                " to support the optimized version if necessary"
-            )
-        if env_ids is None:
-            env_ids = list(range(self.num_envs))
+        return self.get_dof_pos_batch(obj_name, [joint_name], env_ids=env_ids)[:, 0]
+
+    def get_dof_pos_batch(
+        self, obj_name: str, joint_names: list[str], env_ids: list[int] | None = None
+    ) -> torch.FloatTensor:
+        """Get the positions of several joints of one object at once.
 
-        states = self.get_states(env_ids=env_ids)
-        states = state_tensor_to_nested(self, states)
-        return torch.tensor([
-            {**env_state["objects"], **env_state["robots"]}[obj_name]["dof_pos"][joint_name] for env_state in states
-        ])
+        Args:
+            obj_name: Name of the articulated object or robot.
+            joint_names: Names of the joints, in the order of the returned columns.
+            env_ids: Environments to read. If None, read all environments.
+
+        Returns:
+            Tensor of shape (num_envs, len(joint_names)).
+        """
+        joint_pos = self._get_obj_state(obj_name).joint_pos
+        if joint_pos is None:
+            raise ValueError(f"Object {obj_name} has no joints")
+        index = self._get_dof_index(obj_name, tuple(joint_names), joint_pos.device)
+        return self._select_envs(joint_pos[:, index], env_ids)
 
     ############################################################
     ## Simulate
@@ -206,9 +459,10 @@ class BaseSimHandler(ABC):
     def _simulate(self):
         pass
 
+    @profiled("handler.simulate")
     def simulate(self):
         """Simulate the environment."""
-        self._state_cache_expire = True
+        self._invalidate_state_cache()
         self._simulate()
 
     ############################################################
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import time
 from typing import Generic, TypeVar
 
 import gymnasium as gym
@@ -12,6 +11,7 @@ from loguru import logger as log
 
 from metasim.sim import BaseSimHandler
 from metasim.types import Action, EnvState, Extra, Obs, Reward, Success, TimeOut
+from metasim.utils.profiler import profiled, span
 
 THandler = TypeVar("THandler", bound=BaseSimHandler)
 
@@ -22,7 +22,7 @@ class EnvWrapper(Generic[THandler]):
     handler: THandler
 
     def __init__(self, *args, **kwargs) -> None: ...
-    def step(self, action: list[Action]) -> tuple[Obs, Reward, Success, TimeOut, Extra]: ...
+    def step(self, action: list[Action] | torch.Tensor) -> tuple[Obs, Reward, Success, TimeOut, Extra]: ...
     def render(self) -> None: ...
     def close(self) -> None: ...
 
@@ -87,6 +87,7 @@ def GymEnvWrapper(cls: type[THandler]) -> type[EnvWrapper[THandler]]:
             self.handler.launch()
             self._episode_length_buf = torch.zeros(self.handler.num_envs, dtype=torch.int32, device=self.handler.device)
 
+        @profiled("env.reset")
         def reset(self, states: list[EnvState] | None = None, env_ids: list[int] | None = None) -> tuple[Obs, Extra]:
             if env_ids is None:
                 env_ids = list(range(self.handler.num_envs))
@@ -94,28 +95,55 @@ def GymEnvWrapper(cls: type[THandler]) -> type[EnvWrapper[THandler]]:
             self._episode_length_buf[env_ids] = 0
             if states is not None:
                 self.handler.set_states(states, env_ids=env_ids)
-            self.handler.checker.reset(self.handler, env_ids=env_ids)
-            self.handler.refresh_render()
+            with span("checker.reset"):
+                self.handler.checker.reset(self.handler, env_ids=env_ids)
+            with span("handler.refresh_render"):
+                self.handler.refresh_render()
             states = self.handler.get_states()
             return states, None
 
-        def step(self, actions: list[Action]) -> tuple[Obs, Reward, Success, TimeOut, Extra]:
+        @profiled("env.step")
+        def step(self, actions: list[Action] | torch.Tensor) -> tuple[Obs, Reward, Success, TimeOut, Extra]:
+            """Step the environment.
+
+            Args:
+                actions: Action dicts of all environments, or a tensor of joint position targets of shape
+                    (num_envs, num_dof) in sorted joint order, which skips building action dicts.
+            """
             self._episode_length_buf += 1
-            for robot in self.handler.robots:
-                self.handler.set_dof_targets(robot.name, actions)
-            tic = time.time()
+            self.handler.set_robots_dof_targets(actions)
             self.handler.simulate()
-            toc = time.time()
-            log.trace(f"Time taken to handler.simulate(): {toc - tic:.4f}s")
             reward = None
-            tic = time.time()
-            success = self.handler.checker.check(self.handler)
-            toc = time.time()
-            log.trace(f"Time taken to handler.checker.check(): {toc - tic:.4f}s")
-            tic = time.time()
-            states = self.handler.get_states()
-            toc = time.time()
-            log.trace(f"Time taken to handler.get_states(): {toc - tic:.4f}s")
+            with span("checker.check"):
+                success = self.handler.checker.check(self.handler)
+            states = self.handler.get_states(categories=self.handler.step_state_categories)
+            time_out = self._episode_length_buf >= self.handler.scenario.episode_length
+            return states, reward, success, time_out, None
+
+        def step_async(self, actions: list[Action] | torch.Tensor) -> None:
+            """Start a step without waiting for it to finish. Use :meth:`step_wait` to get the results.
+
+            Handlers without pipelined stepping fall back to a blocking :meth:`step` in :meth:`step_wait`.
+            """
+            if hasattr(self.handler, "step_async"):
+                self._episode_length_buf += 1
+                self.handler.step_async(actions)
+                self._pending_actions = None
+            else:
+                self._pending_actions = actions
+
+        def step_wait(self) -> tuple[Obs, Reward, Success, TimeOut, Extra]:
+            """Wait for the step started by :meth:`step_async` and return the same results as :meth:`step`."""
+            if getattr(self, "_pending_actions", None) is not None:
+                actions, self._pending_actions = self._pending_actions, None
+                return self.step(actions)
+
+            with span("handler.step_wait"):
+                self.handler.step_wait()
+            reward = None
+            with span("checker.check"):
+                success = self.handler.checker.check(self.handler)
+            states = self.handler.get_states(categories=self.handler.step_state_categories)
             time_out = self._episode_length_buf >= self.handler.scenario.episode_length
             return states, reward, success, time_out, None
 
@@ -124,8 +152,9 @@ def GymEnvWrapper(cls: type[THandler]) -> type[EnvWrapper[THandler]]:
             self.handler.set_actions(self.handler.robot.name, actions)
             self.handler.simulate()
             reward = None
-            success = self.handler.checker.check(self.handler)
-            states = self.handler.get_states()
+            with span("checker.check"):
+                success = self.handler.checker.check(self.handler)
+            states = self.handler.get_states(categories=self.handler.step_state_categories)
             time_out = self._episode_length_buf >= self.handler.scenario.episode_length
             return states, reward, success, time_out, None
 
@@ -11,6 +11,7 @@ from metasim.cfg.objects import ArticulationObjCfg, PrimitiveCubeCfg, PrimitiveS
 from metasim.cfg.scenario import ScenarioCfg
 from metasim.queries.base import BaseQueryType
 from metasim.sim import BaseSimHandler, GymEnvWrapper
+from metasim.sim.parallel import ParallelSimWrapper
 from metasim.types import Action, EnvState
 from metasim.utils.state import CameraState, ObjectState, RobotState, TensorState
 
@@ -41,7 +42,8 @@ class GenesisHandler(BaseSimHandler):
         self.camera_inst_dict: dict[str, Camera] = {}
 
     def launch(self) -> None:
-        gs.init(backend=gs.gpu)  # TODO: add option for cpu
+        ## Hide the GPUs (CUDA_VISIBLE_DEVICES="") to run on CPU
+        gs.init(backend=gs.gpu if torch.cuda.is_available() else gs.cpu)
         self.scene_inst = gs.Scene(
             sim_options=gs.options.SimOptions(
                 dt=self.scenario.sim_params.dt if self.scenario.sim_params.dt is not None else 1 / 100,
@@ -118,7 +120,7 @@ class GenesisHandler(BaseSimHandler):
             n_envs=self.scenario.num_envs, env_spacing=(self.scenario.env_spacing, self.scenario.env_spacing)
         )
 
-    def _get_states(self, env_ids: list[int] | None = None) -> list[EnvState]:
+    def _get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None) -> TensorState:
         if env_ids is None:
             env_ids = list(range(self.num_envs))
 
@@ -183,7 +185,8 @@ class GenesisHandler(BaseSimHandler):
             robot_states[obj.name] = state
 
         camera_states = {}
-        for camera in self.cameras:
+        cameras = self.cameras if categories is None or "cameras" in categories else []
+        for camera in cameras:
             camera_inst = self.camera_inst_dict[camera.name]
             rgb, depth, _, _ = camera_inst.render(depth=True)
             state = CameraState(
@@ -225,6 +228,23 @@ class GenesisHandler(BaseSimHandler):
                         envs_idx=env_ids,
                     )
 
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        for obj in self.objects + [self.robot]:
+            obj_inst = self.object_inst_dict[obj.name]
+            obj_state = states.robots[obj.name] if obj.name in states.robots else states.objects[obj.name]
+            root_state = obj_state.root_state[env_ids].to(gs.device)
+            obj_inst.set_pos(root_state[:, :3], envs_idx=env_ids)
+            obj_inst.set_quat(root_state[:, 3:7], envs_idx=env_ids)
+            if isinstance(obj, ArticulationObjCfg) and obj_state.joint_pos is not None:
+                ## joint_pos is in sorted order, genesis expects the native joint order
+                joint_pos = obj_state.joint_pos[env_ids][:, self.get_joint_reindex(obj.name, inverse=True)]
+                joint_pos = joint_pos.to(gs.device)
+                if obj.fix_base_link:
+                    obj_inst.set_qpos(joint_pos, envs_idx=env_ids)
+                else:
+                    qs_idx_local = list(range(1, 1 + joint_pos.shape[1]))
+                    obj_inst.set_qpos(joint_pos, qs_idx_local=qs_idx_local, envs_idx=env_ids)
+
     def set_dof_targets(self, obj_name: str, actions: list[Action]) -> None:
         self._actions_cache = actions
 
@@ -274,6 +294,37 @@ class GenesisHandler(BaseSimHandler):
         for _ in range(self.scenario.decimation):
             self.scene_inst.step()
 
+    def _get_dofs_idx_local(self, obj_name: str) -> list[int]:
+        """Local dof indices of the joints of an object, in the order of ``get_joint_names(obj_name, sort=False)``."""
+        if not hasattr(self, "_dofs_idx_local_cache"):
+            self._dofs_idx_local_cache = {}
+        if obj_name not in self._dofs_idx_local_cache:
+            obj_inst = self.object_inst_dict[obj_name]
+            self._dofs_idx_local_cache[obj_name] = [
+                j.dof_idx_local
+                for j in obj_inst.joints
+                if j.dof_idx_local is not None and j.name != obj_inst.base_joint.name
+            ]
+        return self._dofs_idx_local_cache[obj_name]
+
+    def _get_dof_target_mode(self, obj_name: str) -> str:
+        ## set_dof_targets reads dof_effort_target for robots with effort actuators
+        return "effort" if self._get_control_mode(obj_name) == "effort" else "pos"
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        self._actions_cache = targets
+        self._actions_cache_mode = mode
+        ## targets are in sorted order, genesis expects the native joint order
+        targets = targets.to(gs.device)[:, self._get_native_dof_index(obj_name, gs.device)]
+        obj_inst = self.object_inst_dict[obj_name]
+        dofs_idx_local = self._get_dofs_idx_local(obj_name)
+        if mode == "effort":
+            obj_inst.control_dofs_force(force=targets, dofs_idx_local=dofs_idx_local)
+        elif mode == "vel":
+            obj_inst.control_dofs_velocity(velocity=targets, dofs_idx_local=dofs_idx_local)
+        else:
+            obj_inst.control_dofs_position(position=targets, dofs_idx_local=dofs_idx_local)
+
     def refresh_render(self):
         """Refresh the render."""
         if not self.headless:
@@ -285,6 +336,9 @@ class GenesisHandler(BaseSimHandler):
 
     def _get_effort_targets(self) -> torch.Tensor | None:
         """Get the effort targets from cached actions."""
+        if isinstance(getattr(self, "_actions_cache", None), torch.Tensor):
+            ## Set by set_dof_targets_tensor, already in sorted joint order
+            return self._actions_cache if self._actions_cache_mode == "effort" else None
         if not hasattr(self, "_actions_cache") or not self._actions_cache:
             return None
 
@@ -335,4 +389,5 @@ class GenesisHandler(BaseSimHandler):
         return gs.device
 
 
-GenesisEnv = GymEnvWrapper(GenesisHandler)
+GenesisParallelHandler = ParallelSimWrapper(GenesisHandler, batched=True)
+GenesisEnv = GymEnvWrapper(GenesisParallelHandler)
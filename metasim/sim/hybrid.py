@@ -1,28 +1,131 @@
 from __future__ import annotations
 
+from dataclasses import replace
+
+import torch
+
 from metasim.sim import BaseSimHandler, EnvWrapper
 from metasim.types import Action, EnvState, Extra, Reward, Success, TimeOut
-from metasim.utils.state import TensorState, state_tensor_to_nested
+from metasim.utils.profiler import profiled, span
+from metasim.utils.state import TensorState
+
+_JOINT_FIELDS = ("joint_pos", "joint_vel", "joint_pos_target", "joint_vel_target", "joint_effort_target")
+"""Joint tensor fields copied to the render handler, with their columns remapped to its joint order."""
+
+_PHYSICS_CATEGORIES = ("objects", "robots", "sensors")
+"""State categories read from the physics handler. Cameras are read from the render handler."""
 
 
 class HybridSimEnv(EnvWrapper[BaseSimHandler]):
-    def __init__(self, env_physics: type[EnvWrapper[BaseSimHandler]], env_render: type[EnvWrapper[BaseSimHandler]]):
+    """Steps the physics in one simulator and renders the cameras in another.
+
+    To render, the root states and joint states of the physics handler are copied to the render handler as tensors,
+    through a joint mapping computed once, and the render handler only reads its cameras.
+
+    Args:
+        env_physics: Environment simulating the physics.
+        env_render: Environment rendering the cameras.
+        render_every_n_steps: Render the cameras every this many steps. The states returned by the other steps have no
+            cameras. With 0, :meth:`step` never renders and frames are only produced by :meth:`render_frame`, so the
+            physics runs at full rate.
+    """
+
+    def __init__(
+        self,
+        env_physics: type[EnvWrapper[BaseSimHandler]],
+        env_render: type[EnvWrapper[BaseSimHandler]],
+        render_every_n_steps: int = 1,
+    ):
+        if render_every_n_steps < 0:
+            raise ValueError(f"render_every_n_steps must be non-negative, got {render_every_n_steps}")
         self.sim_env1 = env_physics  # physics
         self.sim_env2 = env_render  # render
+        self.render_every_n_steps = render_every_n_steps
+        self._num_steps = 0
+        self._joint_maps: dict[str, torch.LongTensor | None] | None = None
+        ## The physics cameras are never read, so the physics handler does no camera readback
+        self.sim_env1.handler.step_state_categories = _PHYSICS_CATEGORIES
 
     def reset(self, states: list[EnvState] | None = None):
         self.sim_env1.reset(states=states)
+        self._num_steps = 0
         return self.sim_env2.reset(states=states)
 
-    def step(self, action: list[Action]) -> tuple[TensorState, Reward, Success, TimeOut, Extra]:
-        obs, reward, success, time_out, extra = self.sim_env1.step(action)
-        states = self.sim_env1.handler.get_states()
-        states_nested = state_tensor_to_nested(self.sim_env1.handler, obs)
-        self.sim_env2.handler.set_states(states_nested)
-        self.sim_env2.handler.refresh_render()
-        states = self.sim_env2.handler.get_states()
+    @profiled("hybrid.step")
+    def step(self, action: list[Action] | torch.Tensor) -> tuple[TensorState, Reward, Success, TimeOut, Extra]:
+        self._num_steps += 1
+        states, reward, success, time_out, extra = self.sim_env1.step(action)
+        if self.render_every_n_steps > 0 and self._num_steps % self.render_every_n_steps == 0:
+            states.cameras = self._render(states)
         return states, reward, success, time_out, extra
 
+    def render_frame(self) -> TensorState:
+        """Render the cameras for the current physics states, regardless of ``render_every_n_steps``.
+
+        Returns:
+            The physics states, with the cameras of the render handler.
+        """
+        states = self.sim_env1.handler.get_states(categories=_PHYSICS_CATEGORIES)
+        states.cameras = self._render(states)
+        return states
+
+    def _render(self, states: TensorState) -> dict:
+        """Copy ``states`` to the render handler and return its camera states."""
+        render = self.sim_env2.handler
+        with span("hybrid.sync"):
+            render.set_states(self._to_render_states(states))
+        with span("hybrid.render"):
+            render.refresh_render()
+            return render.get_states(categories=("cameras",)).cameras
+
+    def _to_render_states(self, states: TensorState) -> TensorState:
+        """Root states and joint states of ``states``, with the joint columns in the sorted order of the render handler.
+
+        Body states are dropped, as the bodies of the two simulators need not match and setting them is not needed to
+        pose the scene.
+        """
+        if self._joint_maps is None:
+            self._joint_maps = self._build_joint_maps(states)
+        render_states = TensorState(objects={}, robots={}, cameras={}, sensors={})
+        for category in ("objects", "robots"):
+            for obj_name, obj_state in getattr(states, category).items():
+                if obj_name not in self._joint_maps:
+                    continue
+                index = self._joint_maps[obj_name]
+                joints = {}
+                if index is not None:
+                    for field_name in _JOINT_FIELDS:
+                        value = getattr(obj_state, field_name, None)
+                        if value is not None:
+                            joints[field_name] = value[:, index]
+                getattr(render_states, category)[obj_name] = replace(
+                    obj_state, body_names=None, body_state=None, **joints
+                )
+        return render_states
+
+    def _build_joint_maps(self, states: TensorState) -> dict[str, torch.LongTensor | None]:
+        """For each object of both handlers, the physics joint columns in the render joint order, or None if the same."""
+        physics, render = self.sim_env1.handler, self.sim_env2.handler
+        joint_maps = {}
+        for obj_name, obj_state in {**states.objects, **states.robots}.items():
+            if obj_name not in render.object_dict:
+                continue
+            joint_maps[obj_name] = None
+            if obj_state.joint_pos is None:
+                continue
+            physics_joints = physics.get_joint_names(obj_name, sort=True)
+            render_joints = render.get_joint_names(obj_name, sort=True)
+            if render_joints == physics_joints:
+                continue
+            missing = set(render_joints) - set(physics_joints)
+            if missing:
+                raise ValueError(f"Joints {sorted(missing)} of {obj_name} in the renderer are not in the physics")
+            physics_index = {jn: i for i, jn in enumerate(physics_joints)}
+            joint_maps[obj_name] = torch.tensor(
+                [physics_index[jn] for jn in render_joints], dtype=torch.long, device=obj_state.joint_pos.device
+            )
+        return joint_maps
+
     def render(self):
         self.sim_env2.render()
 
@@ -30,6 +133,10 @@ class HybridSimEnv(EnvWrapper[BaseSimHandler]):
         self.sim_env1.close()
         self.sim_env2.close()
 
+    @property
+    def episode_length_buf(self) -> torch.Tensor:
+        return self.sim_env1.episode_length_buf
+
     @property
     def handler(self) -> BaseSimHandler:
         # XXX: is it ok to return the physics handler?
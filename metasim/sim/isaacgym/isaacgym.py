@@ -22,6 +22,7 @@ from metasim.queries.base import BaseQueryType
 from metasim.sim import BaseSimHandler, EnvWrapper, GymEnvWrapper
 from metasim.types import Action, EnvState
 from metasim.utils.dict import class_to_dict
+from metasim.utils.profiler import span
 from metasim.utils.state import CameraState, ObjectState, RobotState, TensorState
 
 
@@ -558,7 +559,7 @@ class IsaacgymHandler(BaseSimHandler):
             else state[..., [0, 1, 2, 6, 3, 4, 5, 7, 8, 9, 10, 11, 12]]
         )
 
-    def _get_states(self, env_ids: list[int] | None = None) -> list[EnvState]:
+    def _get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None) -> TensorState:
         if env_ids is None:
             env_ids = list(range(self.num_envs))
         object_states = {}
@@ -612,14 +613,16 @@ class IsaacgymHandler(BaseSimHandler):
             robot_states[robot.name] = state
 
         camera_states = {}
-        self.gym.start_access_image_tensors(self.sim)
-        for cam_id, cam in enumerate(self.cameras):
-            state = CameraState(
-                rgb=torch.stack([self._rgb_tensors[env_id][cam_id][..., :3] for env_id in env_ids]),
-                depth=torch.stack([self._depth_tensors[env_id][cam_id] for env_id in env_ids]),
-            )
-            camera_states[cam.name] = state
-        self.gym.end_access_image_tensors(self.sim)
+        if self.cameras and (categories is None or "cameras" in categories):
+            with span("handler.camera_readback"):
+                self.gym.start_access_image_tensors(self.sim)
+                for cam_id, cam in enumerate(self.cameras):
+                    state = CameraState(
+                        rgb=torch.stack([self._rgb_tensors[env_id][cam_id][..., :3] for env_id in env_ids]),
+                        depth=torch.stack([self._depth_tensors[env_id][cam_id] for env_id in env_ids]),
+                    )
+                    camera_states[cam.name] = state
+                self.gym.end_access_image_tensors(self.sim)
 
         return TensorState(objects=object_states, robots=robot_states, cameras=camera_states, sensors={})
 
@@ -708,6 +711,25 @@ class IsaacgymHandler(BaseSimHandler):
         else:
             self.gym.set_dof_position_target_tensor(self.sim, gymtorch.unwrap_tensor(action_input))
 
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        if obj_name != self.robot.name:
+            ## set_dof_targets always writes the robot dofs, so there is nothing to fall back to
+            raise ValueError(f"IsaacGym only supports dof targets of the robot {self.robot.name}, got {obj_name}")
+        # sorted joint order -> isaacgym joint order
+        targets = targets.to(self.device, dtype=torch.float32)[:, self._get_native_dof_index(obj_name, self.device)]
+        self._actions_cache = targets
+        if mode == "pos":
+            self.set_actions(obj_name, targets)
+            return
+
+        # robot dofs are the last ones of each env
+        dof_input = torch.zeros_like(self._dof_states[:, 0])
+        dof_input.view(self._num_envs, -1)[:, self._obj_num_dof :] = targets
+        if mode == "vel":
+            self.gym.set_dof_velocity_target_tensor(self.sim, gymtorch.unwrap_tensor(dof_input))
+        else:
+            self.gym.set_dof_actuation_force_tensor(self.sim, gymtorch.unwrap_tensor(dof_input))
+
     def refresh_render(self) -> None:
         # Step the physics
         self.gym.simulate(self.sim)
@@ -909,6 +931,9 @@ class IsaacgymHandler(BaseSimHandler):
         # reset all env_id action to default
         self.actions[env_ids] = 0.0
 
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        self._set_states(states, env_ids=env_ids)
+
     def _set_actor_root_state(self, position_list, rotation_list, env_ids):
         new_root_states = self._root_states.clone()
         actor_indices = []
@@ -1,5 +1,4 @@
 import argparse
-import time
 from copy import deepcopy
 from typing import Type
 
@@ -20,6 +19,7 @@ from metasim.queries.base import BaseQueryType
 from metasim.sim import BaseSimHandler, EnvWrapper, IdentityEnvWrapper
 from metasim.types import Action, EnvState, Extra, Obs, Reward, Success, TimeOut
 from metasim.utils.dict import deep_get
+from metasim.utils.profiler import profiled, span
 from metasim.utils.state import CameraState, ContactForceState, ObjectState, RobotState, TensorState
 
 from .env_overwriter import IsaaclabEnvOverwriter
@@ -131,10 +131,12 @@ class IsaaclabHandler(BaseSimHandler):
     ############################################################
     ## Gymnasium main methods
     ############################################################
+    @profiled("env.step")
     def step(self, action: list[Action] | torch.Tensor) -> tuple[Obs, Reward, Success, TimeOut, Extra]:
         self._actions_cache = action
 
         if isinstance(action, torch.Tensor):
+            ## Actuator order, as the env actions. Tensors in sorted joint order go through set_robots_dof_targets
             action_tensor_all = action
         else:
             action_tensors = []
@@ -149,10 +151,12 @@ class IsaaclabHandler(BaseSimHandler):
                 action_tensors.append(action_tensor)
             action_tensor_all = torch.cat(action_tensors, dim=-1)
 
-        _, _, _, time_out, extras = self.env.step(action_tensor_all)
-        success = self.checker.check(self)
+        with span("isaaclab.env_step"):
+            _, _, _, time_out, extras = self.env.step(action_tensor_all)
+        with span("checker.check"):
+            success = self.checker.check(self)
         self.simulate()
-        states = self.get_states()
+        states = self.get_states(categories=self.step_state_categories)
 
         ## TODO: organize this
         for obj in self.objects:
@@ -176,46 +180,36 @@ class IsaaclabHandler(BaseSimHandler):
 
         return states, None, success, time_out, extras
 
+    @profiled("env.reset")
     def reset(self, env_ids: list[int] | None = None) -> tuple[list[EnvState], Extra]:
         if env_ids is None:
             env_ids = list(range(self.num_envs))
 
-        tic = time.time()
-        _, extras = self.env.reset(env_ids=env_ids)
-        toc = time.time()
-        log.trace(f"Reset isaaclab env time: {toc - tic:.2f}s")
+        with span("isaaclab.reset"):
+            _, extras = self.env.reset(env_ids=env_ids)
 
-        tic = time.time()
-        self.scenario.checker.reset(self, env_ids=env_ids)
-        toc = time.time()
-        log.trace(f"Reset checker time: {toc - tic:.2f}s")
+        with span("checker.reset"):
+            self.scenario.checker.reset(self, env_ids=env_ids)
 
         ## Force rerender, see https://isaac-sim.github.io/IsaacLab/main/source/refs/issues.html#blank-initial-frames-from-the-camera
-        tic = time.time()
-        # XXX: previously 12 is not enough for pick_cube, if this is the case again, try 18
-        for _ in range(12):
-            # XXX: previously sim.render() is not enough for pick_cube, if this is the case again, try calling sim.step()
-            # self.env.sim.step()
-            self.env.sim.render()
-        toc = time.time()
-        log.trace(f"Reset render time: {toc - tic:.2f}s")
+        with span("isaaclab.reset_render"):
+            # XXX: previously 12 is not enough for pick_cube, if this is the case again, try 18
+            for _ in range(12):
+                # XXX: previously sim.render() is not enough for pick_cube, if this is the case again, try calling sim.step()
+                # self.env.sim.step()
+                self.env.sim.render()
 
         ## Update camera buffer
-        tic = time.time()
-        for sensor in self.env.scene.sensors.values():
-            sensor.update(dt=0)
-        toc = time.time()
-        log.trace(f"Reset sensor buffer time: {toc - tic:.2f}s")
+        with span("handler.camera_readback"):
+            for sensor in self.env.scene.sensors.values():
+                sensor.update(dt=0)
 
         ## NOTE: Below is a workaround for IsaacLab bug. In IsaacLab v1.4.1-v2.1.0, the tiled camera pose data is never updated. The code is copied from `_update_poses` method in Camera class in `source/isaaclab/sensors/camera/camera.py` in IsaacLab v2.1.0.
         _update_tiled_camera_pose(self.env, self.cameras)
 
         ## Update obs
-        tic = time.time()
         self.simulate()
         states = self.get_states()
-        toc = time.time()
-        log.trace(f"Reset getting obs time: {toc - tic:.2f}s")
 
         return states, extras
 
@@ -439,12 +433,21 @@ class IsaaclabHandler(BaseSimHandler):
     def get_dof_pos(self, obj_name: str, joint_name: str, env_ids: list[int] | None = None) -> torch.FloatTensor:
         if env_ids is None:
             env_ids = list(range(self.num_envs))
-        dof_pos = torch.zeros(len(env_ids))
-        for i, env_id in enumerate(env_ids):
-            dof_pos[i] = self.env.scene.articulations[obj_name].data.joint_pos[env_id][
-                self.env.scene.articulations[obj_name].joint_names.index(joint_name)
-            ]
-        return dof_pos
+        articulation = self.env.scene.articulations[obj_name]
+        return articulation.data.joint_pos[env_ids, articulation.joint_names.index(joint_name)]
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        self._actions_cache = targets
+        articulation = self.env.scene.articulations[obj_name]
+        # sorted joint order -> isaaclab joint order
+        targets = targets.to(self.env.device)[:, self._get_native_dof_index(obj_name, self.env.device)]
+        if mode == "effort":
+            articulation.set_joint_effort_target(targets)
+        elif mode == "vel":
+            articulation.set_joint_velocity_target(targets)
+        else:
+            articulation.set_joint_position_target(targets)
+        articulation.write_data_to_sim()
 
     ############################################################
     ## Misc
@@ -33,17 +33,18 @@ if TYPE_CHECKING:
 from metasim.constants import TaskType
 from metasim.queries.base import BaseQueryType
 from metasim.sim import BaseSimHandler, EnvWrapper, GymEnvWrapper
+from metasim.sim.parallel import ParallelSimWrapper
 from metasim.types import Action
 from metasim.utils.state import CameraState, ObjectState, RobotState, TensorState
 
 from .mjx_helper import (
     j2t,
-    pack_body_state,
-    pack_root_state,
+    make_state_gather,
     process_entity,
     sorted_actuator_ids,
     sorted_body_ids,
     sorted_joint_info,
+    state_segment_width,
     t2j,
 )
 
@@ -114,67 +115,54 @@ class MJXHandler(BaseSimHandler):
             query_type.bind_handler(self)
 
     def _simulate(self) -> None:
-        if self._gravity_compensation:
-            self._disable_robotgravity()
-        self._data = self._substep(self._mjx_model, self._data)
+        self._data, self._state_buf = self._step_and_gather(self._mjx_model, self._data)
 
     def _get_states(self, env_ids: list[int] | None = None):
-        """Return a structured snapshot of all robots / objects in the scene."""
+        """Return a structured snapshot of all robots / objects in the scene.
+
+        All proprioceptive fields are views into the buffer gathered by the last step (see :meth:`_build_state_layout`),
+        which is shared with torch through DLPack without copies.
+        """
         data = self._data  # mjx_env.Data  (N, …)
-        N = data.qpos.shape[0]
-        idx_np = np.arange(N) if env_ids is None else np.asarray(env_ids, int)
-        idx = jnp.asarray(idx_np, dtype=jnp.int32)
+        if self._state_buf is None:
+            self._state_buf = self._gather(data)
+        buf = j2t(self._state_buf, device=self.device)  # (N, D), zero-copy
+        if env_ids is not None:
+            buf = buf[env_ids]
+
+        def field(name: str, key: str) -> torch.Tensor:
+            start, stop, shape = self._state_layout[(name, key)]
+            return buf[:, start:stop].reshape(buf.shape[0], *shape)
 
         robots: dict[str, RobotState] = {}
         objects: dict[str, ObjectState] = {}
 
         # --------------------------- ROBOT ---------------------------------------
         r_cfg = self._scenario.robots[0]  # FIXME support multiple robots
-        prefix = f"{r_cfg.name}/"
-
-        # body IDs ---------------------------------------------------------------
-        root_bid_r = self._object_root_bid_cache.get(
-            r_cfg.name,
-            sorted_body_ids(self._mjx_model, prefix)[0][0],  # fallback find
-        )
-        qadr_r, vadr_r = sorted_joint_info(self._mjx_model, prefix)
-        aid_r = sorted_actuator_ids(self._mjx_model, prefix)
-        bid_r, bnames_r = sorted_body_ids(self._mjx_model, prefix)
-        root_state_r = pack_root_state(data, idx, root_bid_r)  # (N,13)
-        body_state_r = pack_body_state(data, idx, jnp.asarray(bid_r))  # (N,B,13)
-
         robots[r_cfg.name] = RobotState(
-            root_state=j2t(root_state_r),
-            body_names=bnames_r,
-            body_state=j2t(body_state_r),
-            joint_pos=j2t(data.qpos[idx[:, None], qadr_r]),
-            joint_vel=j2t(data.qvel[idx[:, None], vadr_r]),
-            joint_pos_target=j2t(data.ctrl[idx[:, None], aid_r]),
+            root_state=field(r_cfg.name, "root_state"),
+            body_names=self._state_body_names[r_cfg.name],
+            body_state=field(r_cfg.name, "body_state"),
+            joint_pos=field(r_cfg.name, "joint_pos"),
+            joint_vel=field(r_cfg.name, "joint_vel"),
+            joint_pos_target=field(r_cfg.name, "joint_pos_target"),
             joint_vel_target=None,
-            joint_effort_target=j2t(data.actuator_force[idx[:, None], aid_r]),
+            joint_effort_target=field(r_cfg.name, "joint_effort_target"),
         )
 
         # -------------------------- OBJECTS -------------------------------------
         for obj in self._scenario.objects:
-            prefix = f"{obj.name}/"
-
-            root_bid_o = self._object_root_bid_cache[obj.name]
-            bid_o, bnames_o = sorted_body_ids(self._mjx_model, prefix)
-            root_state_o = pack_root_state(data, idx, root_bid_o)  # (N, 13)
-
             if isinstance(obj, ArticulationObjCfg):  # articulated
-                qadr_o, vadr_o = sorted_joint_info(self._mjx_model, prefix)
-                body_state_o = pack_body_state(data, idx, jnp.asarray(bid_o))  # (N,Nbody,13)
                 objects[obj.name] = ObjectState(
-                    root_state=j2t(root_state_o),
-                    body_names=bnames_o,
-                    body_state=j2t(body_state_o),
-                    joint_pos=j2t(data.qpos[idx[:, None], qadr_o]),
-                    joint_vel=j2t(data.qvel[idx[:, None], vadr_o]),
+                    root_state=field(obj.name, "root_state"),
+                    body_names=self._state_body_names[obj.name],
+                    body_state=field(obj.name, "body_state"),
+                    joint_pos=field(obj.name, "joint_pos"),
+                    joint_vel=field(obj.name, "joint_vel"),
                 )
             else:  # rigid object
                 objects[obj.name] = ObjectState(
-                    root_state=j2t(root_state_o),
+                    root_state=field(obj.name, "root_state"),
                 )
 
         # ===================== Cameras ===================================
@@ -214,11 +202,11 @@ class MJXHandler(BaseSimHandler):
                 )
         # ===================== Sensors ==================================
         sensors: dict[str, torch.Tensor] = {}
-        # `sens_batch` has shape (batch, total_dim)
-        sens_batch = data.sensordata[idx]
-        for name, sl in self._sensor_slices:
-            # Convert JAX → PyTorch; result shape (batch, dim)
-            sensors[name] = j2t(sens_batch[:, sl])
+        if self._sensor_slices:
+            # `sens_batch` has shape (batch, total_dim)
+            sens_batch = field("", "sensordata")
+            for name, sl in self._sensor_slices:
+                sensors[name] = sens_batch[:, sl]
 
         extras = self.get_extra()  # extra observations
         return TensorState(objects=objects, robots=robots, sensors=sensors, cameras=camera_states, extras=extras)
@@ -276,6 +264,10 @@ class MJXHandler(BaseSimHandler):
 
         self._data = self._data.replace(qpos=qpos, qvel=qvel, ctrl=ctrl)
         self._data = self._forward(self._mjx_model, self._data)
+        self._state_buf = None
+
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        self._set_states(states, env_ids=env_ids)
 
     def _ensure_id_cache(self, ts: TensorState):
         """Build joint-/actuator-ID lookup tables (one-time per handler)."""
@@ -303,8 +295,8 @@ class MJXHandler(BaseSimHandler):
             self._object_joint_ids[oname] = jnp.asarray(j_ids, dtype=jnp.int32)
             self._object_act_ids[oname] = jnp.asarray(a_ids, dtype=jnp.int32)
 
-    def _disable_robotgravity(self):
-        """Apply m·g wrench to each robot body to emulate gravity compensation."""
+    def _make_gravity_xfrc(self) -> jnp.ndarray:
+        """m·g wrench on each robot body that emulates gravity compensation, shape (nbody, 6)."""
         g_vec = jnp.array([0.0, 0.0, -9.81])
         body_ids = jnp.asarray([
             mujoco.mj_name2id(self._mj_model, mujoco.mjtObj.mjOBJ_BODY, n) for n in self.robot_body_names
@@ -313,9 +305,8 @@ class MJXHandler(BaseSimHandler):
         mass = self._mjx_model.body_mass[body_ids]  # (B,)
         force = -g_vec * mass[:, None]  # (B, 3)
 
-        xfrc = self._data.xfrc_applied.at[:, :, :].set(0.0)  # clear previous
-        xfrc = xfrc.at[:, body_ids, 0:3].set(force)  # apply −m·g
-        self._data = self._data.replace(xfrc_applied=xfrc)
+        xfrc = jnp.zeros((self._mj_model.nbody, 6))
+        return xfrc.at[body_ids, 0:3].set(force)  # apply −m·g
 
     def _init_mjx_once(self, ts: TensorState) -> None:
         """One-time MJX initialisation"""
@@ -370,6 +361,24 @@ class MJXHandler(BaseSimHandler):
         data = self._data
         new_ctrl = data.ctrl.at[:, a_ids].set(tgt_jax)
         self._data = data.replace(ctrl=new_ctrl)
+        self._state_buf = None
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        if mode != "pos":
+            ## The action dicts only carry position targets too, so there is nothing to fall back to
+            raise ValueError(f"MJX only supports position dof targets, got mode={mode!r} for {obj_name}")
+        self._actions_cache = targets
+
+        # columns are already in sorted joint order, same as the actuator id maps
+        if obj_name == self._scenario.robots[0].name:
+            a_ids = self._robot_act_ids.get(obj_name)
+        else:
+            a_ids = self._object_act_ids.get(obj_name)
+
+        data = self._data
+        new_ctrl = data.ctrl.at[:, a_ids].set(t2j(targets.float().contiguous(), device=self.device))
+        self._data = data.replace(ctrl=new_ctrl)
+        self._state_buf = None
 
     def set_actions(
         self,
@@ -389,6 +398,7 @@ class MJXHandler(BaseSimHandler):
         data = self._data
         new_ctrl = data.ctrl.at[:, a_ids].set(tgt_jax)
         self._data = data.replace(ctrl=new_ctrl)
+        self._state_buf = None
 
     def close(self):
         pass
@@ -572,6 +582,7 @@ class MJXHandler(BaseSimHandler):
         self._build_joint_name_map()
         self._build_root_bid_cache()
         self._build_sensor_cache()
+        self._build_state_layout()
 
         # batched empty data
         data_single = mjx.make_data(self._mjx_model)
@@ -584,6 +595,70 @@ class MJXHandler(BaseSimHandler):
         # sub-step & forward kernel
         self._substep = self._make_substep(self.decimation)
         self._forward = jax.jit(jax.vmap(mjx.forward, in_axes=(None, 0)))
+        self._gather = jax.jit(make_state_gather(self._state_segments))
+        self._step_and_gather = self._make_step_and_gather()
+        self._state_buf = None
+
+    def _make_step_and_gather(self):
+        """One jitted call that applies gravity compensation, runs the decimated substeps and gathers the states."""
+        substep = self._substep
+        gather = make_state_gather(self._state_segments)
+        xfrc = self._make_gravity_xfrc() if self._gravity_compensation else None
+
+        def step_and_gather(model, data):
+            if xfrc is not None:
+                data = data.replace(xfrc_applied=jnp.broadcast_to(xfrc, data.xfrc_applied.shape))
+            data = substep(model, data)
+            return data, gather(data)
+
+        return jax.jit(step_and_gather)
+
+    def _build_state_layout(self) -> None:
+        """Lay out every tensor returned by :meth:`_get_states` as columns of one (N, D) gathered buffer.
+
+        ``_state_layout`` maps ``(name, field)`` to ``(start, stop, shape)`` of the field in the buffer, and
+        ``_state_segments`` lists the segments gathered by :func:`make_state_gather`.
+        """
+        model = self._mjx_model
+        self._state_segments: list[tuple[str, tuple[int, ...]]] = []
+        self._state_layout: dict[tuple[str, str], tuple[int, int, tuple[int, ...]]] = {}
+        self._state_body_names: dict[str, list[str]] = {}
+        start = 0
+
+        def add(name: str, key: str, kind: str, ids, shape: tuple[int, ...]) -> None:
+            nonlocal start
+            ids = tuple(int(i) for i in ids)
+            width = state_segment_width(kind, ids, model)
+            if width > 0:
+                self._state_segments.append((kind, ids))
+            self._state_layout[(name, key)] = (start, start + width, shape)
+            start += width
+
+        r_cfg = self._scenario.robots[0]  # FIXME support multiple robots
+        prefix = f"{r_cfg.name}/"
+        qadr_r, vadr_r = sorted_joint_info(model, prefix)
+        aid_r = sorted_actuator_ids(model, prefix)
+        bid_r, bnames_r = sorted_body_ids(model, prefix)
+        self._state_body_names[r_cfg.name] = bnames_r
+        add(r_cfg.name, "root_state", "body", [self._object_root_bid_cache[r_cfg.name]], (13,))
+        add(r_cfg.name, "body_state", "body", bid_r, (len(bid_r), 13))
+        add(r_cfg.name, "joint_pos", "qpos", qadr_r, (len(qadr_r),))
+        add(r_cfg.name, "joint_vel", "qvel", vadr_r, (len(vadr_r),))
+        add(r_cfg.name, "joint_pos_target", "ctrl", aid_r, (len(aid_r),))
+        add(r_cfg.name, "joint_effort_target", "actuator_force", aid_r, (len(aid_r),))
+
+        for obj in self._scenario.objects:
+            add(obj.name, "root_state", "body", [self._object_root_bid_cache[obj.name]], (13,))
+            if isinstance(obj, ArticulationObjCfg):
+                prefix = f"{obj.name}/"
+                qadr_o, vadr_o = sorted_joint_info(model, prefix)
+                bid_o, bnames_o = sorted_body_ids(model, prefix)
+                self._state_body_names[obj.name] = bnames_o
+                add(obj.name, "body_state", "body", bid_o, (len(bid_o), 13))
+                add(obj.name, "joint_pos", "qpos", qadr_o, (len(qadr_o),))
+                add(obj.name, "joint_vel", "qvel", vadr_o, (len(vadr_o),))
+
+        add("", "sensordata", "sensordata", (), (int(model.nsensordata),))
 
     def _make_substep(self, n_sub: int):
         def _one_env(model, data):
@@ -639,4 +714,5 @@ class MJXHandler(BaseSimHandler):
         return torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 
-MJXEnv: type[EnvWrapper[MJXHandler]] = GymEnvWrapper(MJXHandler)
+MJXParallelHandler = ParallelSimWrapper(MJXHandler, batched=True)
+MJXEnv: type[EnvWrapper[MJXHandler]] = GymEnvWrapper(MJXParallelHandler)
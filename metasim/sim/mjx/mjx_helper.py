@@ -331,6 +331,47 @@ def _pack_contact_force(data, env_idx: jnp.ndarray, body_ids: jnp.ndarray) -> jn
     return data.cfrc_ext[env_idx[:, None], body_ids]  # (N, B, 6)
 
 
+# -----------------------------------------------------------------------------
+#  Fused state gather
+# -----------------------------------------------------------------------------
+def state_segment_width(kind: str, ids, model) -> int:
+    """Number of buffer columns of one segment of :func:`make_state_gather`."""
+    if kind == "body":
+        return 13 * len(ids)
+    if kind == "sensordata":
+        return int(model.nsensordata)
+    return len(ids)
+
+
+def make_state_gather(segments: list[tuple[str, tuple[int, ...]]]):
+    """
+    Build a function that gathers every state segment of a batched
+    ``mjx.Data`` into one contiguous (N, D) float32 buffer.
+
+    Each segment is ``(kind, ids)``: ``"body"`` packs (pos, quat, lin_vel,
+    ang_vel) of the body ids (13 columns each), ``"sensordata"`` copies all
+    sensors, any other kind (``"qpos"``, ``"qvel"``, ``"ctrl"``,
+    ``"actuator_force"``) indexes that field of ``Data`` with the ids.
+    The ids are static, so the returned function can be traced into a jit.
+    """
+    segments = [(kind, jnp.asarray(ids, dtype=jnp.int32)) for kind, ids in segments]
+
+    def gather(data) -> jnp.ndarray:
+        n = data.qpos.shape[0]
+        env_idx = jnp.arange(n, dtype=jnp.int32)
+        parts = []
+        for kind, ids in segments:
+            if kind == "body":
+                parts.append(pack_body_state(data, env_idx, ids).reshape(n, -1))
+            elif kind == "sensordata":
+                parts.append(data.sensordata)
+            else:
+                parts.append(getattr(data, kind)[:, ids])
+        return jnp.concatenate([p.astype(jnp.float32) for p in parts], axis=-1)
+
+    return gather
+
+
 _site_lookup_cache = {}
 
 
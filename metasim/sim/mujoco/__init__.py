@@ -1,3 +1,3 @@
 # ruff: noqa: F401
 
-from .mujoco import MujocoEnv, MujocoHandler
+from .mujoco import MujocoBatchedHandler, MujocoEnv, MujocoHandler
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy, deepcopy
 from typing import TYPE_CHECKING
 
 import mujoco
@@ -18,8 +21,9 @@ if TYPE_CHECKING:
 from metasim.constants import TaskType
 from metasim.queries.base import BaseQueryType
 from metasim.sim import BaseSimHandler, EnvWrapper, GymEnvWrapper
-from metasim.sim.parallel import ParallelSimWrapper
-from metasim.types import Action
+from metasim.sim.parallel import ParallelSimWrapper, _SequentialSimHandler
+from metasim.types import Action, EnvState
+from metasim.utils.profiler import span
 from metasim.utils.state import CameraState, ObjectState, RobotState, TensorState
 
 
@@ -71,6 +75,9 @@ class MujocoHandler(BaseSimHandler):
             body_name for body_name in self.body_names if body_name.startswith(self._mujoco_robot_name)
         ]
 
+        ## Resolve all joint, actuator and body addresses once, so the per-step code only does array indexing
+        for obj in self.objects + [self.robot]:
+            self._get_state_addrs(obj.name)
         self._init_torque_control()
 
         if not self.headless:
@@ -129,6 +136,27 @@ class MujocoHandler(BaseSimHandler):
         self._robot_default_dof_pos = np.array(default_dof_pos)
         self._current_vel_target = None  # Initialize velocity target tracking
 
+        ## Actuator ids of the PD (effort) controlled and position controlled joints, and their sorted joint indices
+        self._pd_joint = np.array(self._effort_controlled_joints, dtype=np.int64)
+        self._pd_ctrl = np.array(
+            [
+                self.physics.model.actuator(f"{self._mujoco_robot_name}{joint_names[i]}").id
+                for i in self._effort_controlled_joints
+            ],
+            dtype=np.int64,
+        )
+        addrs = self._get_state_addrs(self.robot.name)
+        position_controlled = np.isin(addrs["ctrl_joint"], self._position_controlled_joints)
+        self._pos_joint = addrs["ctrl_joint"][position_controlled]
+        self._pos_ctrl = addrs["ctrl"][position_controlled]
+
+        ## Bodies and forces used for gravity compensation
+        self._robot_body_ids = np.array(
+            [self.physics.model.body(body_name).id for body_name in self.robot_body_names], dtype=np.int64
+        )
+        gravity_vec = np.array([0.0, 0.0, -9.81])
+        self._gravity_compensation_force = -gravity_vec * self.physics.model.body_mass[self._robot_body_ids, None]
+
     def _apply_scale_to_mjcf(self, mjcf_model, scale):
         """Apply scale to all geoms, bodies, and sites in the MJCF model."""
         scale_x, scale_y, scale_z = scale
@@ -331,12 +359,12 @@ class MujocoHandler(BaseSimHandler):
 
         return actuator_states
 
-    def _pack_state(self, body_ids: list[int]):
+    def _pack_state(self, body_ids: np.ndarray):
         """
         Pack pos(3), quat(4), lin_vel_world(3), ang_vel(3) for one-env MuJoCo.
 
         Args:
-            body_ids: list of body IDs, e.g. [root_id] or [root_id] + body_ids_reindex
+            body_ids: body IDs, e.g. [root_id] or [root_id] + body_ids_reindex
 
         Returns:
             root_np: numpy (13,)      — the first body
@@ -358,32 +386,21 @@ class MujocoHandler(BaseSimHandler):
         root_np = full[0]
         return root_np, full  # root, bodies
 
-    def _get_states(self, env_ids: list[int] | None = None) -> list[dict]:
+    def _get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None) -> TensorState:
+        data = self.physics.data
         object_states = {}
         for obj in self.objects:
-            model_name = self.mj_objects[obj.name].model
-
-            obj_body_id = self.physics.model.body(f"{model_name}/").id
+            addrs = self._get_state_addrs(obj.name)
+            root_np, body_np = self._pack_state(addrs["body"])
             if isinstance(obj, ArticulationObjCfg):
-                joint_names = self.get_joint_names(obj.name, sort=True)
-                body_ids_reindex = self._get_body_ids_reindex(obj.name)
-
-                root_np, body_np = self._pack_state([obj_body_id] + body_ids_reindex)
-
                 state = ObjectState(
                     root_state=torch.from_numpy(root_np).float().unsqueeze(0),  # (1,13)
-                    body_names=self.get_body_names(obj.name),
+                    body_names=addrs["body_names"],
                     body_state=torch.from_numpy(body_np).float().unsqueeze(0),  # (1,n_body,13)
-                    joint_pos=torch.tensor([
-                        self.physics.data.joint(f"{model_name}/{jn}").qpos.item() for jn in joint_names
-                    ]).unsqueeze(0),
-                    joint_vel=torch.tensor([
-                        self.physics.data.joint(f"{model_name}/{jn}").qvel.item() for jn in joint_names
-                    ]).unsqueeze(0),
+                    joint_pos=torch.from_numpy(data.qpos[addrs["qpos"]]).float().unsqueeze(0),
+                    joint_vel=torch.from_numpy(data.qvel[addrs["qvel"]]).float().unsqueeze(0),
                 )
             else:
-                root_np, _ = self._pack_state([obj_body_id])
-
                 state = ObjectState(
                     root_state=torch.from_numpy(root_np).float().unsqueeze(0),  # (1,13)
                 )
@@ -391,44 +408,41 @@ class MujocoHandler(BaseSimHandler):
 
         robot_states = {}
         for robot in [self.robot]:
-            model_name = self.mj_objects[robot.name].model
-            obj_body_id = self.physics.model.body(f"{model_name}/").id
-            joint_names = self.get_joint_names(robot.name, sort=True)
-            actuator_reindex = self._get_actuator_reindex(robot.name)
-            body_ids_reindex = self._get_body_ids_reindex(robot.name)
-
-            root_np, body_np = self._pack_state([obj_body_id] + body_ids_reindex)
-
+            addrs = self._get_state_addrs(robot.name)
+            root_np, body_np = self._pack_state(addrs["body"])
             state = RobotState(
-                body_names=self.get_body_names(robot.name),
+                body_names=addrs["body_names"],
                 root_state=torch.from_numpy(root_np).float().unsqueeze(0),  # (1,13)
                 body_state=torch.from_numpy(body_np).float().unsqueeze(0),  # (1,n_body,13)
-                joint_pos=torch.tensor([
-                    self.physics.data.joint(f"{model_name}/{jn}").qpos.item() for jn in joint_names
-                ]).unsqueeze(0),
-                joint_vel=torch.tensor([
-                    self.physics.data.joint(f"{model_name}/{jn}").qvel.item() for jn in joint_names
-                ]).unsqueeze(0),
-                joint_pos_target=torch.from_numpy(self.physics.data.ctrl[actuator_reindex]).unsqueeze(0),
+                joint_pos=torch.from_numpy(data.qpos[addrs["qpos"]]).float().unsqueeze(0),
+                joint_vel=torch.from_numpy(data.qvel[addrs["qvel"]]).float().unsqueeze(0),
+                joint_pos_target=torch.from_numpy(data.ctrl[addrs["actuator_reindex"]]).unsqueeze(0),
                 joint_vel_target=torch.from_numpy(self._current_vel_target).unsqueeze(0)
                 if self._current_vel_target is not None
                 else None,
-                joint_effort_target=torch.from_numpy(self.physics.data.actuator_force[actuator_reindex]).unsqueeze(0),
+                joint_effort_target=torch.from_numpy(data.actuator_force[addrs["actuator_reindex"]]).unsqueeze(0),
             )
             robot_states[robot.name] = state
 
         camera_states = {}
-        for camera in self.cameras:
-            camera_id = f"{camera.name}_custom"  # XXX: hard code camera id for now
-            camera_states[camera.name] = {}
-            if "rgb" in camera.data_types:
-                rgb = self.physics.render(width=camera.width, height=camera.height, camera_id=camera_id, depth=False)
-                rgb = torch.from_numpy(rgb.copy()).unsqueeze(0)
-            if "depth" in camera.data_types:
-                depth = self.physics.render(width=camera.width, height=camera.height, camera_id=camera_id, depth=True)
-                depth = torch.from_numpy(depth.copy()).unsqueeze(0)
-            state = CameraState(rgb=rgb, depth=depth)
-            camera_states[camera.name] = state
+        ## Rendering is the expensive part, skip it for proprio-only reads
+        cameras = self.cameras if categories is None or "cameras" in categories else []
+        with span("handler.camera_readback"):
+            for camera in cameras:
+                camera_id = f"{camera.name}_custom"  # XXX: hard code camera id for now
+                camera_states[camera.name] = {}
+                if "rgb" in camera.data_types:
+                    rgb = self.physics.render(
+                        width=camera.width, height=camera.height, camera_id=camera_id, depth=False
+                    )
+                    rgb = torch.from_numpy(rgb.copy()).unsqueeze(0)
+                if "depth" in camera.data_types:
+                    depth = self.physics.render(
+                        width=camera.width, height=camera.height, camera_id=camera_id, depth=True
+                    )
+                    depth = torch.from_numpy(depth.copy()).unsqueeze(0)
+                state = CameraState(rgb=rgb, depth=depth)
+                camera_states[camera.name] = state
         extras = self.get_extra()
 
         return TensorState(objects=object_states, robots=robot_states, cameras=camera_states, sensors={}, extras=extras)
@@ -493,26 +507,104 @@ class MujocoHandler(BaseSimHandler):
             self._set_joint_state(obj_name, obj_state, zero_vel)
         self.physics.forward()
 
-    def _disable_robotgravity(self):
-        gravity_vec = np.array([0.0, 0.0, -9.81])
+    def _get_state_addrs(self, obj_name: str) -> dict:
+        """Get the qpos/qvel/ctrl/body addresses used to read and write the state of an object in bulk.
+
+        Built for every object at launch and cached, so reading states, PD control and setting targets only index
+        into the MuJoCo arrays.
 
+        Returns:
+            dict: ``root_qpos``/``root_qvel`` are the free joint addresses (None for fixed bases, whose pose is written
+            to ``body_pos``/``body_quat`` of ``root_body`` instead). ``qpos``/``qvel`` are the joint addresses of
+            ``joint_names``, the sorted joint names. ``ctrl`` are the actuator ids of the actuated joints, which are
+            ``ctrl_joint`` in the sorted joint order. ``body`` indexes ``xpos``/``xquat``/``cvel`` with the root body
+            followed by the bodies of ``body_names`` (sorted). For the robot, ``actuator_reindex`` sorts ``ctrl`` and
+            ``actuator_force`` by actuator name.
+        """
+        if not hasattr(self, "_state_addrs_cache"):
+            self._state_addrs_cache = {}
+        if obj_name not in self._state_addrs_cache:
+            model = self.physics.model
+            if obj_name == self.robot.name:
+                root_name = self._mujoco_robot_name
+                joint_prefix = self._mujoco_robot_name
+                has_free_root = not self.robot.fix_base_link
+            else:
+                root_name = self.mj_objects[obj_name].model + "/"
+                joint_prefix = root_name
+                try:
+                    model.joint(root_name)
+                    has_free_root = True
+                except KeyError:
+                    has_free_root = False
+
+            addrs = {"root_qpos": None, "root_qvel": None, "root_body": None}
+            model_name = self.mj_objects[obj_name].model
+            body_ids = [model.body(f"{model_name}/").id]
+            addrs["body_names"] = []
+            if isinstance(self.object_dict[obj_name], ArticulationObjCfg):
+                body_ids += self._get_body_ids_reindex(obj_name)
+                addrs["body_names"] = self.get_body_names(obj_name)
+            addrs["body"] = np.array(body_ids, dtype=np.int64)
+            if obj_name == self.robot.name:
+                addrs["actuator_reindex"] = np.array(self._get_actuator_reindex(obj_name), dtype=np.int64)
+
+            if has_free_root:
+                root_joint_id = model.joint(root_name).id
+                addrs["root_qpos"] = int(model.jnt_qposadr[root_joint_id])
+                addrs["root_qvel"] = int(model.jnt_dofadr[root_joint_id])
+            else:
+                addrs["root_body"] = model.body(root_name).id
+
+            joint_names = self.get_joint_names(obj_name, sort=True)
+            addrs["joint_names"] = joint_names
+            joint_ids = np.array([model.joint(f"{joint_prefix}{jn}").id for jn in joint_names], dtype=np.int64)
+            addrs["qpos"] = model.jnt_qposadr[joint_ids]
+            addrs["qvel"] = model.jnt_dofadr[joint_ids]
+
+            ctrl_joint, ctrl = [], []
+            for i, jn in enumerate(joint_names):
+                try:
+                    ctrl.append(model.actuator(f"{joint_prefix}{jn}").id)
+                    ctrl_joint.append(i)
+                except KeyError:
+                    pass
+            addrs["ctrl_joint"] = np.array(ctrl_joint, dtype=np.int64)
+            addrs["ctrl"] = np.array(ctrl, dtype=np.int64)
+            self._state_addrs_cache[obj_name] = addrs
+        return self._state_addrs_cache[obj_name]
+
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int] | None = None) -> None:
+        """Write the states in bulk through cached qpos/ctrl addresses. Velocities are zeroed, as in :meth:`_set_states`."""
+        data = self.physics.data
+        model = self.physics.model
+        for obj_name, obj_state in {**states.objects, **states.robots}.items():
+            addrs = self._get_state_addrs(obj_name)
+            root = obj_state.root_state[0].detach().cpu().numpy()
+            if addrs["root_qpos"] is not None:
+                data.qpos[addrs["root_qpos"] : addrs["root_qpos"] + 7] = root[:7]
+                data.qvel[addrs["root_qvel"] : addrs["root_qvel"] + 6] = 0
+            else:
+                model.body_pos[addrs["root_body"]] = root[:3]
+                model.body_quat[addrs["root_body"]] = root[3:7]
+
+            if obj_state.joint_pos is not None and len(addrs["qpos"]) > 0:
+                joint_pos = obj_state.joint_pos[0].detach().cpu().numpy()
+                data.qpos[addrs["qpos"]] = joint_pos
+                data.qvel[addrs["qvel"]] = 0
+                data.ctrl[addrs["ctrl"]] = joint_pos[addrs["ctrl_joint"]]
+        self.physics.forward()
+
+    def _disable_robotgravity(self):
         self.physics.data.xfrc_applied[:] = 0
-        for body_name in self.robot_body_names:
-            body_id = self.physics.model.body(body_name).id
-            force_vec = -gravity_vec * self.physics.model.body(body_name).mass
-            self.physics.data.xfrc_applied[body_id, 0:3] = force_vec
-            self.physics.data.xfrc_applied[body_id, 3:6] = 0
+        self.physics.data.xfrc_applied[self._robot_body_ids, 0:3] = self._gravity_compensation_force
 
     def _compute_effort(self, actions):
         """Compute effort from actions using PD controller."""
         action_scaled = self._action_scale * actions
-        joint_names = self.get_joint_names(self.robot.name, sort=True)
-        robot_dof_pos = np.array([
-            self.physics.data.joint(f"{self._mujoco_robot_name}{jn}").qpos[0] for jn in joint_names
-        ])
-        robot_dof_vel = np.array([
-            self.physics.data.joint(f"{self._mujoco_robot_name}{jn}").qvel[0] for jn in joint_names
-        ])
+        addrs = self._get_state_addrs(self.robot.name)
+        robot_dof_pos = self.physics.data.qpos[addrs["qpos"]]
+        robot_dof_vel = self.physics.data.qvel[addrs["qvel"]]
 
         if self._action_offset:
             effort = (
@@ -529,46 +621,50 @@ class MujocoHandler(BaseSimHandler):
     def _apply_pd_control(self, actions):
         """Apply torque control using computed efforts."""
         effort = self._compute_effort(actions)
-
-        joint_names = self.get_joint_names(self.robot.name, sort=True)
-        for i in self._effort_controlled_joints:
-            joint_name = joint_names[i]
-            actuator_id = self.physics.model.actuator(f"{self._mujoco_robot_name}{joint_name}").id
-            self.physics.data.ctrl[actuator_id] = effort[i]
+        self.physics.data.ctrl[self._pd_ctrl] = effort[self._pd_joint]
 
     def set_dof_targets(self, obj_name: str, actions: list[Action]) -> None:
         self._actions_cache = actions
+        addrs = self._get_state_addrs(obj_name)
+        joint_names = addrs["joint_names"]
 
         # Extract velocity targets if present
         vel_targets = actions[0][obj_name].get("dof_vel_target", None)
         if vel_targets:
-            joint_names = self.get_joint_names(self.robot.name, sort=True)
-            self._current_vel_target = np.zeros(self._robot_num_dof)
-            for i, joint_name in enumerate(joint_names):
-                if joint_name in vel_targets:
-                    self._current_vel_target[i] = vel_targets[joint_name]
+            self._current_vel_target = np.array([vel_targets.get(jn, 0.0) for jn in joint_names])
         else:
             self._current_vel_target = None
 
-        if self._manual_pd_on:
-            joint_targets = actions[0][obj_name]["dof_pos_target"]
-            joint_names = self.get_joint_names(self.robot.name, sort=True)
-
-            self._current_action = np.zeros(self._robot_num_dof)
-            for i, joint_name in enumerate(joint_names):
-                if joint_name in joint_targets:
-                    self._current_action[i] = joint_targets[joint_name]
-
-            for i in self._position_controlled_joints:
-                joint_name = joint_names[i]
-                if joint_name in joint_targets:
-                    actuator = self.physics.data.actuator(f"{self._mujoco_robot_name}{joint_name}")
-                    actuator.ctrl = joint_targets[joint_name]
+        joint_targets = actions[0][obj_name]["dof_pos_target"]
+        targets = np.array([joint_targets.get(jn, 0.0) for jn in joint_names])
+        has_target = np.array([jn in joint_targets for jn in joint_names], dtype=bool)
+        if self._manual_pd_on and obj_name == self.robot.name:
+            # effort controlled joints are driven by the PD controller in _simulate
+            self._current_action = targets
+            ctrl, ctrl_joint = self._pos_ctrl, self._pos_joint
+        else:
+            ctrl, ctrl_joint = addrs["ctrl"], addrs["ctrl_joint"]
+        ctrl_has_target = has_target[ctrl_joint]
+        self.physics.data.ctrl[ctrl[ctrl_has_target]] = targets[ctrl_joint[ctrl_has_target]]
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        self._actions_cache = targets
+        values = targets[0].detach().to(dtype=torch.float64, device="cpu").numpy()
+        addrs = self._get_state_addrs(obj_name)
+
+        if mode == "vel":
+            self._current_vel_target = values
+        elif mode == "effort":
+            if obj_name == self.robot.name:
+                ## Raw efforts replace the PD controller until the next position targets
+                self._current_action = None
+            self.physics.data.ctrl[addrs["ctrl"]] = values[addrs["ctrl_joint"]]
+        elif self._manual_pd_on and obj_name == self.robot.name:
+            # effort controlled joints are driven by the PD controller in _simulate
+            self._current_action = values
+            self.physics.data.ctrl[self._pos_ctrl] = values[self._pos_joint]
         else:
-            joint_targets = actions[0][obj_name]["dof_pos_target"]
-            for joint_name, target_pos in joint_targets.items():
-                actuator = self.physics.data.actuator(f"{self._mujoco_robot_name}{joint_name}")
-                actuator.ctrl = target_pos
+            self.physics.data.ctrl[addrs["ctrl"]] = values[addrs["ctrl_joint"]]
 
     def set_actions(self, obj_name: str, actions):
         self._actions_cache = actions
@@ -586,8 +682,8 @@ class MujocoHandler(BaseSimHandler):
         if self._gravity_compensation:
             self._disable_robotgravity()
 
-        # Apply torque control if manual PD is enabled
-        if self._manual_pd_on:
+        # Apply torque control if manual PD is enabled and driven by position targets
+        if self._manual_pd_on and self._current_action is not None:
             for _ in range(self.decimation):
                 self._apply_pd_control(self._current_action)
                 self.physics.step()
@@ -732,4 +828,141 @@ class MujocoHandler(BaseSimHandler):
 
 
 MujocoParallelHandler = ParallelSimWrapper(MujocoHandler)
-MujocoEnv: type[EnvWrapper[MujocoHandler]] = GymEnvWrapper(MujocoParallelHandler)
+
+
+class MujocoBatchedHandler(_SequentialSimHandler):
+    """Several MuJoCo environments in one process, sharing one ``MjModel`` and stepped from a thread pool.
+
+    Environment 0 is a regular :class:`MujocoHandler`. Every other environment is a shallow copy of it with its own
+    ``MjData`` (``physics.copy(share_model=True)``) and its own mutable state, see :meth:`_env_handler`, so the address
+    tables are built once and there is no per-process memory or IPC overhead. ``mj_step`` releases the GIL, so the
+    environments simulate in parallel.
+
+    Note:
+        Poses of fixed-base objects live in the model, so they are shared by all environments. Setting states that
+        give such an object different poses in different environments, or that move it in only some environments,
+        raises a ValueError.
+    """
+
+    def __new__(cls, scenario: ScenarioCfg, optional_queries: dict[str, BaseQueryType] | None = None):
+        """Use worker processes (or the single-env handler) unless ``scenario.parallel_backend`` is ``"thread"``."""
+        if scenario.num_envs == 1 or scenario.parallel_backend != "thread":
+            return MujocoParallelHandler(scenario)
+        return super().__new__(cls)
+
+    def __init__(self, scenario: ScenarioCfg, optional_queries: dict[str, BaseQueryType] | None = None):
+        BaseSimHandler.__init__(self, scenario, optional_queries)
+        sub_scenario = deepcopy(scenario)
+        sub_scenario.num_envs = 1
+        self._base_handler = MujocoHandler(sub_scenario)
+        self.handlers: list[MujocoHandler] = []
+        self._pool: ThreadPoolExecutor | None = None
+
+    def launch(self) -> None:
+        base = self._base_handler
+        base.launch()
+        self.handlers = [base] + [self._env_handler() for _ in range(1, self.num_envs)]
+        self._pool = ThreadPoolExecutor(max_workers=min(self.num_envs, os.cpu_count() or 1))
+        BaseSimHandler.launch(self)
+
+    def _env_handler(self) -> MujocoHandler:
+        """A handler of one more environment, sharing the model of the base handler but none of its mutable state.
+
+        The tables built at launch, such as the gains and the object dicts, are only read afterwards and are shared.
+        """
+        base = self._base_handler
+        handler = copy(base)
+        ## Caches built on first use are dicts filled in place, so every handler builds its own
+        for name in [name for name in vars(handler) if name.endswith("_cache")]:
+            delattr(handler, name)
+        handler.physics = base.physics.copy(share_model=True)
+        handler.data = handler.physics.data
+        handler.viewer = None
+        handler.headless = True
+        handler.optional_queries = {}
+        handler._episode_length_buf = 0
+        handler._actions_cache = []
+        handler._current_action = None
+        handler._current_vel_target = None
+        handler._state_cache = None
+        handler._state_cache_valid = {}
+        return handler
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for handler in self.handlers or [self._base_handler]:
+            handler.close()
+
+    def _fixed_base_names(self) -> list[str]:
+        """Names of the objects and robots whose root pose lives in the shared model."""
+        if not hasattr(self, "_fixed_base_names_cache"):
+            base = self._base_handler
+            self._fixed_base_names_cache = [
+                obj.name for obj in self.objects + self.robots if base._get_state_addrs(obj.name)["root_qpos"] is None
+            ]
+        return self._fixed_base_names_cache
+
+    def _check_shared_poses(self, poses: dict[str, np.ndarray], env_ids: list[int]) -> None:
+        """Check that fixed-base poses, of shape (len(env_ids), 7), can be written to the shared model."""
+        model = self._base_handler.physics.model
+        for obj_name, pose in poses.items():
+            if not np.allclose(pose, pose[0], atol=1e-6):
+                raise ValueError(
+                    f"{obj_name} has a fixed base, whose pose is shared by all environments, but different poses were"
+                    " given for different environments"
+                )
+            if len(env_ids) < self.num_envs:
+                root_body = self._base_handler._get_state_addrs(obj_name)["root_body"]
+                current = np.concatenate([model.body_pos[root_body], model.body_quat[root_body]])
+                if not np.allclose(pose[0], current, atol=1e-6):
+                    raise ValueError(
+                        f"{obj_name} has a fixed base, whose pose is shared by all environments, so it cannot be moved"
+                        f" in environments {env_ids} only"
+                    )
+
+    def _set_states(self, states: list[EnvState], env_ids: list[int] | None = None) -> None:
+        if env_ids is None:
+            env_ids = list(range(self.num_envs))
+        poses = {}
+        for obj_name in self._fixed_base_names():
+            env_states = [{**states[i]["objects"], **states[i]["robots"]}.get(obj_name) for i in env_ids]
+            if any(st is None or ("pos" not in st and "rot" not in st) for st in env_states):
+                continue
+            poses[obj_name] = np.stack([
+                np.concatenate([
+                    np.asarray(torch.as_tensor(st.get("pos", [0.0, 0.0, 0.0])).cpu(), dtype=np.float64),
+                    np.asarray(torch.as_tensor(st.get("rot", [1.0, 0.0, 0.0, 0.0])).cpu(), dtype=np.float64),
+                ])
+                for st in env_states
+            ])
+        self._check_shared_poses(poses, env_ids)
+        super()._set_states(states, env_ids)
+
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        items = {**states.objects, **states.robots}
+        poses = {
+            obj_name: items[obj_name].root_state[env_ids, :7].detach().cpu().numpy().astype(np.float64)
+            for obj_name in self._fixed_base_names()
+            if obj_name in items
+        }
+        self._check_shared_poses(poses, env_ids)
+        super()._set_states_tensor(states, env_ids)
+
+    def _simulate(self):
+        ## The profiler is not thread safe, so the threads skip the profiled simulate() and only this call is profiled
+        for future in [self._pool.submit(self._simulate_env, handler) for handler in self.handlers]:
+            future.result()
+
+    @staticmethod
+    def _simulate_env(handler: MujocoHandler) -> None:
+        handler._invalidate_state_cache()
+        handler._simulate()
+
+    def refresh_render(self) -> None:
+        for handler in self.handlers:
+            handler.refresh_render()
+
+
+MujocoEnv: type[EnvWrapper[MujocoHandler]] = GymEnvWrapper(MujocoBatchedHandler)
@@ -4,13 +4,15 @@ from __future__ import annotations
 
 import multiprocessing as mp
 import sys
-import time
 import traceback
 from copy import deepcopy
+from dataclasses import fields
 from functools import partial
-from multiprocessing.connection import Connection
+from multiprocessing.connection import Connection, wait
+from multiprocessing.shared_memory import SharedMemory
 from typing import TYPE_CHECKING
 
+import numpy as np
 import torch
 from loguru import logger as log
 
@@ -19,7 +21,198 @@ if TYPE_CHECKING:
 
 from metasim.sim.base import BaseSimHandler
 from metasim.types import Action, EnvState, Extra, Obs, Reward, Success
-from metasim.utils.state import join_tensor_states
+from metasim.utils import profiler
+from metasim.utils.profiler import span
+from metasim.utils.state import STATE_CATEGORIES, TensorState, join_tensor_states, slice_tensor_state
+
+_PRESENCE_KEY = ("", "", "present")
+"""Key of the presence mask among the shared-memory blocks of :class:`_SharedStateBuffer`."""
+
+
+class _SharedStateBuffer:
+    """Shared-memory slabs holding one batched :class:`TensorState`.
+
+    Every tensor field of the layout gets its own slab of shape ``(num_envs, ...)``. Workers attach to the slabs by
+    name and write their rows in place, so only small control messages go through the pipes. A presence mask of shape
+    ``(num_envs, num_fields)`` records which rows hold a value, as fields can be None in some steps, e.g. joint targets
+    before the first action.
+    """
+
+    def __init__(
+        self,
+        specs: dict[tuple[str, str, str], tuple[tuple[int, ...], str]],
+        num_envs: int,
+        names: dict[tuple[str, str, str], str] | None = None,
+    ):
+        self.specs = specs
+        self.num_envs = num_envs
+        self._owner = names is None
+        self._shms: dict[tuple[str, str, str], SharedMemory] = {}
+        self.arrays: dict[tuple[str, str, str], np.ndarray] = {}
+        for key, (shape, dtype) in {**specs, _PRESENCE_KEY: ((len(specs),), "|b1")}.items():
+            nbytes = max(int(np.prod((num_envs, *shape))) * np.dtype(dtype).itemsize, 1)
+            shm = SharedMemory(create=True, size=nbytes) if self._owner else SharedMemory(name=names[key])
+            self._shms[key] = shm
+            self.arrays[key] = np.ndarray((num_envs, *shape), dtype=dtype, buffer=shm.buf)
+        self.present = self.arrays.pop(_PRESENCE_KEY)
+        if self._owner:
+            self.present[:] = False
+        self._field_index = {key: i for i, key in enumerate(specs)}
+
+    @staticmethod
+    def specs_from_state(state: TensorState) -> dict[tuple[str, str, str], tuple[tuple[int, ...], str]]:
+        """Get the per-env shape and dtype of every tensor field in a state with leading env dimension."""
+        specs = {}
+        for category in STATE_CATEGORIES:
+            for name, item in getattr(state, category).items():
+                for f in fields(item):
+                    value = getattr(item, f.name)
+                    if isinstance(value, torch.Tensor):
+                        dtype = torch.empty(0, dtype=value.dtype).numpy().dtype.str
+                        specs[(category, name, f.name)] = (tuple(value.shape[1:]), dtype)
+        return specs
+
+    @property
+    def names(self) -> dict[tuple[str, str, str], str]:
+        """Names of the shared-memory blocks, used by workers to attach."""
+        return {key: shm.name for key, shm in self._shms.items()}
+
+    def write(self, state: TensorState, rows: slice, categories: tuple[str, ...] | None = None) -> bool:
+        """Write the ``categories`` of a state into ``rows``. Fields that are None are marked absent in these rows.
+
+        Returns:
+            False if the state has tensor fields missing from the layout. These fields are not written.
+        """
+        if categories is None:
+            categories = STATE_CATEGORIES
+        for key, array in self.arrays.items():
+            category, name, field_name = key
+            if category not in categories:
+                continue
+            item = getattr(state, category).get(name)
+            value = getattr(item, field_name, None) if item is not None else None
+            if value is not None:
+                array[rows] = value.detach().cpu().numpy()
+            self.present[rows, self._field_index[key]] = value is not None
+        return all(key in self.specs for key in self.specs_from_state(state) if key[0] in categories)
+
+    def read(self, template: TensorState, env_ids: list[int] | None = None) -> TensorState:
+        """Build a :class:`TensorState` from the slabs, using ``template`` for non-tensor fields.
+
+        A field is None unless all the rows of ``env_ids`` hold a value. The tensors are copied out of the shared
+        memory, so the returned state is not overwritten by later reads.
+        """
+        rows = slice(None) if env_ids is None else env_ids
+        rst = TensorState(objects={}, robots={}, cameras={}, sensors={})
+        for category in STATE_CATEGORIES:
+            for name, item in getattr(template, category).items():
+                kwargs = {}
+                for f in fields(item):
+                    key = (category, name, f.name)
+                    if key in self.arrays:
+                        present = self.present[rows, self._field_index[key]].all()
+                        kwargs[f.name] = torch.from_numpy(self.arrays[key][rows].copy()) if present else None
+                    elif isinstance(getattr(item, f.name), torch.Tensor):
+                        kwargs[f.name] = None
+                    else:
+                        kwargs[f.name] = getattr(item, f.name)
+                getattr(rst, category)[name] = type(item)(**kwargs)
+        return rst
+
+    def close(self) -> None:
+        """Release the slabs. The owner also unlinks the shared memory."""
+        self.arrays.clear()
+        self.present = None
+        for shm in self._shms.values():
+            shm.close()
+            if self._owner:
+                shm.unlink()
+        self._shms.clear()
+
+
+class _SequentialSimHandler(BaseSimHandler):
+    """Several single-env handlers stepped one after another in one process, exposed as one batched handler.
+
+    Used by :func:`ParallelSimWrapper` workers that own more than one environment when the wrapped handler does not
+    support ``num_envs > 1``.
+    """
+
+    def __init__(self, scenario: ScenarioCfg, handler_class: type[BaseSimHandler]):
+        super().__init__(scenario)
+        sub_scenario = deepcopy(scenario)
+        sub_scenario.num_envs = 1
+        self.handlers = [handler_class(deepcopy(sub_scenario)) for _ in range(self.num_envs)]
+
+    def launch(self) -> None:
+        for handler in self.handlers:
+            handler.launch()
+
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+
+    def step(self, actions: list[Action]) -> tuple[list[Obs], list[Reward], list[Success], list[Extra]]:
+        obs_list, reward_list, done_list, extra_list = [], [], [], []
+        for handler, action in zip(self.handlers, actions):
+            obs, reward, done, extra = handler.step([action])
+            obs_list.append(obs[0])
+            reward_list.append(reward[0])
+            done_list.append(done[0])
+            extra_list.append(extra[0])
+        return obs_list, reward_list, done_list, extra_list
+
+    def reset(self, env_ids: list[int] | None = None) -> tuple[list[Obs], list[Extra]]:
+        if env_ids is None:
+            env_ids = list(range(self.num_envs))
+        obs_list, extra_list = [], []
+        for i in env_ids:
+            obs, extra = self.handlers[i].reset()
+            obs_list.append(obs[0])
+            extra_list.append(extra[0])
+        return obs_list, extra_list
+
+    def _set_states(self, states: list[EnvState], env_ids: list[int] | None = None) -> None:
+        if env_ids is None:
+            env_ids = list(range(self.num_envs))
+        for i in env_ids:
+            self.handlers[i].set_states([states[i]])
+
+    def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+        for i in env_ids:
+            self.handlers[i].set_states(slice_tensor_state(states, [i]))
+
+    def set_dof_targets(self, obj_name: str, actions: list[Action]) -> None:
+        for handler, action in zip(self.handlers, actions):
+            handler.set_dof_targets(obj_name, [action])
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        for i, handler in enumerate(self.handlers):
+            handler.set_dof_targets_tensor(obj_name, targets[i : i + 1], mode=mode)
+
+    def set_pose(self, obj_name: str, pos: torch.Tensor, rot: torch.Tensor, env_ids: list[int] | None = None) -> None:
+        if env_ids is None:
+            env_ids = list(range(self.num_envs))
+        for i in env_ids:
+            self.handlers[i].set_pose(obj_name, [pos[i]], [rot[i]])
+
+    def _get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None) -> TensorState:
+        if env_ids is None:
+            env_ids = list(range(self.num_envs))
+        return join_tensor_states([self.handlers[i].get_states(categories=categories) for i in env_ids])
+
+    def _simulate(self):
+        for handler in self.handlers:
+            handler.simulate()
+
+    def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        return self.handlers[0].get_joint_names(obj_name, sort=sort)
+
+    def get_body_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        return self.handlers[0].get_body_names(obj_name, sort=sort)
+
+    @property
+    def device(self) -> torch.device:
+        return self.handlers[0].device
 
 
 def _worker(
@@ -30,6 +223,8 @@ def _worker(
     handler_class: type[BaseSimHandler],
 ):
     parent_remote.close()
+    shared_states: _SharedStateBuffer | None = None
+    shared_rows = slice(0)
 
     try:
         env: BaseSimHandler = handler_class()
@@ -38,10 +233,10 @@ def _worker(
             if cmd == "launch":
                 env.launch()
             elif cmd == "step":
-                obs, reward, done, extra = env.step(data)
+                obs, reward, done, extra = env.step(data[0])
                 remote.send((obs, reward, done, extra))
             elif cmd == "reset":
-                obs, extra = env.reset()
+                obs, extra = env.reset(env_ids=data[0])
                 remote.send((obs, extra))
             elif cmd == "render":
                 env.render()
@@ -49,23 +244,42 @@ def _worker(
                 remote.close()
                 break
             elif cmd == "set_states":
-                env.set_states(data[0])
+                env.set_states(data[0], env_ids=data[1])
             elif cmd == "set_dof_targets":
                 env.set_dof_targets(data[0], data[1])
+            elif cmd == "set_dof_targets_tensor":
+                env.set_dof_targets_tensor(data[0], data[1], mode=data[2])
             elif cmd == "set_actions":
                 env.set_actions(data[0], data[1])
             elif cmd == "set_pose":
-                env.set_pose(data[0], data[1], data[2])
+                env.set_pose(data[0], data[1], data[2], env_ids=data[3])
             elif cmd == "get_states":
-                states = env.get_states()
+                states = env.get_states(categories=data[0])
                 remote.send(states)
+            elif cmd == "attach_shm":
+                if shared_states is not None:
+                    shared_states.close()
+                shared_states = _SharedStateBuffer(data[0], data[1], names=data[2])
+                shared_rows = slice(data[3], data[3] + env.num_envs)
+                remote.send("attached")
+            elif cmd == "get_states_shm":
+                ## The full states are only sent when they do not fit the layout, so the parent can extend it
+                states = env.get_states(categories=data[0])
+                remote.send(None if shared_states.write(states, shared_rows, categories=data[0]) else states)
             elif cmd == "simulate":
                 env.simulate()
+            elif cmd == "simulate_and_get_states":
+                env.simulate()
+                remote.send(env.get_states())
+            elif cmd == "simulate_and_get_states_shm":
+                env.simulate()
+                states = env.get_states()
+                remote.send(None if shared_states.write(states, shared_rows) else states)
             elif cmd == "get_reward":
                 reward = env.get_reward()
                 remote.send(reward)
             elif cmd == "get_joint_names":
-                names = env.get_joint_names(data[0])
+                names = env.get_joint_names(data[0], sort=data[1])
                 remote.send(names)
             elif cmd == "get_body_names":
                 names = env.get_body_names(data[0])
@@ -87,27 +301,62 @@ def _worker(
         error_queue.put((type(err).__name__, str(err), tb_str))
         sys.exit(1)
     finally:
+        if shared_states is not None:
+            shared_states.close()
         env.close()
+        ## Workers exit through os._exit, which skips the atexit hook of the profiler
+        profiler.dump()
+
+
+def ParallelSimWrapper(base_cls: type[BaseSimHandler], batched: bool = False) -> type[BaseSimHandler]:
+    """A parallel simulation handler that uses multiprocessing to run multiple simulations in parallel.
 
+    Each worker process owns a contiguous slice of ``scenario.envs_per_worker`` environments. If ``batched`` is True,
+    the worker runs one ``base_cls`` handler over its whole slice, which suits backends that batch environments
+    natively. Otherwise the worker steps one single-env ``base_cls`` handler per environment, one after another.
+    Batched backends only get workers when ``1 < scenario.envs_per_worker < scenario.num_envs``; otherwise a single
+    ``base_cls`` handler runs all the environments in the calling process.
 
-def ParallelSimWrapper(base_cls: type[BaseSimHandler]) -> type[BaseSimHandler]:
-    """A parallel simulation handler that uses multiprocessing to run multiple simulations in parallel."""
+    States are returned from the workers according to ``scenario.parallel_transport``. With ``"pipe"``, each worker
+    pickles its state through a pipe and the parent concatenates them. With ``"shm"``, each worker writes its state
+    into preallocated shared-memory slabs of shape ``(num_envs, ...)`` and the pipe only carries control messages. Fields
+    that are None when the slabs are allocated get their slabs once they have a value.
+
+    Besides the blocking :meth:`simulate` / :meth:`get_states` pair, the handler supports pipelined stepping through
+    :meth:`step_async`, :meth:`step_wait` and :meth:`poll`, so the caller can do work while the workers simulate.
+
+    Args:
+        base_cls: The handler class to run in the workers.
+        batched: Whether ``base_cls`` supports ``num_envs > 1``.
+    """
 
     class ParallelHandler(BaseSimHandler):
         def __new__(cls, scenario: ScenarioCfg):
-            """If num_envs is one, simply use the original single-thread class."""
-            if scenario.num_envs == 1:
+            """If num_envs is one, or a batched backend is not split across workers, use the original class."""
+            if scenario.num_envs == 1 or (batched and not 1 < scenario.envs_per_worker < scenario.num_envs):
                 return base_cls(scenario)
             else:
                 return super().__new__(cls)
 
         def __init__(self, scenario: ScenarioCfg):
-            sub_scenario = deepcopy(scenario)
-            sub_scenario.num_envs = 1
             super().__init__(scenario)
 
             self.waiting = False
             self.closed = False
+            self.transport = scenario.parallel_transport
+            self._shared_states: _SharedStateBuffer | None = None
+            self._state_template: TensorState | None = None
+            self._pending_workers: set[int] = set()
+            self._async_states: dict[int, TensorState] = {}
+
+            envs_per_worker = max(1, scenario.envs_per_worker)
+            self.worker_env_ids = [
+                list(range(start, min(start + envs_per_worker, self.num_envs)))
+                for start in range(0, self.num_envs, envs_per_worker)
+            ]
+            """The environment ids owned by each worker."""
+            self.num_workers = len(self.worker_env_ids)
+            self._env_to_worker = [w for w, ids in enumerate(self.worker_env_ids) for _ in ids]
 
             # Fork is not a thread safe method
             # but is more user friendly (does not require to wrap the code in
@@ -118,12 +367,18 @@ def ParallelSimWrapper(base_cls: type[BaseSimHandler]) -> type[BaseSimHandler]:
             self.error_queue = ctx.Queue()
 
             # Initialize workers
-            self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_envs)])
+            self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_workers)])
             self.processes = []
-            for rank in range(self.num_envs):
+            for rank in range(self.num_workers):
+                sub_scenario = deepcopy(scenario)
+                sub_scenario.num_envs = len(self.worker_env_ids[rank])
+                if sub_scenario.num_envs == 1 or batched:
+                    handler_class = partial(base_cls, sub_scenario)
+                else:
+                    handler_class = partial(_SequentialSimHandler, sub_scenario, base_cls)
                 work_remote = self.work_remotes[rank]
                 remote = self.remotes[rank]
-                args = (rank, work_remote, remote, self.error_queue, partial(base_cls, sub_scenario))
+                args = (rank, work_remote, remote, self.error_queue, handler_class)
                 # daemon=True: if the main process crashes, we should not cause things to hang
                 process = ctx.Process(target=_worker, args=args, daemon=True)  # pytype:disable=attribute-error
                 process.start()
@@ -143,59 +398,92 @@ def ParallelSimWrapper(base_cls: type[BaseSimHandler]) -> type[BaseSimHandler]:
                     log.error(f"Worker error: {error}")
                     raise RuntimeError(f"Worker error: {error}")
 
+        def _check_not_waiting(self):
+            if self.waiting:
+                raise RuntimeError("A step started by step_async() is still pending, call step_wait() first")
+
+        def _group_env_ids(self, env_ids: list[int]) -> dict[int, list[int]]:
+            """Group global env ids by worker, returning worker rank -> local env ids in that worker."""
+            groups: dict[int, list[int]] = {}
+            for env_id in env_ids:
+                rank = self._env_to_worker[env_id]
+                groups.setdefault(rank, []).append(env_id - self.worker_env_ids[rank][0])
+            return groups
+
+        def _local(self, rank: int, items: list) -> list:
+            """Slice a per-env list down to the environments owned by a worker."""
+            return [items[env_id] for env_id in self.worker_env_ids[rank]]
+
         def launch(self):
             for remote in self.remotes:
                 remote.send(("launch", (None,)))
             self.waiting = False
 
         def step(self, actions: list[Action]) -> tuple[list[Obs], list[Reward], list[Success], list[Extra]]:
-            for remote, action in zip(self.remotes, actions):
-                remote.send(("step", ([action],)))
+            self._check_not_waiting()
+            for rank, remote in enumerate(self.remotes):
+                remote.send(("step", (self._local(rank, actions),)))
             obs_list, reward_list, done_list, extra_list = [], [], [], []
             for remote in self.remotes:
                 obs, reward, done, extra = remote.recv()
-                obs_list.append(obs[0])
-                reward_list.append(reward[0])
-                done_list.append(done[0])
-                extra_list.append(extra[0])
+                obs_list.extend(obs)
+                reward_list.extend(reward)
+                done_list.extend(done)
+                extra_list.extend(extra)
             return obs_list, reward_list, done_list, extra_list
 
         def reset(self, env_ids: list[int] | None = None) -> tuple[list[Obs], list[Extra]]:
             if env_ids is None:
                 env_ids = list(range(self.num_envs))
 
-            for i in env_ids:
-                self.remotes[i].send(("reset", (None,)))
+            self._check_not_waiting()
+            groups = self._group_env_ids(env_ids)
+            for rank, local_ids in groups.items():
+                self.remotes[rank].send(("reset", (local_ids,)))
 
             obs_list, extra_list = [], []
-            for i in env_ids:
-                obs, extra = self.remotes[i].recv()
-                obs_list.append(obs[0])
-                extra_list.append(extra[0])
+            for rank in groups:
+                obs, extra = self.remotes[rank].recv()
+                obs_list.extend(obs)
+                extra_list.extend(extra)
             return obs_list, extra_list
 
         def close(self):
             if self.closed:
                 return
+            if self.waiting:
+                self.step_wait()
             for remote in self.remotes:
                 remote.send(("close", (None,)))
             for process in self.processes:
                 process.join()
+            if self._shared_states is not None:
+                self._shared_states.close()
+                self._shared_states = None
             self.closed = True
 
         def _set_states(self, states: list[EnvState], env_ids: list[int] | None = None) -> None:
             if env_ids is None:
                 env_ids = list(range(self.num_envs))
 
-            for i in env_ids:
-                self.remotes[i].send(("set_states", ([states[i]],)))
+            for rank, local_ids in self._group_env_ids(env_ids).items():
+                self.remotes[rank].send(("set_states", (self._local(rank, states), local_ids)))
 
-        def set_dof_targets(self, obj_name: str, targets: list[EnvState], env_ids: list[int] | None = None) -> None:
-            if env_ids is None:
-                env_ids = list(range(self.num_envs))
+        def _set_states_tensor(self, states: TensorState, env_ids: list[int]) -> None:
+            for rank, local_ids in self._group_env_ids(env_ids).items():
+                local_states = slice_tensor_state(states, self.worker_env_ids[rank])
+                self.remotes[rank].send(("set_states", (local_states, local_ids)))
+
+        def set_dof_targets(self, obj_name: str, targets: list[Action]) -> None:
+            for rank, remote in enumerate(self.remotes):
+                remote.send(("set_dof_targets", (obj_name, self._local(rank, targets))))
 
-            for i in env_ids:
-                self.remotes[i].send(("set_dof_targets", (obj_name, [targets[i]])))
+        def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+            targets = targets.detach().cpu()
+            with span("ipc.send"):
+                for rank, remote in enumerate(self.remotes):
+                    env_ids = self.worker_env_ids[rank]
+                    remote.send(("set_dof_targets_tensor", (obj_name, targets[env_ids[0] : env_ids[-1] + 1], mode)))
 
         def set_pose(
             self,
@@ -207,48 +495,210 @@ def ParallelSimWrapper(base_cls: type[BaseSimHandler]) -> type[BaseSimHandler]:
             if env_ids is None:
                 env_ids = list(range(self.num_envs))
 
-            for i in env_ids:
-                self.remotes[i].send(("set_pose", (obj_name, [pos[i]], [rot[i]])))
+            for rank, local_ids in self._group_env_ids(env_ids).items():
+                self.remotes[rank].send((
+                    "set_pose",
+                    (obj_name, self._local(rank, pos), self._local(rank, rot), local_ids),
+                ))
+
+        def _init_shared_states(self) -> None:
+            """Allocate the shared-memory slabs using the layout of the first worker's state."""
+            self.remotes[0].send(("get_states", (None,)))
+            self._state_template = self.remotes[0].recv()
+            self._attach_shared_states(_SharedStateBuffer.specs_from_state(self._state_template))
+
+        def _attach_shared_states(self, specs: dict[tuple[str, str, str], tuple[tuple[int, ...], str]]) -> None:
+            """Allocate the slabs of ``specs``, replacing the current ones, and attach all the workers to them."""
+            if self._shared_states is not None:
+                self._shared_states.close()
+            self._shared_states = _SharedStateBuffer(specs, self.num_envs)
+            for rank, remote in enumerate(self.remotes):
+                remote.send((
+                    "attach_shm",
+                    (specs, self.num_envs, self._shared_states.names, self.worker_env_ids[rank][0]),
+                ))
+            for remote in self.remotes:
+                remote.recv()
 
-        def _get_states(self, env_ids: list[int] | None = None) -> list[EnvState]:
+        def _extend_shared_states(self, worker_states: dict[int, TensorState | None]) -> None:
+            """Extend the slabs with the fields of the states that the workers sent because they did not fit.
+
+            Fields that are None when the layout is built, e.g. joint targets before the first action, get their slabs
+            here. All the workers then rewrite their current states into the new slabs. Only call this when no worker
+            is stepping.
+            """
+            while any(states is not None for states in worker_states.values()):
+                specs = dict(self._shared_states.specs)
+                for states in worker_states.values():
+                    if states is None:
+                        continue
+                    specs.update(_SharedStateBuffer.specs_from_state(states))
+                    for category in STATE_CATEGORIES:
+                        for name, item in getattr(states, category).items():
+                            getattr(self._state_template, category).setdefault(name, item)
+                self._attach_shared_states(specs)
+                for remote in self.remotes:
+                    remote.send(("get_states_shm", (None,)))
+                worker_states = {rank: remote.recv() for rank, remote in enumerate(self.remotes)}
+
+        def _read_states(self, env_ids: list[int], worker_states: dict[int, TensorState | None]) -> TensorState:
+            """Assemble the states of ``env_ids`` from the shared memory or from the per-worker states.
+
+            With ``"shm"``, the workers whose states did not fit the layout sent them through the pipe instead.
+            """
+            if self.transport == "shm":
+                if all(states is None for states in worker_states.values()):
+                    return self._shared_states.read(
+                        self._state_template, env_ids=None if len(env_ids) == self.num_envs else env_ids
+                    )
+                worker_states = {
+                    rank: self._shared_states.read(self._state_template, env_ids=self.worker_env_ids[rank])
+                    if states is None
+                    else states
+                    for rank, states in worker_states.items()
+                }
+
+            ranks = sorted(worker_states.keys())
+            states = join_tensor_states([worker_states[rank] for rank in ranks])
+            fetched_env_ids = [env_id for rank in ranks for env_id in self.worker_env_ids[rank]]
+            if fetched_env_ids == env_ids:
+                return states
+            return slice_tensor_state(states, [fetched_env_ids.index(env_id) for env_id in env_ids])
+
+        def _get_states(
+            self, env_ids: list[int] | None = None, categories: tuple[str, ...] | None = None
+        ) -> TensorState:
             if env_ids is None:
                 env_ids = list(range(self.num_envs))
 
-            for i in env_ids:
-                self.remotes[i].send(("get_states", (None,)))
-
-            states_list = []
-            for i in env_ids:
-                states = self.remotes[i].recv()
-                states_list.append(states)
-            tic = time.time()
-            concat_states = join_tensor_states(states_list)
-            toc = time.time()
-            log.trace(f"Time taken to concatenate states: {toc - tic:.4f}s")
-            return concat_states
+            self._check_not_waiting()
+            if self.transport == "shm":
+                if self._shared_states is None:
+                    self._init_shared_states()
+                cmd = "get_states_shm"
+            else:
+                cmd = "get_states"
+
+            ranks = sorted(self._group_env_ids(env_ids).keys())
+            worker_states = {}
+            with span("ipc.get_states"):
+                for rank in ranks:
+                    self.remotes[rank].send((cmd, (categories,)))
+                for rank in ranks:
+                    worker_states[rank] = self.remotes[rank].recv()
+            if self.transport == "shm" and any(states is not None for states in worker_states.values()):
+                self._extend_shared_states(worker_states)
+                worker_states = dict.fromkeys(ranks)
+            with span("ipc.gather_states"):
+                return self._read_states(env_ids, worker_states)
 
         def _simulate(self):
             for remote in self.remotes:
                 remote.send(("simulate", (None,)))
 
+        ############################################################
+        ## Pipelined stepping
+        ############################################################
+        def step_async(self, actions: list[Action] | torch.Tensor) -> None:
+            """Send the actions to all workers and start simulating, without waiting for the results.
+
+            Collect the results with :meth:`step_wait` or :meth:`poll`.
+
+            Args:
+                actions: The actions of all environments, as action dicts or as a tensor of joint position targets
+                    (see :meth:`set_robots_dof_targets`).
+            """
+            self._check_not_waiting()
+            if self.transport == "shm" and self._shared_states is None:
+                self._init_shared_states()
+
+            self.set_robots_dof_targets(actions)
+            self._invalidate_state_cache()
+            cmd = "simulate_and_get_states_shm" if self.transport == "shm" else "simulate_and_get_states"
+            for remote in self.remotes:
+                remote.send((cmd, (None,)))
+            self._pending_workers = set(range(self.num_workers))
+            self._async_states = {}
+            self.waiting = True
+
+        def _recv_pending(self, ranks: list[int]) -> None:
+            with span("ipc.recv"):
+                for rank in ranks:
+                    self._async_states[rank] = self.remotes[rank].recv()
+                    self._pending_workers.discard(rank)
+
+        def step_wait(self) -> TensorState:
+            """Wait for all workers to finish the step started by :meth:`step_async`.
+
+            The returned states are also cached, so a following :meth:`get_states` does not query the workers again.
+
+            Returns:
+                The states of all environments after the step.
+            """
+            if not self.waiting:
+                raise RuntimeError("step_wait() called without a pending step_async()")
+            self._recv_pending(sorted(self._pending_workers))
+            self.waiting = False
+            if self.transport == "shm" and any(states is not None for states in self._async_states.values()):
+                self._extend_shared_states(self._async_states)
+                self._async_states = dict.fromkeys(self._async_states)
+
+            with span("ipc.gather_states"):
+                states = self._read_states(list(range(self.num_envs)), self._async_states)
+            self._async_states = {}
+            self._update_state_cache(states)
+            return states
+
+        def poll(self, timeout: float | None = 0.0) -> tuple[list[int], TensorState | None]:
+            """Collect the results of the workers that have finished the step started by :meth:`step_async`.
+
+            Environments returned by a poll are not returned again by later polls. :meth:`step_wait` still returns all
+            environments.
+
+            Args:
+                timeout: Maximum time in seconds to wait for at least one worker. ``0.0`` returns immediately,
+                    ``None`` blocks until at least one worker is ready.
+
+            Returns:
+                The ids of the newly finished environments, in ascending order, and their states. The states are
+                None if no environment finished within the timeout.
+            """
+            if not self.waiting:
+                raise RuntimeError("poll() called without a pending step_async()")
+            remote_to_rank = {self.remotes[rank]: rank for rank in self._pending_workers}
+            ready = wait(list(remote_to_rank.keys()), timeout=timeout)
+            ranks = sorted(remote_to_rank[remote] for remote in ready)
+            if not ranks:
+                return [], None
+
+            self._recv_pending(ranks)
+            env_ids = [env_id for rank in ranks for env_id in self.worker_env_ids[rank]]
+            return env_ids, self._read_states(env_ids, {rank: self._async_states[rank] for rank in ranks})
+
         def refresh_render(self):
             log.error("Rendering not supported in parallel mode")
 
         def get_reward(self):
             log.error("get_reward not supported in parallel mode")
 
-        def get_joint_names(self, obj_name: str) -> list[str]:
-            self.remotes[0].send(("get_joint_names", (obj_name,)))
-            names = self.remotes[0].recv()
-            return names
+        def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+            if not hasattr(self, "_joint_names_cache"):
+                self._joint_names_cache = {}
+            if (obj_name, sort) not in self._joint_names_cache:
+                self._check_not_waiting()
+                self.remotes[0].send(("get_joint_names", (obj_name, sort)))
+                self._joint_names_cache[(obj_name, sort)] = self.remotes[0].recv()
+            return list(self._joint_names_cache[(obj_name, sort)])
 
         def get_body_names(self, obj_name: str) -> list[str]:
+            self._check_not_waiting()
             self.remotes[0].send(("get_body_names", (obj_name,)))
             names = self.remotes[0].recv()
             return names
 
         @property
         def device(self) -> torch.device:
+            self._check_not_waiting()
             self.remotes[0].send(("device", (None,)))
             return self.remotes[0].recv()
 
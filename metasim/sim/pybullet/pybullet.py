@@ -251,6 +251,24 @@ class SinglePybulletHandler(BaseSimHandler):
         ])
         self._apply_action(action_arr, self.object_ids[obj_name])
 
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        self._actions_cache = targets
+        # sorted joint order -> pybullet joint order
+        values = targets[0].detach().cpu()[self._get_native_dof_index(obj_name, "cpu")].tolist()
+        joint_indices = range(len(values))
+        if mode == "effort":
+            p.setJointMotorControlArray(
+                self.object_ids[obj_name], joint_indices, controlMode=p.TORQUE_CONTROL, forces=values
+            )
+        elif mode == "vel":
+            p.setJointMotorControlArray(
+                self.object_ids[obj_name], joint_indices, controlMode=p.VELOCITY_CONTROL, targetVelocities=values
+            )
+        else:
+            p.setJointMotorControlArray(
+                self.object_ids[obj_name], joint_indices, controlMode=p.POSITION_CONTROL, targetPositions=values
+            )
+
     def _simulate(self):
         """Step the simulation."""
         # # Rewrite this function for multi-env version
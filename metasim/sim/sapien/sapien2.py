@@ -331,6 +331,23 @@ class Sapien2Handler(BaseSimHandler):
             self._previous_dof_vel_target[obj_name] = vel_target
             self._apply_action(instance, pos_target, vel_target)
 
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        instance = self.object_ids[obj_name]
+        if not isinstance(instance, sapien_core.Articulation):
+            return
+        # sorted joint order -> active joint order
+        values = targets[0].detach().cpu()[self._get_native_dof_index(obj_name, "cpu")].to(torch.float32).numpy()
+        if mode == "effort":
+            self._previous_dof_torque_target[obj_name] = values
+            qf = instance.compute_passive_force(gravity=True, coriolis_and_centrifugal=True, external=False)
+            instance.set_qf(qf + values)
+        elif mode == "vel":
+            self._previous_dof_vel_target[obj_name] = values
+            self._apply_action(instance, vel_action=values)
+        else:
+            self._previous_dof_pos_target[obj_name] = values
+            self._apply_action(instance, pos_action=values)
+
     def _simulate(self):
         for i in range(self.scenario.decimation):
             self.scene.step()
@@ -356,6 +356,27 @@ class Sapien3Handler(BaseSimHandler):
             self._previous_dof_vel_target[obj_name] = vel_target_arr
             self._apply_action(instance, pos_target, vel_target)
 
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        instance = self.object_ids[obj_name]
+        if not isinstance(instance, sapien_core.physx.PhysxArticulation):
+            return
+        # sorted joint order -> active joint order
+        values = targets[0].detach().cpu()[self._get_native_dof_index(obj_name, "cpu")].to(torch.float32).numpy()
+        qf = instance.compute_passive_force(gravity=True, coriolis_and_centrifugal=True, external=False)
+        if mode == "effort":
+            self._previous_dof_torque_target[obj_name] = values
+            instance.set_qf(qf + values)
+            return
+        instance.set_qf(qf)
+        if mode == "vel":
+            self._previous_dof_vel_target[obj_name] = values
+            for joint, value in zip(instance.get_active_joints(), values.tolist()):
+                joint.set_drive_velocity_target(value)
+        else:
+            self._previous_dof_pos_target[obj_name] = values
+            for joint, value in zip(instance.get_active_joints(), values.tolist()):
+                joint.set_drive_target(value)
+
     def _simulate(self):
         for i in range(self.scenario.decimation):
             self.scene.step()
@@ -0,0 +1,118 @@
+"""Unit tests for the shared-memory state transport of the parallel handler."""
+
+from __future__ import annotations
+
+import torch
+
+from metasim.cfg.scenario import ScenarioCfg
+from metasim.sim.base import BaseSimHandler
+from metasim.sim.parallel import ParallelSimWrapper, _SharedStateBuffer
+from metasim.utils.state import RobotState, TensorState
+
+NUM_ENVS = 4
+NUM_DOF = 2
+
+
+def _robot_state(joint_pos: torch.Tensor, joint_pos_target: torch.Tensor | None) -> TensorState:
+    num_envs = joint_pos.shape[0]
+    robot = RobotState(
+        root_state=torch.zeros(num_envs, 13),
+        body_names=[],
+        body_state=torch.zeros(num_envs, 0, 13),
+        joint_pos=joint_pos,
+        joint_vel=torch.zeros(num_envs, NUM_DOF),
+        joint_pos_target=joint_pos_target,
+        joint_vel_target=None,
+        joint_effort_target=None,
+    )
+    return TensorState(objects={}, robots={"franka": robot}, cameras={}, sensors={})
+
+
+class _LateTargetHandler(BaseSimHandler):
+    """Handler whose joint position targets are None until the first targets are set, as in SAPIEN."""
+
+    def __init__(self, scenario: ScenarioCfg):
+        super().__init__(scenario)
+        self.joint_pos = torch.zeros(self.num_envs, NUM_DOF)
+        self.targets: torch.Tensor | None = None
+
+    def close(self) -> None:
+        pass
+
+    def _get_states(self, env_ids: list[int] | None = None) -> TensorState:
+        return _robot_state(self.joint_pos.clone(), None if self.targets is None else self.targets.clone())
+
+    def _set_dof_targets_tensor(self, obj_name: str, targets: torch.Tensor, mode: str) -> None:
+        self.targets = targets.clone()
+
+    def _simulate(self):
+        self.joint_pos += 1 if self.targets is None else self.targets
+
+    def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        return [f"joint{i}" for i in range(NUM_DOF)]
+
+    @property
+    def device(self) -> torch.device:
+        return torch.device("cpu")
+
+
+def _run(transport: str) -> list[TensorState]:
+    """Step a parallel handler whose targets appear after the first read, returning the states of every read."""
+    scenario = ScenarioCfg(num_envs=NUM_ENVS, envs_per_worker=2, parallel_transport=transport, headless=True)
+    handler = ParallelSimWrapper(_LateTargetHandler, batched=True)(scenario)
+    handler.launch()
+    targets = torch.arange(NUM_ENVS * NUM_DOF, dtype=torch.float32).reshape(NUM_ENVS, NUM_DOF)
+    try:
+        states = [handler.get_states()]
+        handler.simulate()
+        states.append(handler.get_states())
+        handler.set_dof_targets_tensor("franka", targets)
+        handler.simulate()
+        states.append(handler.get_states())
+        handler.step_async([{}] * NUM_ENVS)
+        states.append(handler.step_wait())
+    finally:
+        handler.close()
+    return states
+
+
+class TestParallelShm:
+    """Test suite for the shared-memory transport."""
+
+    def test_shm_matches_pipe_when_a_field_appears_late(self):
+        """Fields that are None when the shared layout is built are returned once they get a value."""
+        pipe_states, shm_states = _run("pipe"), _run("shm")
+        for pipe, shm in zip(pipe_states, shm_states):
+            pipe_robot, shm_robot = pipe.robots["franka"], shm.robots["franka"]
+            assert torch.equal(pipe_robot.joint_pos, shm_robot.joint_pos)
+            if pipe_robot.joint_pos_target is None:
+                assert shm_robot.joint_pos_target is None
+            else:
+                assert torch.equal(pipe_robot.joint_pos_target, shm_robot.joint_pos_target)
+        assert shm_states[0].robots["franka"].joint_pos_target is None
+        assert shm_states[-1].robots["franka"].joint_pos_target is not None
+
+    def test_none_clears_rows(self):
+        """Writing None marks the rows absent instead of leaving the previous values."""
+        template = _robot_state(torch.zeros(NUM_ENVS, NUM_DOF), torch.ones(NUM_ENVS, NUM_DOF))
+        buffer = _SharedStateBuffer(_SharedStateBuffer.specs_from_state(template), NUM_ENVS)
+        try:
+            assert buffer.write(template, slice(0, NUM_ENVS))
+            assert buffer.read(template).robots["franka"].joint_pos_target is not None
+            buffer.write(_robot_state(torch.zeros(2, NUM_DOF), None), slice(0, 2))
+            assert buffer.read(template).robots["franka"].joint_pos_target is None
+            assert buffer.read(template, env_ids=[2, 3]).robots["franka"].joint_pos_target is not None
+        finally:
+            buffer.close()
+
+    def test_write_reports_fields_missing_from_layout(self):
+        """Writing a state with fields outside the layout returns False."""
+        template = _robot_state(torch.zeros(NUM_ENVS, NUM_DOF), None)
+        buffer = _SharedStateBuffer(_SharedStateBuffer.specs_from_state(template), NUM_ENVS)
+        try:
+            assert buffer.write(template, slice(0, NUM_ENVS))
+            assert not buffer.write(
+                _robot_state(torch.zeros(NUM_ENVS, NUM_DOF), torch.ones(NUM_ENVS, NUM_DOF)), slice(0, NUM_ENVS)
+            )
+        finally:
+            buffer.close()
@@ -0,0 +1,133 @@
+"""Unit tests for the per-category, per-env state cache of the base handler."""
+
+from __future__ import annotations
+
+import pytest
+import torch
+
+from metasim.sim.base import BaseSimHandler
+from metasim.utils.state import STATE_CATEGORIES, ObjectState, TensorState, slice_tensor_state
+
+NUM_ENVS = 4
+
+
+class _CountingHandler(BaseSimHandler):
+    """Handler whose simulator is a root state tensor per object, recording every fetch."""
+
+    def __init__(self, takes_categories: bool = True):
+        self._num_envs = NUM_ENVS
+        self._state_cache = None
+        self._state_cache_valid = {}
+        self.sim = {"cube": torch.zeros(NUM_ENVS, 13), "franka": torch.zeros(NUM_ENVS, 13)}
+        self.fetches: list[tuple[list[int] | None, tuple[str, ...]]] = []
+        if not takes_categories:
+            self._get_states = self._get_all_states
+
+    def _get_states(self, env_ids: list[int] | None = None, categories: tuple[str, ...] = STATE_CATEGORIES):
+        self.fetches.append((env_ids, tuple(categories)))
+        states = TensorState(objects={}, robots={}, cameras={}, sensors={})
+        if "objects" in categories:
+            states.objects = {"cube": ObjectState(root_state=self.sim["cube"].clone())}
+        if "robots" in categories:
+            states.robots = {"franka": ObjectState(root_state=self.sim["franka"].clone())}
+        return states if env_ids is None else slice_tensor_state(states, env_ids)
+
+    def _get_all_states(self, env_ids: list[int] | None = None):
+        return _CountingHandler._get_states(self, env_ids)
+
+    def _set_states(self, states, env_ids=None):
+        for env_id in range(NUM_ENVS) if env_ids is None else env_ids:
+            for category in ("objects", "robots"):
+                for name, value in states[env_id][category].items():
+                    self.sim[name][env_id, :3] = torch.as_tensor(value["pos"])
+
+    def _simulate(self):
+        for value in self.sim.values():
+            value[:, 0] += 1
+
+    def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        return []
+
+    @property
+    def device(self) -> torch.device:
+        return torch.device("cpu")
+
+
+def _nested(pos: list[float]) -> dict:
+    return {"objects": {"cube": {"pos": pos}}, "robots": {"franka": {"pos": pos}}}
+
+
+class TestStateCache:
+    """Test suite for the state cache."""
+
+    @pytest.fixture
+    def handler(self):
+        """Create a handler whose fetches take categories."""
+        return _CountingHandler()
+
+    def test_repeated_reads_fetch_once(self, handler):
+        """Reading the states twice without stepping fetches them once."""
+        handler.get_states()
+        handler.get_states()
+        handler.get_pos("cube")
+        assert len(handler.fetches) == 1
+
+    def test_simulate_invalidates(self, handler):
+        """Stepping invalidates every category of every env."""
+        handler.get_states()
+        handler.simulate()
+        states = handler.get_states()
+        assert len(handler.fetches) == 2
+        assert handler.fetches[-1][0] is None
+        assert (states.objects["cube"].root_state[:, 0] == 1).all()
+
+    def test_categories_are_fetched_separately(self, handler):
+        """A category is only fetched when it is requested and not cached."""
+        handler.get_states(categories=("objects",))
+        assert handler.fetches[-1][1] == ("objects",)
+        handler.get_states(categories=("objects", "robots"))
+        assert handler.fetches[-1][1] == ("robots",)
+        handler.get_states(categories=("objects", "robots"))
+        assert len(handler.fetches) == 2
+
+    def test_set_states_invalidates_only_env_ids(self, handler):
+        """Setting the states of some envs only refetches those envs, and merges them into the cache."""
+        handler.get_states()
+        handler.set_states([_nested([2.0, 3.0, 4.0])] * NUM_ENVS, env_ids=[1, 3])
+        states = handler.get_states()
+        assert handler.fetches[-1][0] == [1, 3]
+        root_state = states.objects["cube"].root_state
+        torch.testing.assert_close(root_state[[1, 3], :3], torch.tensor([[2.0, 3.0, 4.0]] * 2))
+        assert not root_state[[0, 2], :3].any()
+
+    def test_partial_read_keeps_other_envs_stale(self, handler):
+        """Reading some envs after a step leaves the other envs invalid until they are read."""
+        handler.get_states()
+        handler.simulate()
+        handler.get_states(env_ids=[0])
+        assert handler.fetches[-1][0] == [0]
+        states = handler.get_states()
+        assert handler.fetches[-1][0] == [1, 2, 3]
+        assert (states.robots["franka"].root_state[:, 0] == 1).all()
+
+    def test_tensor_set_states_invalidates(self, handler):
+        """Setting a tensor state invalidates the cache like nested states do."""
+        states = handler.get_states()
+        states.objects["cube"].root_state[:, :3] = 5.0
+        handler.set_states(states)
+        assert (handler.get_pos("cube") == 5.0).all()
+        assert len(handler.fetches) == 2
+
+    def test_empty_tensor_set_states_keeps_cache(self, handler):
+        """A tensor state without objects or robots writes nothing and keeps the cache valid."""
+        handler.get_states()
+        handler.set_states(TensorState(objects={}, robots={}, cameras={}, sensors={}))
+        handler.get_states()
+        assert len(handler.fetches) == 1
+
+    def test_fetch_without_categories(self):
+        """Backends whose fetch takes no categories cache every category at once."""
+        handler = _CountingHandler(takes_categories=False)
+        handler.get_states(categories=("objects",))
+        handler.get_states(categories=("robots",))
+        assert len(handler.fetches) == 1
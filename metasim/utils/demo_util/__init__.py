@@ -2,5 +2,6 @@
 
 # ruff: noqa: F401
 
-from .demo_util import get_traj
+from .columnar import ColumnarTraj, convert_traj_file_to_columnar, save_traj_columnar
+from .demo_util import convert_traj_to_columnar, get_traj
 from .loader import load_traj_file, save_traj_file
@@ -0,0 +1,410 @@
+"""Sub-module containing the columnar trajectory format.
+
+A columnar trajectory is a directory ending with ``.traj``, holding one sub-directory per robot. Each robot
+directory stores the v2 trajectory of that robot as one ``.npy`` column per leaf (e.g. ``franka/dof_pos`` of the
+states), with the steps of all demos concatenated and an offsets array marking where each demo starts. Columns are
+memory-mapped, and a demo is only decoded back to the nested v2 format when it is accessed.
+
+Convert an existing v2 trajectory file (the columnar copy is written next to it and picked up by
+:func:`~metasim.utils.demo_util.get_traj` automatically)::
+
+    python -m metasim.utils.demo_util.columnar roboverse_data/trajs/.../trajectory-franka-A10_0_v2.pkl
+
+v1 trajectories need a handler to be decoded, use :func:`~metasim.utils.demo_util.convert_traj_to_columnar` for them.
+Demos already loaded in the v3 format can be written with :func:`save_traj_columnar`.
+
+The size and mtime of the source file are recorded in the columnar copy. If the source file changed since, the
+columnar copy is stale and the source file is loaded instead.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import pickle
+from collections.abc import Sequence
+from typing import Any, Callable
+
+import numpy as np
+import torch
+from loguru import logger as log
+
+from .loader import load_traj_file
+
+COLUMNAR_SUFFIX = ".traj"
+_TRAJ_FILE_SUFFIXES = (".pkl.gz", ".pkl", ".json", ".yaml", ".yml")
+_FORMAT_VERSION = 1
+
+
+class LazyDemos(Sequence):
+    """Read-only list of demos that decodes each demo on access.
+
+    Recently accessed demos are kept, so indexing a demo once per step does not decode it again. Like a list, the
+    same demo object is returned on every access while it is cached. Slicing returns another :class:`LazyDemos`
+    sharing the cache, so splitting a dataset does not decode it.
+    """
+
+    def __init__(self, get_demo: Callable[[int], Any], indices: range | list[int], cache_size: int = 256):
+        if not hasattr(get_demo, "cache_info"):
+            get_demo = functools.lru_cache(maxsize=cache_size)(get_demo)
+        self._get_demo = get_demo
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return LazyDemos(self._get_demo, self._indices[idx])
+        return self._get_demo(self._indices[idx])
+
+    def map(self, fn: Callable[[Any], Any]) -> LazyDemos:
+        """Lazily apply ``fn`` to every demo."""
+        get_demo = self._get_demo
+        return LazyDemos(lambda i: fn(get_demo(i)), self._indices)
+
+
+############################################################
+## Write
+############################################################
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _collect_leaves(tree: dict, prefix: tuple[str, ...], leaves: dict[tuple[str, ...], Any]) -> None:
+    """Collect the leaves of a nested state or action. A dict of numbers (e.g. ``dof_pos``) is a single leaf."""
+    for key, value in tree.items():
+        path = (*prefix, key)
+        if isinstance(value, dict):
+            if value and all(_is_number(v) for v in value.values()):
+                leaves[path] = value
+            else:
+                _collect_leaves(value, path, leaves)
+        elif _is_number(value) or isinstance(value, (list, tuple, np.ndarray, torch.Tensor)):
+            leaves[path] = value
+        elif value is None:
+            continue
+        else:
+            raise ValueError(f"Unsupported value of type {type(value).__name__} at {'/'.join(path)}")
+
+
+def _to_array(value) -> np.ndarray:
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+def _write_section(robot_dir: str, section: str, records: list[dict], offsets: list[int] | None) -> dict:
+    """Write the records of a section as columns and return the section metadata."""
+    leaves_per_record = []
+    columns: dict[tuple[str, ...], dict] = {}
+    for record in records:
+        leaves = {}
+        _collect_leaves(record, (), leaves)
+        leaves_per_record.append(leaves)
+        for path, value in leaves.items():
+            if path not in columns:
+                if isinstance(value, dict):
+                    columns[path] = {"path": list(path), "names": list(value.keys())}
+                else:
+                    columns[path] = {"path": list(path), "names": None}
+
+    for col_idx, (path, column) in enumerate(columns.items()):
+        names = column["names"]
+        values, present = [], []
+        for leaves in leaves_per_record:
+            value = leaves.get(path)
+            present.append(value is not None)
+            if value is None:
+                values.append(None)
+            elif names is not None:
+                values.append(np.asarray([value[n] for n in names], dtype=np.float64))
+            else:
+                values.append(_to_array(value))
+        template = next(v for v in values if v is not None)
+        for i, v in enumerate(values):
+            if v is None:
+                values[i] = np.full_like(template, np.nan, dtype=np.result_type(template, np.float32))
+            elif v.shape != template.shape:
+                raise ValueError(f"Inconsistent shape at {section}/{'/'.join(path)}: {v.shape} vs {template.shape}")
+
+        column["file"] = f"{section}_{col_idx}.npy"
+        np.save(os.path.join(robot_dir, column["file"]), np.stack(values))
+        if not all(present):
+            column["mask_file"] = f"{section}_{col_idx}_mask.npy"
+            np.save(os.path.join(robot_dir, column["mask_file"]), np.asarray(present))
+
+    meta = {"columns": list(columns.values()), "num_records": len(records)}
+    if offsets is not None:
+        meta["offsets_file"] = f"{section}_offsets.npy"
+        np.save(os.path.join(robot_dir, meta["offsets_file"]), np.asarray(offsets, dtype=np.int64))
+    return meta
+
+
+def _to_v2(init_state: dict, actions: list | None, states: list | None, robot_name: str):
+    """Convert one demo from the v3 format (``objects``/``robots`` states, per-robot actions) to v2 if needed."""
+    if "objects" in init_state and "robots" in init_state:
+        init_state = {**init_state["objects"], **init_state["robots"]}
+        if states is not None:
+            states = [{**s["objects"], **s["robots"]} for s in states]
+    if actions is not None and actions and robot_name in actions[0]:
+        actions = [a[robot_name] for a in actions]
+    return init_state, actions, states
+
+
+def save_traj_columnar(
+    path: str,
+    robot_name: str,
+    init_states: Sequence[dict],
+    all_actions: Sequence[list[dict]] | None,
+    all_states: Sequence[list[dict]] | None = None,
+    extras: Sequence[Any] | None = None,
+    source: str | None = None,
+) -> str:
+    """Save the trajectory of one robot in the columnar format.
+
+    The demos can be given in the v2 format (as returned by ``get_traj_v2`` and ``get_traj_v1``) or in the v3 format
+    (as returned by :func:`~metasim.utils.demo_util.get_traj`).
+
+    Args:
+        path: The ``.traj`` directory. Other robots already stored in it are kept.
+        robot_name: The name of the robot.
+        init_states: The initial state of each demo.
+        all_actions: The actions of each demo.
+        all_states: The states of each demo.
+        extras: The extra information of each demo, stored with pickle.
+        source: The trajectory file the demos were loaded from. Its size and mtime are recorded, so that the columnar
+            copy is not used once the source changed, see :func:`is_columnar_fresh`.
+
+    Returns:
+        The directory of the robot.
+    """
+    assert path.endswith(COLUMNAR_SUFFIX), f"Columnar trajectory path should end with {COLUMNAR_SUFFIX}: {path}"
+    num_demos = len(init_states)
+    demos = [
+        _to_v2(
+            init_states[i],
+            all_actions[i] if all_actions is not None else None,
+            all_states[i] if all_states is not None else None,
+            robot_name,
+        )
+        for i in range(num_demos)
+    ]
+
+    robot_dir = os.path.join(path, robot_name)
+    os.makedirs(robot_dir, exist_ok=True)
+    meta = {"version": _FORMAT_VERSION, "num_demos": num_demos, "sections": {}}
+    if source is not None:
+        meta["source"] = _source_stats(source)
+    meta["sections"]["init_state"] = _write_section(robot_dir, "init_state", [d[0] for d in demos], None)
+    for section, idx in (("actions", 1), ("states", 2)):
+        if any(d[idx] is None for d in demos):
+            continue
+        offsets = np.cumsum([0] + [len(d[idx]) for d in demos]).tolist()
+        records = [step for d in demos for step in d[idx]]
+        meta["sections"][section] = _write_section(robot_dir, section, records, offsets)
+    if extras is not None and any(e is not None for e in extras):
+        meta["extras_file"] = "extras.pkl"
+        with open(os.path.join(robot_dir, meta["extras_file"]), "wb") as f:
+            pickle.dump(list(extras), f)
+
+    with open(os.path.join(robot_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return robot_dir
+
+
+def _source_stats(path: str) -> dict[str, int]:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def is_columnar_fresh(path: str, robot_name: str, source: str | None) -> bool:
+    """Whether the columnar trajectory of a robot exists and is up to date with its source file.
+
+    Args:
+        path: The ``.traj`` directory.
+        robot_name: The name of the robot.
+        source: The trajectory file the columnar copy was converted from. If it does not exist, the columnar copy is
+            the only copy and is always used.
+    """
+    meta_path = os.path.join(path, robot_name, "meta.json")
+    if not os.path.isfile(meta_path):
+        return False
+    if source is None or not os.path.isfile(source):
+        return True
+    with open(meta_path) as f:
+        recorded = json.load(f).get("source")
+    if recorded != _source_stats(source):
+        log.warning(
+            f"Columnar trajectory {path} is older than {source} or was not converted from it, loading {source}"
+            " instead. Convert it again to use the columnar copy."
+        )
+        return False
+    return True
+
+
+def columnar_traj_path(traj_filepath: str) -> str:
+    """The columnar ``.traj`` path corresponding to a trajectory file, e.g. ``a_v2.pkl.gz`` -> ``a_v2.traj``."""
+    path = traj_filepath.rstrip("/")
+    for suffix in _TRAJ_FILE_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)] + COLUMNAR_SUFFIX
+    return path + COLUMNAR_SUFFIX if not path.endswith(COLUMNAR_SUFFIX) else path
+
+
+def convert_traj_file_to_columnar(src: str, dst: str | None = None) -> str:
+    """Convert a v2 trajectory file to the columnar format, for all robots in it.
+
+    Args:
+        src: The v2 trajectory file (``.pkl``, ``.pkl.gz``, ``.json`` or ``.yaml``).
+        dst: The ``.traj`` directory. Defaults to :func:`columnar_traj_path` of ``src``.
+
+    Returns:
+        The ``.traj`` directory.
+    """
+    dst = dst or columnar_traj_path(src)
+    data = load_traj_file(src)
+    for robot_name, demos in data.items():
+        save_traj_columnar(
+            dst,
+            robot_name,
+            [demo["init_state"] for demo in demos],
+            [demo["actions"] for demo in demos] if all("actions" in demo for demo in demos) else None,
+            [demo["states"] for demo in demos] if all(demo.get("states") for demo in demos) else None,
+            [demo.get("extra") for demo in demos],
+            source=src,
+        )
+    log.info(f"Converted {src} to {dst}")
+    return dst
+
+
+############################################################
+## Read
+############################################################
+class ColumnarTraj:
+    """Memory-mapped trajectory of one robot in the columnar format.
+
+    Args:
+        robot_dir: The robot directory inside a ``.traj`` directory.
+    """
+
+    def __init__(self, robot_dir: str):
+        self.robot_dir = robot_dir
+        with open(os.path.join(robot_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar trajectory version {self.meta['version']} in {robot_dir}")
+        self.num_demos: int = self.meta["num_demos"]
+        self._arrays: dict[str, np.ndarray] = {}
+        self._extras = None
+
+    def _array(self, filename: str) -> np.ndarray:
+        if filename not in self._arrays:
+            self._arrays[filename] = np.load(os.path.join(self.robot_dir, filename), mmap_mode="r")
+        return self._arrays[filename]
+
+    def has_section(self, section: str) -> bool:
+        """Whether the trajectory has ``section``, one of ``init_state``, ``actions``, ``states``."""
+        return section in self.meta["sections"]
+
+    def _decode(self, section: str, start: int, stop: int) -> list[dict]:
+        """Decode the records ``start:stop`` of a section to nested dicts. Each column is read once."""
+        records = [{} for _ in range(stop - start)]
+        for column in self.meta["sections"][section]["columns"]:
+            values = np.asarray(self._array(column["file"])[start:stop])
+            present = self._array(column["mask_file"])[start:stop] if "mask_file" in column else None
+            names = column["names"]
+            *parents, key = column["path"]
+            for i, record in enumerate(records):
+                if present is not None and not present[i]:
+                    continue
+                node = record
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                if names is not None:
+                    node[key] = dict(zip(names, values[i].tolist()))
+                elif values[i].ndim == 0:
+                    node[key] = values[i].item()
+                else:
+                    node[key] = values[i].tolist()
+        return records
+
+    def _demo_range(self, section: str, demo_idx: int) -> tuple[int, int]:
+        offsets = self._array(self.meta["sections"][section]["offsets_file"])
+        return int(offsets[demo_idx]), int(offsets[demo_idx + 1])
+
+    def init_state(self, demo_idx: int) -> dict:
+        """The initial state of a demo, in the v2 format."""
+        return self._decode("init_state", demo_idx, demo_idx + 1)[0]
+
+    def actions(self, demo_idx: int) -> list[dict] | None:
+        """The actions of a demo, in the v2 format."""
+        if not self.has_section("actions"):
+            return None
+        return self._decode("actions", *self._demo_range("actions", demo_idx))
+
+    def states(self, demo_idx: int) -> list[dict] | None:
+        """The states of a demo, in the v2 format."""
+        if not self.has_section("states"):
+            return None
+        return self._decode("states", *self._demo_range("states", demo_idx))
+
+    def extra(self, demo_idx: int) -> Any:
+        """The extra information of a demo, or None."""
+        if "extras_file" not in self.meta:
+            return None
+        if self._extras is None:
+            with open(os.path.join(self.robot_dir, self.meta["extras_file"]), "rb") as f:
+                self._extras = pickle.load(f)
+        return self._extras[demo_idx]
+
+    def num_steps(self, demo_idx: int) -> int:
+        """The number of actions of a demo, without decoding it."""
+        start, stop = self._demo_range("actions", demo_idx)
+        return stop - start
+
+
+def _pos_rot_to_tensor(state: dict) -> dict:
+    for obj_state in state.values():
+        for key in ("pos", "rot"):
+            if key in obj_state:
+                obj_state[key] = torch.tensor(obj_state[key])
+    return state
+
+
+def get_traj_columnar(path: str, robot_name: str):
+    """Get the trajectory data of a robot from a columnar trajectory, with the same output as ``get_traj_v2``.
+
+    Args:
+        path: The ``.traj`` directory.
+        robot_name: The name of the robot.
+
+    Returns:
+        The initial states, actions and states of all demos. They are :class:`LazyDemos`, each demo is decoded from
+        the memory-mapped columns when it is accessed.
+    """
+    traj = ColumnarTraj(os.path.join(path, robot_name))
+    indices = range(traj.num_demos)
+    init_states = LazyDemos(lambda i: _pos_rot_to_tensor(traj.init_state(i)), indices)
+    if traj.has_section("actions"):
+        all_actions = LazyDemos(traj.actions, indices)
+    else:
+        log.error("No actions found in the trajectory data")
+        all_actions = None
+    if traj.has_section("states"):
+        all_states = LazyDemos(lambda i: [_pos_rot_to_tensor(s) for s in traj.states(i)], indices)
+    else:
+        log.error("No states found in the trajectory data")
+        all_states = None
+    return init_states, all_actions, all_states
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert v2 trajectory files to the columnar format.")
+    parser.add_argument("src", nargs="+", help="v2 trajectory files")
+    args = parser.parse_args()
+    for src in args.src:
+        convert_traj_file_to_columnar(src)
@@ -10,8 +10,9 @@ from metasim.cfg.robots.base_robot_cfg import BaseRobotCfg
 from metasim.cfg.tasks.base_task_cfg import BaseTaskCfg
 from metasim.sim import BaseSimHandler
 
+from .columnar import columnar_traj_path, get_traj_columnar, is_columnar_fresh, save_traj_columnar
 from .demo_util_v1 import get_traj_v1
-from .demo_util_v2 import get_traj_v2
+from .demo_util_v2 import _source_file, get_traj_v2
 from .demo_util_v3 import convert_traj_v2_to_v3
 
 
@@ -29,7 +30,7 @@ def get_traj(task: BaseTaskCfg, robot: BaseRobotCfg, handler: BaseSimHandler | N
     """
     if task.traj_filepath.find("v2") != -1:
         log.info("Reading trajectory using v2 data format")
-        if os.path.exists(task.traj_filepath):
+        if os.path.exists(task.traj_filepath) or os.path.isdir(columnar_traj_path(task.traj_filepath)):
             if v2_as_v3:
                 return convert_traj_v2_to_v3(*get_traj_v2(task, robot), robot)
             else:
@@ -40,5 +41,36 @@ def get_traj(task: BaseTaskCfg, robot: BaseRobotCfg, handler: BaseSimHandler | N
             )
     else:
         log.warning("Reading trajectory using v1 data format, which is deprecated")
+        ## A columnar copy of a v1 trajectory holds the decoded demos, so it does not need the handler
+        columnar_path = columnar_traj_path(task.traj_filepath)
+        if is_columnar_fresh(columnar_path, robot.name, task.traj_filepath):
+            log.info(f"Loading columnar trajectory from {columnar_path}")
+            return get_traj_columnar(columnar_path, robot.name)
         assert handler is not None, "Handler is required for v1 data format"
         return get_traj_v1(task, robot, handler)
+
+
+def convert_traj_to_columnar(task: BaseTaskCfg, robot: BaseRobotCfg, handler: BaseSimHandler | None = None) -> str:
+    """Convert the trajectory of a task to the columnar format, next to the trajectory file.
+
+    Unlike :func:`~metasim.utils.demo_util.columnar.convert_traj_file_to_columnar`, this also handles v1 trajectory
+    files, which are decoded with ``handler`` as in :func:`get_traj`.
+
+    Args:
+        task: The task cfg instance.
+        robot: The robot cfg instance.
+        handler: The handler instance. Only used for v1 data format.
+
+    Returns:
+        The ``.traj`` directory.
+    """
+    dst = columnar_traj_path(task.traj_filepath)
+    source = _source_file(task.traj_filepath, robot)
+    if is_columnar_fresh(dst, robot.name, source):
+        ## Also avoids overwriting the columns that get_traj would memory-map
+        log.info(f"Columnar trajectory {dst} is up to date")
+        return dst
+    init_states, all_actions, all_states = get_traj(task, robot, handler)
+    save_traj_columnar(dst, robot.name, init_states, all_actions, all_states, source=source)
+    log.info(f"Converted {task.traj_filepath} to {dst}")
+    return dst
@@ -11,9 +11,18 @@ from loguru import logger as log
 from metasim.cfg.robots.base_robot_cfg import BaseRobotCfg
 from metasim.cfg.tasks.base_task_cfg import BaseTaskCfg
 
+from .columnar import columnar_traj_path, get_traj_columnar, is_columnar_fresh
 from .loader import load_traj_file
 
 
+def _source_file(traj_filepath: str, robot: BaseRobotCfg) -> str | None:
+    """The v2 file holding the trajectory of ``robot``, or None if there is none."""
+    if os.path.isdir(traj_filepath):
+        paths = glob(os.path.join(traj_filepath, f"{robot.name}_v2.*"))
+        return paths[0] if paths else None
+    return traj_filepath if os.path.isfile(traj_filepath) else None
+
+
 def get_traj_v2(task: BaseTaskCfg, robot: BaseRobotCfg):
     """Get the trajectory data.
 
@@ -24,6 +33,12 @@ def get_traj_v2(task: BaseTaskCfg, robot: BaseRobotCfg):
     Returns:
         The trajectory data.
     """
+    ## Prefer the memory-mapped columnar copy of the trajectory if it is up to date
+    columnar_path = columnar_traj_path(task.traj_filepath)
+    if is_columnar_fresh(columnar_path, robot.name, _source_file(task.traj_filepath, robot)):
+        log.info(f"Loading columnar trajectory from {columnar_path}")
+        return get_traj_columnar(columnar_path, robot.name)
+
     ## Load trajectory data
     assert os.path.exists(task.traj_filepath)
     if os.path.isfile(task.traj_filepath):
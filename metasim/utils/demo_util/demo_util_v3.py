@@ -5,6 +5,8 @@ from __future__ import annotations
 from metasim.cfg.robots.base_robot_cfg import BaseRobotCfg
 from metasim.types import Action, RobotAction
 
+from .columnar import LazyDemos
+
 
 def convert_state_v2_to_v3(state: dict, robot: BaseRobotCfg):
     """Convert v2 state format to v3 state format.
@@ -55,6 +57,19 @@ def convert_traj_v2_to_v3(
     Returns:
         The converted v3 trajectory data.
     """
+    if isinstance(init_states, LazyDemos):
+        ## Keep columnar trajectories lazy, each demo is converted when it is accessed
+        init_states_v3 = init_states.map(lambda init_state: convert_state_v2_to_v3(init_state, robot))
+        all_states_v3 = (
+            all_states.map(lambda states: [convert_state_v2_to_v3(state, robot) for state in states])
+            if all_states is not None
+            else None
+        )
+        all_actions_v3 = (
+            all_actions.map(lambda actions: [{robot.name: a} for a in actions]) if all_actions is not None else None
+        )
+        return init_states_v3, all_actions_v3, all_states_v3
+
     init_states_v3 = [convert_state_v2_to_v3(init_state, robot) for init_state in init_states]
     if all_states is not None:
         all_states_v3 = [[convert_state_v2_to_v3(state, robot) for state in states] for states in all_states]
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import glob
+import hashlib
+import json
 import os
-from multiprocessing import Pool
+import shutil
 
-from huggingface_hub import HfApi, hf_hub_download
+from huggingface_hub import snapshot_download
 from loguru import logger as log
 
 from metasim.cfg.objects import BaseObjCfg, PrimitiveCubeCfg, PrimitiveCylinderCfg, PrimitiveSphereCfg
@@ -20,74 +23,172 @@ except ImportError:
 
 REPO_ID = "RoboVerseOrg/roboverse_data"
 LOCAL_DIR = "roboverse_data"
+MANIFEST_PATH = os.path.join(LOCAL_DIR, ".asset_manifest.json")
 
-hf_api = HfApi()
 
+def _offline() -> bool:
+    """Whether downloading is disabled, by ``ROBOVERSE_OFFLINE=1`` or huggingface's ``HF_HUB_OFFLINE=1``."""
+    return os.environ.get("ROBOVERSE_OFFLINE", "0") == "1" or os.environ.get("HF_HUB_OFFLINE", "0") == "1"
 
-def _check_and_download_single(filepath: str):
-    """Check if the file exists in the local directory, and download it from the huggingface dataset if it doesn't exist.
+
+def _sha256(filepath: str) -> str:
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _AssetManifest:
+    """Persisted dependency lists of URDF and MJCF assets, so that they are not re-parsed on every scenario.
+
+    ``files`` maps the absolute path of an asset to the size, mtime and content hash seen when it was last checked,
+    and ``deps`` maps a content hash to the files referenced by that content, relative to the asset's directory. An
+    asset whose mtime changed but whose content did not (e.g. after a fresh checkout) is recognized by its hash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: dict[str, dict] = {}
+        self.deps: dict[str, list[str]] = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                self.files, self.deps = data["files"], data["deps"]
+            except (OSError, ValueError, KeyError):
+                log.warning(f"Ignoring corrupted asset manifest {path}")
+
+    def direct_deps(self, filepath: str) -> list[str]:
+        """Files referenced by the URDF or MJCF file ``filepath``, as absolute paths."""
+        abspath = os.path.abspath(filepath)
+        st = os.stat(abspath)
+        entry = self.files.get(abspath)
+        if entry is not None and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            digest = entry["sha256"]
+        else:
+            digest = _sha256(abspath)
+            self.files[abspath] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+            self._dirty = True
+
+        base_dir = os.path.dirname(abspath)
+        if digest not in self.deps:
+            if abspath.endswith(".urdf"):
+                mesh_paths = extract_mesh_paths_from_urdf(abspath)
+            else:
+                mesh_paths = extract_mesh_paths_from_mjcf(abspath)
+            self.deps[digest] = sorted({os.path.relpath(p, base_dir) for p in mesh_paths})
+            self._dirty = True
+        return [os.path.normpath(os.path.join(base_dir, p)) for p in self.deps[digest]]
+
+    def save(self):
+        """Write the manifest if it changed, atomically so that concurrent readers never see a partial file."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files, "deps": self.deps}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+_manifest: _AssetManifest | None = None
+_verified: set[str] = set()  # assets whose dependencies were all found by this process
+
+
+def _get_manifest() -> _AssetManifest:
+    global _manifest
+    if _manifest is None:
+        _manifest = _AssetManifest(MANIFEST_PATH)
+    return _manifest
+
+
+def _fetch_missing(filepaths: list[str], n_workers: int = 16):
+    """Make sure the files exist locally, fetching all missing ones in one batch.
+
+    Missing files are first copied from the local mirror directory given by ``ROBOVERSE_ASSET_MIRROR`` (laid out like
+    the huggingface dataset), then downloaded from the huggingface dataset unless offline mode is enabled.
 
     Args:
-        filepath: the filepath to check and download.
+        filepaths: the filepaths to check and download.
+        n_workers: the number of concurrent downloads.
     """
-    local_exists = os.path.exists(filepath)
-    if local_exists:
-        ## In this case, the runner has the file in their local machine.
-        log.info(f"File {filepath} found in local directory.")
+    missing = [f for f in dict.fromkeys(filepaths) if not os.path.exists(f)]
+    if len(missing) == 0:
         return
-    else:
-        ## In this case, we didn't find the file in the local directory, the circumstance is complicated.
-        hf_exists = hf_api.file_exists(REPO_ID, os.path.relpath(filepath, LOCAL_DIR), repo_type="dataset")
-
-        ## Make sure the file exists in the huggingface dataset.
-        if not hf_exists:
-            raise Exception(
-                f"File {filepath} neither exists in the local directory nor exists in the huggingface dataset. Please"
-                " report this issue to the developers."
-            )
-
-        ## Also, we need to exclude a circumstance that user forgot to update the submodule.
-        using_hf_git = os.path.exists(os.path.join(LOCAL_DIR, ".git"))
-        if using_hf_git:
-            raise Exception(
-                "Please update the roboverse_data to the latest version, by running `cd roboverse_data && git pull`."
-            )
-
-        ## Finally, download the file from the huggingface dataset.
-        try:
-            hf_hub_download(
-                repo_id=REPO_ID,
-                filename=os.path.relpath(filepath, LOCAL_DIR),
-                repo_type="dataset",
-                local_dir=LOCAL_DIR,
-            )
-            log.info(f"File {filepath} downloaded from the huggingface dataset.")
-        except Exception as e:
-            raise e
+
+    mirror_dir = os.environ.get("ROBOVERSE_ASSET_MIRROR")
+    if mirror_dir is not None:
+        for filepath in missing:
+            src = os.path.join(mirror_dir, os.path.relpath(filepath, LOCAL_DIR))
+            if os.path.exists(src):
+                os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+                shutil.copy2(src, filepath)
+                log.info(f"File {filepath} copied from the mirror {mirror_dir}.")
+        missing = [f for f in missing if not os.path.exists(f)]
+        if len(missing) == 0:
+            return
+
+    if _offline():
+        raise FileNotFoundError(f"Files {missing} do not exist in the local directory, and downloading is disabled.")
+
+    ## Exclude a circumstance that user forgot to update the submodule.
+    using_hf_git = os.path.exists(os.path.join(LOCAL_DIR, ".git"))
+    if using_hf_git:
+        raise Exception(
+            f"Files {missing} not found. Please update the roboverse_data to the latest version, by running `cd"
+            " roboverse_data && git pull`."
+        )
+
+    snapshot_download(
+        repo_id=REPO_ID,
+        repo_type="dataset",
+        local_dir=LOCAL_DIR,
+        allow_patterns=[glob.escape(os.path.relpath(f, LOCAL_DIR)) for f in missing],
+        max_workers=n_workers,
+    )
+    not_found = [f for f in missing if not os.path.exists(f)]
+    if len(not_found) > 0:
+        raise Exception(
+            f"Files {not_found} neither exist in the local directory nor exist in the huggingface dataset. Please"
+            " report this issue to the developers."
+        )
+    log.info(f"Downloaded {len(missing)} files from the huggingface dataset.")
 
 
 def check_and_download_recursive(filepaths: list[str], n_processes: int = 16):
     """Check if the files exist in the local directory, and download them from the huggingface dataset if they don't exist. If the file is a URDF or MJCF file, it will download the referenced mesh and texture files recursively.
 
+    The referenced files of each URDF and MJCF file are cached in a manifest (see :class:`_AssetManifest`), and files
+    already checked by this process are skipped, so checking local assets costs a few stats.
+
     Args:
         filepaths (list[str]): the filepaths to check and download.
-        n_processes (int): the number of processes to use for downloading. Default is 16.
+        n_processes (int): the number of concurrent downloads. Default is 16.
     """
-    if len(filepaths) == 0:
+    pending = [f for f in dict.fromkeys(filepaths) if f not in _verified]
+    if len(pending) == 0:
         return
 
-    with Pool(processes=n_processes) as p:
-        p.map(_check_and_download_single, filepaths)
-
-    new_filepaths = []
-    for filepath in filepaths:
-        if filepath.endswith(".urdf"):
-            mesh_paths = extract_mesh_paths_from_urdf(filepath)
-            new_filepaths.extend(mesh_paths)
-        elif filepath.endswith(".xml"):
-            mesh_paths = extract_mesh_paths_from_mjcf(filepath)
-            new_filepaths.extend(mesh_paths)
-    check_and_download_recursive(new_filepaths, n_processes)
+    manifest = _get_manifest()
+    roots = pending
+    seen = set(pending)
+    try:
+        while len(pending) > 0:
+            _fetch_missing(pending, n_processes)
+            new_filepaths = []
+            for filepath in pending:
+                if filepath.endswith((".urdf", ".xml")):
+                    for dep in manifest.direct_deps(filepath):
+                        if dep not in seen:
+                            seen.add(dep)
+                            new_filepaths.append(dep)
+            pending = new_filepaths
+    finally:
+        manifest.save()
+    _verified.update(roots)
 
 
 class FileDownloader:
@@ -95,7 +196,7 @@ class FileDownloader:
 
     Args:
         scenario: the scenario configuration.
-        n_processes (int): the number of processes to use for downloading. Default is 16.
+        n_processes (int): the number of concurrent downloads. Default is 16.
     """
 
     def __init__(self, scenario: ScenarioCfg, n_processes: int = 16):
@@ -1,5 +1,7 @@
 """Utility functions for humanoid reward functions."""
 
+import functools
+import math
 import warnings
 
 import numpy as np
@@ -118,70 +120,90 @@ def tolerance(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_mar
     return float(value) if np.isscalar(x) else value
 
 
+@functools.lru_cache(maxsize=None)
+def _sigmoid_scale(sigmoid, value_at_1):
+    """Returns the constant that maps `x` == 1 to `value_at_1` for the given sigmoid, as a python float.
+
+    Raises:
+      ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
+        `quadratic` sigmoids which allow `value_at_1` == 0.
+      ValueError: If `sigmoid` is of an unknown type.
+    """
+    if sigmoid in ("cosine", "linear", "quadratic"):
+        if not 0 <= value_at_1 < 1:
+            raise ValueError(f"`value_at_1` must be nonnegative and smaller than 1, got {value_at_1}.")
+    else:
+        if not 0 < value_at_1 < 1:
+            raise ValueError(f"`value_at_1` must be strictly between 0 and 1, got {value_at_1}.")
+
+    if sigmoid == "gaussian":
+        return math.sqrt(-2 * math.log(value_at_1))
+    elif sigmoid == "hyperbolic":
+        return math.acosh(1 / value_at_1)
+    elif sigmoid == "long_tail":
+        return math.sqrt(1 / value_at_1 - 1)
+    elif sigmoid == "reciprocal":
+        return 1 / value_at_1 - 1
+    elif sigmoid == "cosine":
+        return math.acos(2 * value_at_1 - 1) / math.pi
+    elif sigmoid == "linear":
+        return 1 - value_at_1
+    elif sigmoid == "quadratic":
+        return math.sqrt(1 - value_at_1)
+    elif sigmoid == "tanh_squared":
+        return math.atanh(math.sqrt(1 - value_at_1))
+    else:
+        raise ValueError(f"Unknown sigmoid type {sigmoid!r}.")
+
+
 def _sigmoids_tensor(x, value_at_1, sigmoid):
     """Returns 1 when `x` == 0, between 0 and 1 otherwise.
 
+    The scale of each (sigmoid, value_at_1) pair is computed once and reused, so the body only launches tensor ops on
+    `x` with python float constants, which also keeps it traceable by ``torch.compile``.
+
     Args:
-      x: A scalar or numpy array.
+      x: A torch tensor.
       value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
       sigmoid: String, choice of sigmoid type.
 
     Returns:
-      A numpy array with values between 0.0 and 1.0.
+      A torch tensor with values between 0.0 and 1.0.
 
     Raises:
       ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
         `quadratic` sigmoids which allow `value_at_1` == 0.
       ValueError: If `sigmoid` is of an unknown type.
     """
-    if sigmoid in ("cosine", "linear", "quadratic"):
-        if not 0 <= value_at_1 < 1:
-            raise ValueError(f"`value_at_1` must be nonnegative and smaller than 1, got {value_at_1}.")
-    else:
-        if not 0 < value_at_1 < 1:
-            raise ValueError(f"`value_at_1` must be strictly between 0 and 1, got {value_at_1}.")
+    scale = _sigmoid_scale(sigmoid, float(value_at_1))
 
     if sigmoid == "gaussian":
-        scale = torch.sqrt(-2 * torch.log(value_at_1))
         return torch.exp(-0.5 * (x * scale) ** 2)
 
     elif sigmoid == "hyperbolic":
-        scale = torch.arccosh(1 / value_at_1)
         return 1 / torch.cosh(x * scale)
 
     elif sigmoid == "long_tail":
-        scale = torch.sqrt(1 / value_at_1 - 1)
         return 1 / ((x * scale) ** 2 + 1)
 
     elif sigmoid == "reciprocal":
-        scale = 1 / value_at_1 - 1
         return 1 / (abs(x) * scale + 1)
 
     elif sigmoid == "cosine":
-        scale = torch.arccos(2 * value_at_1 - 1) / torch.pi
         scaled_x = x * scale
-        with warnings.catch_warnings():
-            warnings.filterwarnings(action="ignore", message="invalid value encountered in cos")
-            cos_pi_scaled_x = torch.cos(torch.pi * scaled_x)
-        return np.where(abs(scaled_x) < 1, (1 + cos_pi_scaled_x) / 2, 0.0)
+        return torch.where(abs(scaled_x) < 1, (1 + torch.cos(torch.pi * scaled_x)) / 2, 0.0)
 
     elif sigmoid == "linear":
-        scale = 1 - value_at_1
         scaled_x = x * scale
         return torch.where(abs(scaled_x) < 1, 1 - scaled_x, 0.0)
 
     elif sigmoid == "quadratic":
-        scale = torch.sqrt(1 - value_at_1)
         scaled_x = x * scale
         return torch.where(abs(scaled_x) < 1, 1 - scaled_x**2, 0.0)
 
-    elif sigmoid == "tanh_squared":
-        scale = torch.arctanh(torch.sqrt(1 - value_at_1))
+    else:  # tanh_squared, unknown types are rejected by _sigmoid_scale
         return 1 - torch.tanh(x * scale) ** 2
 
-    else:
-        raise ValueError(f"Unknown sigmoid type {sigmoid!r}.")
-
 
 def tolerance_tensor(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN):
     """Returns 1 when `x` falls inside the bounds, between 0 and 1 otherwise.
@@ -222,8 +244,6 @@ def tolerance_tensor(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value
         value = torch.where(in_bounds, 1.0, 0.0)
     else:
         dd = torch.where(x < lower, lower - x, x - upper) / margin
-        value = torch.where(
-            in_bounds, 1.0, _sigmoids_tensor(dd, torch.tensor(value_at_margin, device=x.device), sigmoid)
-        )
+        value = torch.where(in_bounds, 1.0, _sigmoids_tensor(dd, value_at_margin, sigmoid))
 
     return value
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import functools
+
 import torch
 from loguru import logger as log
 
@@ -23,6 +25,32 @@ def torso_upright(envstate, robot_name: str):
     return xmat[2, 2].item()
 
 
+_BODY_IDS: dict[tuple, list[int]] = {}
+
+
+def body_ids(envstate, robot_name: str, body_names: tuple[str, ...]) -> list[int]:
+    """Returns the indices of ``body_names`` in the body states of a robot.
+
+    The indices are resolved once per robot body layout and cached, so the reward functions don't search the body
+    name list at every step.
+
+    Args:
+        envstate: Environment state object with batched robot states.
+        robot_name (str): Name of the robot.
+        body_names (tuple[str, ...]): Names of the queried bodies.
+
+    Returns:
+        list[int]: Index of each body along dim 1 of ``body_state``.
+    """
+    robot_body_names = envstate.robots[robot_name].body_names
+    key = (robot_name, tuple(robot_body_names), body_names)
+    ids = _BODY_IDS.get(key)
+    if ids is None:
+        ids = [robot_body_names.index(body_name) for body_name in body_names]
+        _BODY_IDS[key] = ids
+    return ids
+
+
 def torso_upright_tensor(envstate, robot_name: str):
     """Returns the projection of the torso's z-axis onto the world's z-axis for a batch of environments.
 
@@ -33,11 +61,11 @@ def torso_upright_tensor(envstate, robot_name: str):
     Returns:
         torch.Tensor: Projection values, shape=(batch_size,)
     """
-    robot_body_name = envstate.robots[robot_name].body_names
-    body_id = robot_body_name.index("pelvis")
+    (body_id,) = body_ids(envstate, robot_name, ("pelvis",))
     quat = envstate.robots[robot_name].body_state[:, body_id, 3:7]  # (batch_size, 4)
-    xmat = matrix_from_quat(quat)  # (batch_size, 3, 3)
-    return xmat[:, 2, 2]
+    ## Only the (2, 2) entry of matrix_from_quat(quat) is needed
+    _, x, y, _ = quat.unbind(-1)
+    return 1 - 2.0 / (quat * quat).sum(-1) * (x * x + y * y)
 
 
 def head_height(envstate, robot_name: str):
@@ -58,18 +86,14 @@ def neck_height(envstate, robot_name: str):
 
 def neck_height_tensor(envstate, robot_name: str):
     """Returns the height of the neck."""
-    robot_body_name = envstate.robots[robot_name].body_names
-    body_id_l = robot_body_name.index("left_shoulder_roll_link")
-    body_id_r = robot_body_name.index("right_shoulder_roll_link")
-    body_pos_l = envstate.robots[robot_name].body_state[:, body_id_l, 2]
-    body_pos_r = envstate.robots[robot_name].body_state[:, body_id_r, 2]
-    return (body_pos_l + body_pos_r) / 2
+    body_id_l, body_id_r = body_ids(envstate, robot_name, ("left_shoulder_roll_link", "right_shoulder_roll_link"))
+    body_state = envstate.robots[robot_name].body_state
+    return (body_state[:, body_id_l, 2] + body_state[:, body_id_r, 2]) / 2
 
 
 def body_pos_tensor(envstate, robot_name: str, body_name: str) -> torch.Tensor:
     """Return world position of a specific body for ALL environments."""
-    body_names = envstate.robots[robot_name].body_names  # list[str]
-    body_id = body_names.index(body_name)
+    (body_id,) = body_ids(envstate, robot_name, (body_name,))
     # body_state shape = (B, n_body, 13) -> [pos(3), quat(4), linVel(3), angVel(3)]
     return envstate.robots[robot_name].body_state[:, body_id, 0:3]
 
@@ -177,6 +201,63 @@ def robot_local_velocity_tensor(envstate, robot_name: str) -> torch.Tensor:
     return torch.stack((v_x_local, v_y_local), dim=-1)
 
 
+class HumanoidFeatures:
+    """Derived quantities of a robot that several reward terms read from the same state.
+
+    Each quantity is computed on first access and then shared, use :func:`humanoid_features` to get the instance of a
+    state.
+
+    Args:
+        envstate: Environment state object with batched robot states.
+        robot_name (str): Name of the robot.
+    """
+
+    def __init__(self, envstate, robot_name: str):
+        self.envstate = envstate
+        self.robot_name = robot_name
+
+    @functools.cached_property
+    def neck_height(self) -> torch.Tensor:
+        """Height of the neck, shape=(batch_size,)."""
+        return neck_height_tensor(self.envstate, self.robot_name)
+
+    @functools.cached_property
+    def torso_upright(self) -> torch.Tensor:
+        """Projection of the torso's z-axis onto the world's z-axis, shape=(batch_size,)."""
+        return torso_upright_tensor(self.envstate, self.robot_name)
+
+    @functools.cached_property
+    def velocity(self) -> torch.Tensor:
+        """World frame velocity of the robot, shape=(batch_size, 3)."""
+        return robot_velocity_tensor(self.envstate, self.robot_name)
+
+    @functools.cached_property
+    def local_velocity(self) -> torch.Tensor:
+        """Robot frame XY velocity of the robot, shape=(batch_size, 2)."""
+        return robot_local_velocity_tensor(self.envstate, self.robot_name)
+
+    @functools.cached_property
+    def actuator_forces(self) -> torch.Tensor:
+        """Forces applied by the actuators, shape=(batch_size, num_joints)."""
+        return actuator_forces_tensor(self.envstate, self.robot_name)
+
+
+_FEATURES: dict[str, HumanoidFeatures] = {}
+
+
+def humanoid_features(envstate, robot_name: str) -> HumanoidFeatures:
+    """Returns the shared features of a robot in a state.
+
+    The features of the last state seen for each robot are kept, so all the reward terms evaluated on the same state
+    object reuse them.
+    """
+    features = _FEATURES.get(robot_name)
+    if features is None or features.envstate is not envstate:
+        features = HumanoidFeatures(envstate, robot_name)
+        _FEATURES[robot_name] = features
+    return features
+
+
 def default_dof_pos_tensor(envstates, robot_name: str):
     """Return the default pos of the robot."""
     return envstates.robots[robot_name].extra["default_pos"]
@@ -15,6 +15,55 @@ def touch(path: str):
         os.utime(path, None)
 
 
+class Depth16VideoWriter:
+    """Incremental writer of a lossless 16-bit depth video. Frames are encoded as they are appended.
+
+    Args:
+        video_path: The path to save the video. Should end with ".mkv" or ".avi".
+        fps: The frame rate of the video.
+    """
+
+    def __init__(self, video_path: str, fps: int = 30):
+        assert video_path.endswith(".mkv") or video_path.endswith(".avi")
+        self.video_path = video_path
+        self.fps = fps
+        self._video_writer = None
+
+    def append(self, frame: np.ndarray):
+        """Encode one frame of shape (H, W) or (H, W, 1). Either float32 (0 to 1) or uint16 (0 to 65535)."""
+        if frame.dtype == np.float32:
+            frame = (frame * 65535).astype(np.uint16)
+        if len(frame.shape) == 3:
+            assert frame.shape[-1] == 1
+            frame = frame.squeeze(-1)
+        else:
+            assert len(frame.shape) == 2
+
+        if self._video_writer is None:
+            ## ref: https://stackoverflow.com/a/77028617
+            h, w = frame.shape[:2]
+            self._video_writer = cv2.VideoWriter(
+                filename=self.video_path,
+                apiPreference=cv2.CAP_FFMPEG,
+                fourcc=cv2.VideoWriter_fourcc(*"FFV1"),
+                fps=self.fps,
+                frameSize=(w, h),
+                params=[
+                    cv2.VIDEOWRITER_PROP_DEPTH,
+                    cv2.CV_16U,
+                    cv2.VIDEOWRITER_PROP_IS_COLOR,
+                    0,  # false
+                ],
+            )
+        self._video_writer.write(frame)
+
+    def close(self):
+        """Finish the video."""
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+
+
 def write_16bit_depth_video(video_path: str, frames: list[np.ndarray], fps: int = 30):
     """Write a list of 16-bit depth frames to a video.
 
@@ -23,33 +72,10 @@ def write_16bit_depth_video(video_path: str, frames: list[np.ndarray], fps: int
         frames: A list of 16-bit depth frames. Each frame is a numpy array of shape (H, W) or (H, W, 1). Either float32 (0 to 1) or uint16 (0 to 65535).
         fps: The frame rate of the video.
     """
-    ## ref: https://stackoverflow.com/a/77028617
-    if frames[0].dtype == np.float32:
-        frames = [(frame * 65535).astype(np.uint16) for frame in frames]
-
-    if len(frames[0].shape) == 3:
-        assert frames[0].shape[-1] == 1
-        frames = [frame.squeeze(-1) for frame in frames]
-    else:
-        assert len(frames[0].shape) == 2
-    assert video_path.endswith(".mkv") or video_path.endswith(".avi")
-    h, w = frames[0].shape[:2]
-    video_writer = cv2.VideoWriter(
-        filename=video_path,
-        apiPreference=cv2.CAP_FFMPEG,
-        fourcc=cv2.VideoWriter_fourcc(*"FFV1"),
-        fps=fps,
-        frameSize=(w, h),
-        params=[
-            cv2.VIDEOWRITER_PROP_DEPTH,
-            cv2.CV_16U,
-            cv2.VIDEOWRITER_PROP_IS_COLOR,
-            0,  # false
-        ],
-    )
+    video_writer = Depth16VideoWriter(video_path, fps=fps)
     for frame in frames:
-        video_writer.write(frame)
-    video_writer.release()
+        video_writer.append(frame)
+    video_writer.close()
 
 
 def read_16bit_depth_video(video_path: str) -> list[np.ndarray]:
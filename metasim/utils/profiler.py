@@ -0,0 +1,270 @@
+"""Named-span profiler for the hot path of environment stepping, resetting and state I/O.
+
+The profiler is switched by the ``METASIM_PROFILE`` environment variable, which is read once at import:
+
+- unset or ``0``: disabled. :func:`profiled` returns the decorated function itself and :func:`span` returns a shared
+  no-op context, so instrumented code runs as if it was not instrumented.
+- ``1``: keep rolling statistics of each span and log a summary table at exit.
+- any other value: also record every span and write them at exit as a Chrome trace to the path given by the value,
+  which can be opened in ``chrome://tracing`` or https://ui.perfetto.dev.
+
+Set ``METASIM_PROFILE_SYNC=1`` to synchronize CUDA at span boundaries, so that asynchronous GPU work is attributed to
+the span that launched it instead of the next one that waits for it.
+
+Example:
+    .. code-block:: bash
+
+        METASIM_PROFILE=trace.json python metasim/scripts/replay_demo.py --sim=mujoco --task=CloseBox
+
+    .. code-block:: python
+
+        from metasim.utils.profiler import get_profiler, span
+
+        with span("reward"):
+            reward = compute_reward(states)
+
+        profiler = get_profiler()
+        if profiler is not None:
+            print(profiler.summary()["reward"]["mean_ms"])
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, TypeVar
+
+from loguru import logger as log
+
+F = TypeVar("F", bound=Callable)
+
+_PROFILE_ENV = os.environ.get("METASIM_PROFILE", "0")
+ENABLED = _PROFILE_ENV not in ("", "0")
+"""Whether the profiler is enabled, fixed at import."""
+
+
+class SpanStats:
+    """Statistics of one span name: totals since start and a rolling window of the latest durations.
+
+    Args:
+        window: Number of latest durations kept for the percentiles.
+    """
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._window = [0.0] * window
+
+    def add(self, duration: float) -> None:
+        """Add one duration, in seconds."""
+        self._window[self.count % len(self._window)] = duration
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def summary(self) -> dict[str, float]:
+        """Count, total and mean since start, and percentiles over the rolling window, in milliseconds."""
+        recent = sorted(self._window[: min(self.count, len(self._window))])
+
+        def percentile(q: float) -> float:
+            return recent[min(int(q * len(recent)), len(recent) - 1)] * 1e3 if recent else 0.0
+
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p90_ms": percentile(0.9),
+            "p99_ms": percentile(0.99),
+            "max_ms": self.max * 1e3,
+        }
+
+
+class _Span:
+    __slots__ = ("_name", "_profiler", "_start")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        if self._profiler.sync_cuda:
+            self._profiler._cuda_synchronize()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler.sync_cuda:
+            self._profiler._cuda_synchronize()
+        self._profiler.record(self._name, self._start, time.perf_counter() - self._start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Collects the durations of named spans.
+
+    Args:
+        window: Number of latest durations of each span kept for the percentiles.
+        trace: Whether to record every span for :meth:`export_chrome_trace`.
+        max_trace_events: Spans recorded after this many are only counted in the statistics.
+        sync_cuda: Whether to synchronize CUDA at span boundaries.
+    """
+
+    def __init__(
+        self, window: int = 1000, trace: bool = False, max_trace_events: int = 1_000_000, sync_cuda: bool = False
+    ):
+        self.window = window
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.sync_cuda = sync_cuda
+        self.stats: dict[str, SpanStats] = {}
+        self._events: list[tuple[str, float, float, int]] = []
+
+    def span(self, name: str) -> _Span:
+        """Context manager timing its body as one occurrence of ``name``."""
+        return _Span(self, name)
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        """Record one occurrence of ``name``, started at ``start`` (``time.perf_counter()``) and lasting ``duration`` s."""
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats.setdefault(name, SpanStats(self.window))
+        stats.add(duration)
+        if self.trace and len(self._events) < self.max_trace_events:
+            self._events.append((name, start, duration, threading.get_ident()))
+
+    def _cuda_synchronize(self) -> None:
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+
+    def reset(self) -> None:
+        """Drop all statistics and recorded spans."""
+        self.stats.clear()
+        self._events.clear()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Statistics of each span name, see :meth:`SpanStats.summary`."""
+        return {name: stats.summary() for name, stats in sorted(self.stats.items())}
+
+    def report(self) -> str:
+        """Format :meth:`summary` as a table sorted by total time."""
+        rows = sorted(self.summary().items(), key=lambda item: -item[1]["total_ms"])
+        lines = [f"{'span':<32} {'count':>8} {'total ms':>12} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10}"]
+        for name, s in rows:
+            lines.append(
+                f"{name:<32} {s['count']:>8} {s['total_ms']:>12.2f} {s['mean_ms']:>10.4f} {s['p50_ms']:>10.4f}"
+                f" {s['p99_ms']:>10.4f}"
+            )
+        return "\n".join(lines)
+
+    def export_json(self, path: str) -> None:
+        """Write :meth:`summary` to ``path`` as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the recorded spans to ``path`` in the Chrome trace event format.
+
+        Timestamps are raw ``time.perf_counter()`` values, a system-wide monotonic clock on Linux, so the traces of
+        several processes can be loaded together.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, duration, tid in self._events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+_profiler: Profiler | None = None
+_dumped = False
+if ENABLED:
+    _trace_path = None if _PROFILE_ENV == "1" else _PROFILE_ENV
+    _profiler = Profiler(trace=_trace_path is not None, sync_cuda=os.environ.get("METASIM_PROFILE_SYNC", "0") == "1")
+    ## Spawned subprocesses (e.g. parallel workers) inherit the variable and write their own trace next to the main one
+    _main_pid = os.environ.setdefault("METASIM_PROFILE_MAIN_PID", str(os.getpid()))
+
+
+def dump() -> None:
+    """Log the summary of this process and write its trace, once. A no-op when profiling is disabled.
+
+    Called at exit. Processes that exit without running the ``atexit`` hooks, like the parallel workers leaving through
+    ``os._exit``, call it explicitly before exiting. The trace of a subprocess is written to ``<path>.<pid>``.
+    """
+    global _dumped
+    if _profiler is None or _dumped or not _profiler.stats:
+        return
+    _dumped = True
+    log.info(f"Profile of process {os.getpid()}:\n{_profiler.report()}")
+    if _trace_path is not None:
+        path = _trace_path
+        if str(os.getpid()) != _main_pid:
+            root, ext = os.path.splitext(_trace_path)
+            path = f"{root}.{os.getpid()}{ext}"
+        _profiler.export_chrome_trace(path)
+        log.info(f"Chrome trace written to {path}")
+
+
+if ENABLED:
+    atexit.register(dump)
+
+
+def get_profiler() -> Profiler | None:
+    """The profiler of this process, or None if profiling is disabled."""
+    return _profiler
+
+
+def span(name: str) -> _Span | _NullSpan:
+    """Context manager timing its body as one occurrence of ``name``. A shared no-op when profiling is disabled."""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator timing each call of the function as one occurrence of ``name``.
+
+    When profiling is disabled, the function is returned undecorated.
+    """
+
+    def decorator(func: F) -> F:
+        if _profiler is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _profiler.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -3,3 +3,4 @@
 # ruff: noqa: F401
 
 from .save_util import save_demo
+from .save_util_v2 import DemoWriterV2
@@ -4,14 +4,14 @@ from __future__ import annotations
 
 import json
 import os
-import pickle as pkl
+import threading
 
 import imageio as iio
 import numpy as np
 import torch
 
 from metasim.types import EnvState
-from metasim.utils.io_util import write_16bit_depth_video
+from metasim.utils.io_util import Depth16VideoWriter
 
 
 def _normalize_depth(depth: np.ndarray) -> np.ndarray:
@@ -23,123 +23,264 @@ def is_v2_demo(demo: list[EnvState]) -> bool:
     return "robots" in demo[0]
 
 
-def save_demo_v2(save_dir: str, demo: list[EnvState]):
-    """Save a demo to a directory.
+_METADATA_KEYS = (
+    "depth_min",
+    "depth_max",
+    "cam_pos",
+    "cam_look_at",
+    "cam_intr",
+    "cam_extr",
+    "joint_qpos_target",
+    "joint_qpos",
+    "robot_ee_state",
+    "robot_ee_state_target",
+    "robot_root_state",
+    "robot_body_state",
+)
+
+
+_SPOOL_FILES = {"rgb": "rgb.spool", "depth": "depth.spool"}
+
+
+class DemoWriterV2:
+    """Streaming writer of a v2 demo.
+
+    Each appended state is turned into one row of metadata right away. Rows are flushed to a JSON-lines file every
+    ``chunk_size`` steps, so memory use does not grow with the length of the demo. :meth:`finalize` assembles
+    ``metadata.json`` and marks the demo as successful. Until then the directory has no ``status.txt``, so a crashed
+    collection leaves a demo that is recognized as unfinished.
+
+    Each demo whose frames are encoded as they arrive keeps three encoders open (two ffmpeg subprocesses and one
+    OpenCV writer). At most :attr:`max_streaming` demos of the process do so at a time. The frames of the other demos
+    are spooled raw to disk, without keeping a file open, and encoded by :meth:`finalize`.
 
     Args:
         save_dir: The directory to save the demo.
-        demo: The demo to save.
+        fps: The frame rate of the videos.
+        chunk_size: Number of rows buffered in memory before they are flushed to disk.
     """
-    os.makedirs(save_dir, exist_ok=True)
-
-    # Get the main robot name (assuming first robot in first state)
-    robot_name = next(iter(demo[0]["robots"].keys()))
-    # Get the main camera name (assuming first camera in first state)
-    camera_name = next(iter(demo[0]["cameras"].keys()))
-
-    # Convert and prepare data for saving
-    rgbs = []
-    depths = []
-    jsondata = {
-        "depth_min": [],
-        "depth_max": [],
-        "cam_pos": [],
-        "cam_look_at": [],
-        "cam_intr": [],
-        "cam_extr": [],
-        "joint_qpos_target": [],
-        "joint_qpos": [],
-        "robot_ee_state": [],
-        "robot_ee_state_target": [],
-        "robot_root_state": [],
-        "robot_body_state": [],
-    }
-
-    # Process each timestep
-    for i, state in enumerate(demo):
-        # Extract robot state
-        robot_state = state["robots"][robot_name]
-        camera_state = state["cameras"][camera_name]
-
-        # Extract vision data
+
+    max_streaming: int = 16
+    """Maximum number of demos of the process encoding their videos as frames arrive."""
+    _num_streaming = 0
+    _streaming_lock = threading.Lock()
+
+    def __init__(self, save_dir: str, fps: int = 30, chunk_size: int = 64):
+        os.makedirs(save_dir, exist_ok=True)
+        self.save_dir = save_dir
+        self.fps = fps
+        self.chunk_size = chunk_size
+        self._rows_path = os.path.join(save_dir, "metadata.partial.jsonl")
+        for path in (self._rows_path, *(os.path.join(save_dir, f) for f in _SPOOL_FILES.values())):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._rows: list[dict] = []
+        self._pending: dict | None = None
+        self._robot_name = None
+        self._camera_name = None
+        self._has_dof_pos_target = False
+        self._rgb_writer = None
+        self._depth_uint8_writer = None
+        self._depth_uint16_writer = None
+        self._streaming: bool | None = None
+        self._spool_frames: dict[str, tuple[tuple[int, ...], np.dtype]] = {}
+        self.num_steps = 0
+
+    @classmethod
+    def _acquire_streaming(cls) -> bool:
+        with cls._streaming_lock:
+            if cls._num_streaming >= cls.max_streaming:
+                return False
+            cls._num_streaming += 1
+            return True
+
+    def _release_streaming(self):
+        if self._streaming:
+            with DemoWriterV2._streaming_lock:
+                DemoWriterV2._num_streaming -= 1
+        self._streaming = None
+
+    def _write_frame(self, kind: str, frame: np.ndarray):
+        """Encode a frame (``rgb``, or ``depth`` normalized to 0 to 1) now, or spool it if too many demos stream."""
+        if self._streaming is None:
+            self._streaming = self._acquire_streaming()
+        if not self._streaming:
+            shape_dtype = (frame.shape, frame.dtype)
+            if self._spool_frames.setdefault(kind, shape_dtype) != shape_dtype:
+                raise ValueError(f"Inconsistent {kind} frames: {shape_dtype} vs {self._spool_frames[kind]}")
+            with open(os.path.join(self.save_dir, _SPOOL_FILES[kind]), "ab") as f:
+                f.write(np.ascontiguousarray(frame).tobytes())
+            return
+        self._encode_frame(kind, frame)
+
+    def _encode_frame(self, kind: str, frame: np.ndarray):
+        if kind == "rgb":
+            if self._rgb_writer is None:
+                self._rgb_writer = iio.get_writer(os.path.join(self.save_dir, "rgb.mp4"), fps=self.fps, quality=10)
+            self._rgb_writer.append_data(frame)
+        else:
+            if self._depth_uint16_writer is None:
+                self._depth_uint16_writer = Depth16VideoWriter(
+                    os.path.join(self.save_dir, "depth_uint16.mkv"), fps=self.fps
+                )
+                self._depth_uint8_writer = iio.get_writer(
+                    os.path.join(self.save_dir, "depth_uint8.mp4"), fps=self.fps, quality=10
+                )
+            self._depth_uint16_writer.append(frame)
+            self._depth_uint8_writer.append_data((frame * 255).astype(np.uint8))
+
+    def _encode_spooled(self):
+        """Encode the spooled frames into the videos, one frame in memory at a time, and remove the spool files."""
+        for kind, (shape, dtype) in self._spool_frames.items():
+            path = os.path.join(self.save_dir, _SPOOL_FILES[kind])
+            frame_nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(path, "rb") as f:
+                while chunk := f.read(frame_nbytes):
+                    self._encode_frame(kind, np.frombuffer(chunk, dtype=dtype).reshape(shape))
+            os.remove(path)
+        self._spool_frames = {}
+
+    def append(self, state: EnvState):
+        """Append the state of the next timestep, in the v3 nested format."""
+        if self._robot_name is None:
+            # Get the main robot name (assuming first robot in first state)
+            self._robot_name = next(iter(state["robots"].keys()))
+            # Get the main camera name (assuming first camera in first state)
+            self._camera_name = next(iter(state["cameras"].keys()))
+            self._has_dof_pos_target = state["robots"][self._robot_name].get("dof_pos_target", None) is not None
+
+        robot_state = state["robots"][self._robot_name]
+        camera_state = state["cameras"][self._camera_name]
+        row = {}
+
+        # Encode vision data
         if "rgb" in camera_state:
-            rgb = camera_state["rgb"].cpu().numpy()
-            rgbs.append(rgb)
+            self._write_frame("rgb", camera_state["rgb"].cpu().numpy())
 
         if "depth" in camera_state:
             depth = camera_state["depth"].cpu().numpy()
-            depths.append(_normalize_depth(depth))
-            jsondata["depth_min"].append(depth.min().item())
-            jsondata["depth_max"].append(depth.max().item())
+            self._write_frame("depth", _normalize_depth(depth))
+            row["depth_min"] = depth.min().item()
+            row["depth_max"] = depth.max().item()
 
         # Extract camera data
-        jsondata["cam_pos"].append(camera_state["cam_pos"].tolist() if "cam_pos" in camera_state else [])
-        jsondata["cam_look_at"].append(camera_state["cam_look_at"].tolist() if "cam_look_at" in camera_state else [])
-        jsondata["cam_intr"].append(camera_state["cam_intr"].tolist() if "cam_intr" in camera_state else [])
-        jsondata["cam_extr"].append(camera_state["cam_extr"].tolist() if "cam_extr" in camera_state else [])
+        for key in ("cam_pos", "cam_look_at", "cam_intr", "cam_extr"):
+            row[key] = camera_state[key].tolist() if key in camera_state else []
 
         # Extract robot data
-        jsondata["joint_qpos"].append([robot_state["dof_pos"][k] for k in sorted(robot_state["dof_pos"].keys())])
-
-        # For targets, handle them in the same way as the original function
-        ## XXX
-        if next(iter(demo[0]["robots"].values())).get("dof_pos_target", None) is not None:
-            if i < len(demo) - 1:
-                next_robot_state = demo[i + 1]["robots"][robot_name]
-                target_dof_pos = [
-                    next_robot_state["dof_pos_target"][k] for k in sorted(next_robot_state["dof_pos_target"].keys())
-                ]
-            else:
-                # For the last timestep, use the same target as the current state
-                target_dof_pos = [
-                    robot_state["dof_pos_target"][k] for k in sorted(robot_state["dof_pos_target"].keys())
-                ]
-        else:
-            target_dof_pos = None
-
-        jsondata["joint_qpos_target"].append(target_dof_pos)
+        joint_names = sorted(robot_state["dof_pos"].keys())
+        row["joint_qpos"] = [robot_state["dof_pos"][k] for k in joint_names]
+        if self._has_dof_pos_target:
+            row["dof_pos_target"] = [
+                robot_state["dof_pos_target"][k] for k in sorted(robot_state["dof_pos_target"].keys())
+            ]
 
         # Extract EE state (position, rotation, last joint)
-        # Assuming ee_state is available in the state
         ee_pos = robot_state["pos"]
         ee_rot = robot_state["rot"]
-        last_joint_pos = robot_state["dof_pos"][sorted(robot_state["dof_pos"].keys())[-1]]
-        robot_ee_state = torch.cat([ee_pos, ee_rot, torch.tensor([last_joint_pos], device=ee_pos.device)]).tolist()
-        jsondata["robot_ee_state"].append(robot_ee_state)
-
-        # Set robot_ee_state_target
-        if i < len(demo) - 1:
-            next_robot_state = demo[i + 1]["robots"][robot_name]
-            next_ee_pos = next_robot_state["pos"]
-            next_ee_rot = next_robot_state["rot"]
-            next_last_joint_pos = next_robot_state["dof_pos"][sorted(next_robot_state["dof_pos"].keys())[-1]]
-            next_robot_ee_state = torch.cat([next_ee_pos, next_ee_rot, torch.tensor([next_last_joint_pos])]).tolist()
-            jsondata["robot_ee_state_target"].append(next_robot_ee_state)
-        else:
-            jsondata["robot_ee_state_target"].append(robot_ee_state)
-
-        # Extract root and body state
-        jsondata["robot_root_state"].append(
-            torch.cat([robot_state["pos"], robot_state["rot"], robot_state["vel"], robot_state["ang_vel"]]).tolist()
-        )
-
-    # Save video files
-    if rgbs:
-        iio.mimsave(os.path.join(save_dir, "rgb.mp4"), rgbs, fps=30, quality=10)
-
-    if depths:
-        write_16bit_depth_video(os.path.join(save_dir, "depth_uint16.mkv"), depths, fps=30)
-        iio.mimsave(
-            os.path.join(save_dir, "depth_uint8.mp4"),
-            [(depth * 255).astype(np.uint8) for depth in depths],
-            fps=30,
-            quality=10,
-        )
-
-    # Save metadata
-    json.dump(jsondata, open(os.path.join(save_dir, "metadata.json"), "w"))
-    pkl.dump(jsondata, open(os.path.join(save_dir, "metadata.pkl"), "wb"))
-
-    # Mark as finished
-    with open(os.path.join(save_dir, "status.txt"), "w+") as f:
-        f.write("success")
+        last_joint_pos = robot_state["dof_pos"][joint_names[-1]]
+        row["robot_ee_state"] = torch.cat([
+            ee_pos,
+            ee_rot,
+            torch.tensor([last_joint_pos], device=ee_pos.device),
+        ]).tolist()
+
+        # Extract root state
+        row["robot_root_state"] = torch.cat([
+            robot_state["pos"],
+            robot_state["rot"],
+            robot_state["vel"],
+            robot_state["ang_vel"],
+        ]).tolist()
+
+        # Targets of a timestep are the states of the next timestep
+        if self._pending is not None:
+            self._complete_row(self._pending, row)
+        self._pending = row
+        self.num_steps += 1
+
+    def _complete_row(self, row: dict, next_row: dict):
+        row["joint_qpos_target"] = next_row.get("dof_pos_target") if self._has_dof_pos_target else None
+        row.pop("dof_pos_target", None)
+        row["robot_ee_state_target"] = next_row["robot_ee_state"]
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        with open(self._rows_path, "a") as f:
+            for row in self._rows:
+                f.write(json.dumps(row) + "\n")
+        self._rows = []
+
+    def _close_videos(self):
+        for writer in (self._rgb_writer, self._depth_uint8_writer, self._depth_uint16_writer):
+            if writer is not None:
+                writer.close()
+        self._rgb_writer = self._depth_uint8_writer = self._depth_uint16_writer = None
+        self._release_streaming()
+
+    def finalize(self):
+        """Finish the videos, write ``metadata.json`` and mark the demo as successful.
+
+        Every file is written to a temporary path and renamed, so an interrupted finalize never leaves a demo that
+        looks complete.
+        """
+        assert self._pending is not None, "Cannot finalize an empty demo"
+        # For the last timestep, use the same target as the current state
+        self._complete_row(self._pending, self._pending)
+        self._pending = None
+        self._flush_rows()
+        self._encode_spooled()
+        self._close_videos()
+
+        jsondata = {key: [] for key in _METADATA_KEYS}
+        with open(self._rows_path) as f:
+            for line in f:
+                row = json.loads(line)
+                for key, value in row.items():
+                    jsondata[key].append(value)
+
+        # Save metadata
+        metadata_path = os.path.join(self.save_dir, "metadata.json")
+        with open(metadata_path + ".tmp", "w") as f:
+            json.dump(jsondata, f)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        os.remove(self._rows_path)
+
+        # Mark as finished
+        status_path = os.path.join(self.save_dir, "status.txt")
+        with open(status_path + ".tmp", "w+") as f:
+            f.write("success")
+        os.replace(status_path + ".tmp", status_path)
+
+    def abort(self):
+        """Stop writing and remove the partial data of the demo."""
+        self._close_videos()
+        self._rows = []
+        self._pending = None
+        self._spool_frames = {}
+        for filename in (
+            "metadata.partial.jsonl",
+            "rgb.mp4",
+            "depth_uint8.mp4",
+            "depth_uint16.mkv",
+            *_SPOOL_FILES.values(),
+        ):
+            path = os.path.join(self.save_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def save_demo_v2(save_dir: str, demo: list[EnvState]):
+    """Save a demo to a directory.
+
+    Args:
+        save_dir: The directory to save the demo.
+        demo: The demo to save.
+    """
+    writer = DemoWriterV2(save_dir)
+    for state in demo:
+        writer.append(state)
+    writer.finalize()
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field, fields
 from itertools import chain
+from typing import Any, Callable
 
 import torch
 from loguru import logger as log
@@ -139,6 +141,10 @@ class TensorState:
     """States of Extra information"""
 
 
+STATE_CATEGORIES = ("objects", "robots", "cameras", "sensors")
+"""Names of the per-entity fields of :class:`TensorState`."""
+
+
 def join_tensor_states(tensor_states: list[TensorState]) -> TensorState:
     """Join a list of tensor states with num_envs = 1 into a single tensor state."""
     rst = TensorState(objects={}, robots={}, cameras={}, sensors={})
@@ -225,110 +231,200 @@ def join_tensor_states(tensor_states: list[TensorState]) -> TensorState:
     return rst
 
 
-def _dof_tensor_to_dict(dof_tensor: torch.Tensor, joint_names: list[str]) -> dict[str, float]:
-    """Convert a DOF tensor to a dictionary of joint positions."""
-    joint_names = sorted(joint_names)
-    return {jn: dof_tensor[i].item() for i, jn in enumerate(joint_names)}
+def slice_tensor_state(tensor_state: TensorState, env_ids: list[int] | torch.Tensor) -> TensorState:
+    """Select the given environments from a tensor state. Non-tensor fields are shared with the input state."""
 
+    def _slice(item):
+        return type(item)(**{
+            f.name: getattr(item, f.name)[env_ids]
+            if isinstance(getattr(item, f.name), torch.Tensor)
+            else getattr(item, f.name)
+            for f in fields(item)
+        })
 
-def _body_tensor_to_dict(body_tensor: torch.Tensor, body_names: list[str]) -> dict[str, float]:
-    """Convert a body tensor to a dictionary of body positions."""
-    body_names = sorted(body_names)
-    return {
-        bn: {
-            "pos": body_tensor[i][:3].cpu(),
-            "rot": body_tensor[i][3:7].cpu(),
-            "vel": body_tensor[i][7:10].cpu(),
-            "ang_vel": body_tensor[i][10:13].cpu(),
-        }
-        for i, bn in enumerate(body_names)
-    }
+    return TensorState(
+        objects={k: _slice(v) for k, v in tensor_state.objects.items()},
+        robots={k: _slice(v) for k, v in tensor_state.robots.items()},
+        cameras={k: _slice(v) for k, v in tensor_state.cameras.items()},
+        sensors={k: _slice(v) for k, v in tensor_state.sensors.items()},
+        extras=tensor_state.extras,
+    )
 
 
-def state_tensor_to_nested(handler: BaseSimHandler, tensor_state: TensorState) -> list[EnvState]:
-    """Convert a tensor state to a list of env states. All the tensors will be converted to cpu for compatibility."""
-    log.warning(
-        "Users please ignore this message, we are working on it. For developers: You are using the very inefficient function to convert the tensorized states to old nested states. Please consider not using this function and optimize your code when number of environments is large."
+def scatter_tensor_state(
+    tensor_state: TensorState, env_ids: list[int], num_envs: int, base: TensorState | None = None
+) -> TensorState:
+    """Expand a tensor state whose rows correspond to ``env_ids`` into a tensor state of ``num_envs`` environments.
+
+    This is the inverse of :func:`slice_tensor_state`. Rows of environments not in ``env_ids`` are copied from
+    ``base`` if it has the same field, and filled with zeros otherwise. ``base`` is never modified.
+    """
+
+    def _scatter(item, base_item):
+        kwargs = {}
+        for f in fields(item):
+            value = getattr(item, f.name)
+            if isinstance(value, torch.Tensor):
+                base_value = getattr(base_item, f.name, None)
+                if isinstance(base_value, torch.Tensor) and base_value.shape[1:] == value.shape[1:]:
+                    full = base_value.clone()
+                else:
+                    full = value.new_zeros((num_envs, *value.shape[1:]))
+                full[env_ids] = value.to(full.device)
+                value = full
+            kwargs[f.name] = value
+        return type(item)(**kwargs)
+
+    def _scatter_category(category):
+        base_items = getattr(base, category) if base is not None else {}
+        return {k: _scatter(v, base_items.get(k)) for k, v in getattr(tensor_state, category).items()}
+
+    return TensorState(
+        objects=_scatter_category("objects"),
+        robots=_scatter_category("robots"),
+        cameras=_scatter_category("cameras"),
+        sensors=_scatter_category("sensors"),
+        extras=tensor_state.extras,
     )
 
-    num_envs = next(iter(chain(tensor_state.objects.values(), tensor_state.robots.values()))).root_state.shape[0]
-    env_states = []
-    for env_id in range(num_envs):
-        object_states = {}
-        for obj_name, obj_state in tensor_state.objects.items():
-            object_states[obj_name] = {
-                "pos": obj_state.root_state[env_id, :3].cpu(),
-                "rot": obj_state.root_state[env_id, 3:7].cpu(),
-                "vel": obj_state.root_state[env_id, 7:10].cpu(),
-                "ang_vel": obj_state.root_state[env_id, 10:13].cpu(),
-            }
-            if obj_state.body_state is not None:
-                bns = handler.get_body_names(obj_name)
-                object_states[obj_name]["body"] = _body_tensor_to_dict(obj_state.body_state[env_id], bns)
-            if obj_state.joint_pos is not None:
-                jns = handler.get_joint_names(obj_name)
-                object_states[obj_name]["dof_pos"] = _dof_tensor_to_dict(obj_state.joint_pos[env_id], jns)
-            if obj_state.joint_vel is not None:
-                jns = handler.get_joint_names(obj_name)
-                object_states[obj_name]["dof_vel"] = _dof_tensor_to_dict(obj_state.joint_vel[env_id], jns)
-
-        robot_states = {}
-        for robot_name, robot_state in tensor_state.robots.items():
-            jns = handler.get_joint_names(robot_name)
-            robot_states[robot_name] = {
-                "pos": robot_state.root_state[env_id, :3].cpu(),
-                "rot": robot_state.root_state[env_id, 3:7].cpu(),
-                "vel": robot_state.root_state[env_id, 7:10].cpu(),
-                "ang_vel": robot_state.root_state[env_id, 10:13].cpu(),
-            }
-            robot_states[robot_name]["dof_pos"] = _dof_tensor_to_dict(robot_state.joint_pos[env_id], jns)
-            robot_states[robot_name]["dof_vel"] = _dof_tensor_to_dict(robot_state.joint_vel[env_id], jns)
-            robot_states[robot_name]["dof_pos_target"] = (
-                _dof_tensor_to_dict(robot_state.joint_pos_target[env_id], jns)
-                if robot_state.joint_pos_target is not None
-                else None
-            )
-            robot_states[robot_name]["dof_vel_target"] = (
-                _dof_tensor_to_dict(robot_state.joint_vel_target[env_id], jns)
-                if robot_state.joint_vel_target is not None
-                else None
-            )
-            robot_states[robot_name]["dof_torque"] = (
-                _dof_tensor_to_dict(robot_state.joint_effort_target[env_id], jns)
-                if robot_state.joint_effort_target is not None
-                else None
-            )
-            if robot_state.body_state is not None:
-                bns = handler.get_body_names(robot_name)
-                robot_states[robot_name]["body"] = _body_tensor_to_dict(robot_state.body_state[env_id], bns)
-
-        camera_states = {}
-        for camera_name, camera_state in tensor_state.cameras.items():
-            camera_states[camera_name] = {
-                "rgb": camera_state.rgb[env_id].cpu(),
-                "depth": camera_state.depth[env_id].cpu(),
+
+############################################################
+## Nested state <-> tensor state conversion
+############################################################
+_ROOT_SLICES = {"pos": slice(0, 3), "rot": slice(3, 7), "vel": slice(7, 10), "ang_vel": slice(10, 13)}
+"""Slices of the nested root state keys in ``root_state`` and ``body_state``."""
+
+_DOF_FIELDS = {
+    "dof_pos": "joint_pos",
+    "dof_vel": "joint_vel",
+    "dof_pos_target": "joint_pos_target",
+    "dof_vel_target": "joint_vel_target",
+    "dof_torque": "joint_effort_target",
+}
+"""Mapping from nested dof keys to the corresponding tensor state fields."""
+
+_nested_warning_logged = False
+
+
+def _joint_index(handler: BaseSimHandler, obj_name: str) -> tuple[list[str], dict[str, int]]:
+    """Sorted joint names of an object and their column in the joint tensors. Cached on the handler."""
+    if not hasattr(handler, "_state_joint_index_cache"):
+        handler._state_joint_index_cache = {}
+    if obj_name not in handler._state_joint_index_cache:
+        joint_names = sorted(handler.get_joint_names(obj_name))
+        handler._state_joint_index_cache[obj_name] = (joint_names, {jn: i for i, jn in enumerate(joint_names)})
+    return handler._state_joint_index_cache[obj_name]
+
+
+def _body_index(handler: BaseSimHandler, obj_name: str) -> tuple[list[str], dict[str, int]]:
+    """Sorted body names of an object and their row in the body tensors. Cached on the handler."""
+    if not hasattr(handler, "_state_body_index_cache"):
+        handler._state_body_index_cache = {}
+    if obj_name not in handler._state_body_index_cache:
+        body_names = sorted(handler.get_body_names(obj_name))
+        handler._state_body_index_cache[obj_name] = (body_names, {bn: i for i, bn in enumerate(body_names)})
+    return handler._state_body_index_cache[obj_name]
+
+
+def _object_tensor_to_nested(
+    handler: BaseSimHandler, obj_name: str, obj_state: ObjectState | RobotState, num_envs: int
+) -> list[dict]:
+    """Convert the state of one object to a nested dict per env, with one device transfer per tensor."""
+    root = obj_state.root_state.detach().cpu()
+    rst = [{key: root[env_id, sl] for key, sl in _ROOT_SLICES.items()} for env_id in range(num_envs)]
+
+    if obj_state.body_state is not None:
+        body_names, _ = _body_index(handler, obj_name)
+        body = obj_state.body_state.detach().cpu()
+        for env_id in range(num_envs):
+            rst[env_id]["body"] = {
+                bn: {key: body[env_id, i, sl] for key, sl in _ROOT_SLICES.items()} for i, bn in enumerate(body_names)
             }
 
-        env_state = {
-            "objects": object_states,
-            "robots": robot_states,
-            "cameras": camera_states,
-        }
-        env_states.append(env_state)
+    for key, field_name in _DOF_FIELDS.items():
+        if not hasattr(obj_state, field_name):
+            continue
+        value = getattr(obj_state, field_name)
+        if value is None:
+            ## Robots always have the dof keys, objects only have them when available
+            if isinstance(obj_state, RobotState):
+                for env_id in range(num_envs):
+                    rst[env_id][key] = None
+            continue
+        joint_names, _ = _joint_index(handler, obj_name)
+        for env_id, row in enumerate(value.detach().cpu().tolist()):
+            rst[env_id][key] = dict(zip(joint_names, row))
+
+    return rst
+
+
+def state_tensor_to_nested(handler: BaseSimHandler, tensor_state: TensorState) -> list[EnvState]:
+    """Convert a tensor state to a list of env states. All the tensors will be converted to cpu for compatibility.
+
+    Each tensor is transferred to cpu once, and the joint and body names are resolved once per handler. To read a few
+    values without building the per-env dicts, use :func:`nested_state_view` instead.
+    """
+    global _nested_warning_logged
+    if not _nested_warning_logged:
+        log.warning(
+            "Users please ignore this message, we are working on it. For developers: You are using the inefficient function to convert the tensorized states to old nested states. Please consider using `nested_state_view` or the tensor states directly when number of environments is large."
+        )
+        _nested_warning_logged = True
+
+    num_envs = next(iter(chain(tensor_state.objects.values(), tensor_state.robots.values()))).root_state.shape[0]
+    env_states = [{"objects": {}, "robots": {}, "cameras": {}} for _ in range(num_envs)]
+
+    for category in ("objects", "robots"):
+        for obj_name, obj_state in getattr(tensor_state, category).items():
+            for env_id, nested in enumerate(_object_tensor_to_nested(handler, obj_name, obj_state, num_envs)):
+                env_states[env_id][category][obj_name] = nested
+
+    for camera_name, camera_state in tensor_state.cameras.items():
+        rgb = camera_state.rgb.cpu() if camera_state.rgb is not None else None
+        depth = camera_state.depth.cpu() if camera_state.depth is not None else None
+        for env_id in range(num_envs):
+            env_states[env_id]["cameras"][camera_name] = {
+                "rgb": rgb[env_id] if rgb is not None else None,
+                "depth": depth[env_id] if depth is not None else None,
+            }
 
     return env_states
 
 
-def _alloc_state_tensors(n_env: int, n_body: int | None = None, n_jnt: int | None = None, device="gpu"):
-    root = torch.zeros((n_env, 13), device=device)
+def _stack_vectors(values: list, size: int) -> torch.Tensor:
+    """Stack per-env vectors (tensors, arrays or lists) into a (num_envs, size) float tensor. None becomes zeros."""
+    zeros = torch.zeros(size)
+    return torch.stack([
+        torch.as_tensor(v, dtype=torch.float32).cpu().reshape(size) if v is not None else zeros for v in values
+    ])
+
 
-    n_body = n_body or 0
-    body = torch.zeros((n_env, n_body, 13), device=device) if n_body else None
+def _stack_dofs(dof_dicts: list[dict | None], joint_names: list[str]) -> torch.Tensor:
+    """Stack per-env ``{joint_name: value}`` dicts into a (num_envs, num_joints) tensor. Missing joints are zeros."""
+    return torch.tensor(
+        [[float(d.get(jn, 0.0)) for jn in joint_names] if d else [0.0] * len(joint_names) for d in dof_dicts],
+        dtype=torch.float32,
+    ).reshape(len(dof_dicts), len(joint_names))
 
-    n_jnt = n_jnt or 0
-    jpos = torch.zeros((n_env, n_jnt), device=device) if n_jnt else None
-    jvel = torch.zeros_like(jpos) if jpos is not None else None
-    return root, body, jpos, jvel
+
+def _nested_to_root_tensor(states: list[dict | None]) -> torch.Tensor:
+    """Stack nested ``pos``/``rot``/``vel``/``ang_vel`` of every env into a (num_envs, 13) tensor."""
+    return torch.cat(
+        [
+            _stack_vectors([s.get(key) if s else None for s in states], sl.stop - sl.start)
+            for key, sl in _ROOT_SLICES.items()
+        ],
+        dim=-1,
+    )
+
+
+def _nested_to_body_tensor(states: list[dict | None], body_names: list[str]) -> torch.Tensor:
+    """Stack nested ``body`` dicts of every env into a (num_envs, num_bodies, 13) tensor. Missing bodies are zeros."""
+    bodies = [s.get("body") if s else None for s in states]
+    return torch.stack(
+        [_nested_to_root_tensor([b.get(bn) if b else None for b in bodies]) for bn in body_names],
+        dim=1,
+    )
 
 
 def list_state_to_tensor(
@@ -336,126 +432,61 @@ def list_state_to_tensor(
     env_states: list[dict],
     device: torch.device | str = "cpu",
 ) -> TensorState:
-    """Convert nested python list-states to a batched TensorState."""
+    """Convert nested python list-states to a batched TensorState.
+
+    Values are gathered per field across all envs and transferred to ``device`` once per tensor.
+    """
     obj_names = sorted({n for es in env_states for n in es["objects"].keys()})
     robot_names = sorted({n for es in env_states for n in es["robots"].keys()})
     cam_names = sorted({n for es in env_states if "cameras" in es for n in es["cameras"].keys()})
 
-    n_env = len(env_states)
-    dev = device
-
     objects: dict[str, ObjectState] = {}
     robots: dict[str, RobotState] = {}
     cameras: dict[str, CameraState] = {}
 
     # -------- objects --------------------------------------------------
     for name in obj_names:
-        bnames = handler.get_body_names(name)
-        jnames = handler.get_joint_names(name)
-
-        root, body, jpos, jvel = _alloc_state_tensors(n_env, len(bnames) or None, len(jnames) or None, dev)
-
-        for e, es in enumerate(env_states):
-            if name not in es["objects"]:
-                continue
-            s = es["objects"][name]
-
-            vel = s.get("vel", torch.zeros(3, device=dev))
-            ang_vel = s.get("ang_vel", torch.zeros(3, device=dev))
-
-            root[e, :3] = s["pos"]
-            root[e, 3:7] = s["rot"]
-            root[e, 7:10] = vel
-            root[e, 10:13] = ang_vel
-
-            if body is not None and "body" in s:
-                for i, bn in enumerate(sorted(bnames)):
-                    if bn not in s["body"]:
-                        continue
-                    bi = s["body"][bn]
-                    body[e, i, :3], body[e, i, 3:7] = bi["pos"], bi["rot"]
-                    body[e, i, 7:10], body[e, i, 10:13] = bi["vel"], bi["ang_vel"]
-
-            if jpos is not None and "dof_pos" in s:
-                for i, jn in enumerate(sorted(jnames)):
-                    if jn in s["dof_pos"]:
-                        jpos[e, i] = s["dof_pos"][jn]
-            if jvel is not None and "dof_vel" in s:
-                for i, jn in enumerate(sorted(jnames)):
-                    if jn in s["dof_vel"]:
-                        jvel[e, i] = s["dof_vel"][jn]
-
-        objects[name] = ObjectState(root_state=root, body_state=body, joint_pos=jpos, joint_vel=jvel)
+        states = [es["objects"].get(name) for es in env_states]
+        body_names, _ = _body_index(handler, name)
+        joint_names, _ = _joint_index(handler, name)
+
+        body = _nested_to_body_tensor(states, body_names).to(device) if body_names else None
+        jpos = _stack_dofs([s.get("dof_pos") if s else None for s in states], joint_names) if joint_names else None
+        jvel = _stack_dofs([s.get("dof_vel") if s else None for s in states], joint_names) if joint_names else None
+        objects[name] = ObjectState(
+            root_state=_nested_to_root_tensor(states).to(device),
+            body_state=body,
+            joint_pos=jpos.to(device) if jpos is not None else None,
+            joint_vel=jvel.to(device) if jvel is not None else None,
+        )
 
     # -------- robots ---------------------------------------------------
     for name in robot_names:
-        jnames = handler.get_joint_names(name)
-        bnames = handler.get_body_names(name)
-
-        root, body, jpos, jvel = _alloc_state_tensors(n_env, len(bnames) or None, len(jnames) or None, dev)
-        jpos_t, jvel_t, jeff_t = (
-            torch.zeros_like(jpos) if jpos is not None else None,
-            torch.zeros_like(jvel) if jvel is not None else None,
-            torch.zeros_like(jvel) if jvel is not None else None,
-        )
-
-        for e, es in enumerate(env_states):
-            if name not in es["robots"]:
-                continue
-            s = es["robots"][name]
-
-            pos = s["pos"]
-            rot = s["rot"]
-            vel = s.get("vel", torch.zeros(3, device=dev))
-            ang_vel = s.get("ang_vel", torch.zeros(3, device=dev))
-
-            root[e, :3] = pos
-            root[e, 3:7] = rot
-            root[e, 7:10] = vel
-            root[e, 10:13] = ang_vel
-            for i, jn in enumerate(sorted(jnames)):
-                if "dof_pos" in s and jn in s["dof_pos"]:
-                    jpos[e, i] = s["dof_pos"][jn]
-                if "dof_vel" in s and jn in s["dof_vel"]:
-                    jvel[e, i] = s["dof_vel"][jn]
-                if "dof_pos_target" in s and jn in s["dof_pos_target"]:
-                    jpos_t[e, i] = s["dof_pos_target"][jn]
-                if "dof_vel_target" in s and jn in s["dof_vel_target"]:
-                    jvel_t[e, i] = s["dof_vel_target"][jn]
-                if "dof_torque" in s and jn in s["dof_torque"]:
-                    jeff_t[e, i] = s["dof_torque"][jn]
-
-            if body is not None and "body" in s:
-                for i, bn in enumerate(sorted(bnames)):
-                    if bn not in s["body"]:
-                        continue
-                    bi = s["body"][bn]
-                    body[e, i, :3], body[e, i, 3:7], body[e, i, 7:10], body[e, i, 10:13] = (
-                        bi["pos"],
-                        bi["rot"],
-                        bi["vel"],
-                        bi["ang_vel"],
-                    )
-
+        states = [es["robots"].get(name) for es in env_states]
+        body_names, _ = _body_index(handler, name)
+        joint_names, _ = _joint_index(handler, name)
+
+        dofs = {
+            field_name: _stack_dofs([s.get(key) if s else None for s in states], joint_names).to(device)
+            if joint_names
+            else None
+            for key, field_name in _DOF_FIELDS.items()
+        }
         robots[name] = RobotState(
-            root_state=root,
-            body_names=bnames,
-            body_state=body,
-            joint_pos=jpos,
-            joint_vel=jvel,
-            joint_pos_target=jpos_t,
-            joint_vel_target=jvel_t,
-            joint_effort_target=jeff_t,
+            root_state=_nested_to_root_tensor(states).to(device),
+            body_names=handler.get_body_names(name),
+            body_state=_nested_to_body_tensor(states, body_names).to(device) if body_names else None,
+            **dofs,
         )
 
     # -------- cameras ---------------------------------------------
     for cam in cam_names:
         rgb = torch.stack(
             [es["cameras"][cam]["rgb"] for es in env_states if "cameras" in es and cam in es["cameras"]], dim=0
-        ).to(dev)
+        ).to(device)
         depth = torch.stack(
             [es["cameras"][cam]["depth"] for es in env_states if "cameras" in es and cam in es["cameras"]], dim=0
-        ).to(dev)
+        ).to(device)
         cameras[cam] = CameraState(rgb=rgb, depth=depth)
 
     return TensorState(
@@ -464,3 +495,82 @@ def list_state_to_tensor(
         cameras=cameras,
         sensors={},
     )
+
+
+class _LazyMapping(Mapping):
+    """Read-only mapping with a fixed set of keys whose values are computed on access."""
+
+    def __init__(self, keys: list[str], getter: Callable[[str], Any]):
+        self._keys = keys
+        self._key_set = set(keys)
+        self._getter = getter
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._key_set:
+            raise KeyError(key)
+        return self._getter(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._keys})"
+
+
+def _object_view(handler: BaseSimHandler, obj_name: str, obj_state: ObjectState | RobotState, sel) -> Mapping:
+    dof_keys = [key for key, f in _DOF_FIELDS.items() if getattr(obj_state, f, None) is not None]
+    keys = list(_ROOT_SLICES.keys()) + (["body"] if obj_state.body_state is not None else []) + dof_keys
+
+    def get(key: str):
+        if key in _ROOT_SLICES:
+            return obj_state.root_state[sel, _ROOT_SLICES[key]]
+        if key == "body":
+            body_names, body_index = _body_index(handler, obj_name)
+            return _LazyMapping(
+                body_names,
+                lambda bn: _LazyMapping(
+                    list(_ROOT_SLICES.keys()),
+                    lambda k: obj_state.body_state[sel, body_index[bn], _ROOT_SLICES[k]],
+                ),
+            )
+        value = getattr(obj_state, _DOF_FIELDS[key])
+        joint_names, joint_index = _joint_index(handler, obj_name)
+        return _LazyMapping(joint_names, lambda jn: value[sel, joint_index[jn]])
+
+    return _LazyMapping(keys, get)
+
+
+def nested_state_view(handler: BaseSimHandler, tensor_state: TensorState, env_id: int | None = None) -> Mapping:
+    """Get a read-only dict-like view of a tensor state that follows the nested :class:`metasim.types.EnvState` layout.
+
+    Nothing is copied or moved to cpu: every leaf is a slice of the underlying tensors, computed on access.
+
+    Args:
+        handler: The handler that produced the state, used to resolve joint and body names.
+        tensor_state: The tensor state.
+        env_id: If given, leaves are the values of that environment. If None, leaves keep the leading
+            ``num_envs`` dimension.
+
+    Example:
+        >>> view = nested_state_view(handler, handler.get_states())
+        >>> view["robots"]["franka"]["dof_pos"]["panda_joint1"]  # shape (num_envs,)
+        >>> views = [nested_state_view(handler, states, i) for i in range(handler.num_envs)]  # like list[EnvState]
+    """
+    sel = slice(None) if env_id is None else env_id
+
+    def category_view(category: str) -> Mapping:
+        items = getattr(tensor_state, category)
+        if category == "cameras":
+            return _LazyMapping(
+                list(items.keys()),
+                lambda name: {
+                    "rgb": items[name].rgb[sel] if items[name].rgb is not None else None,
+                    "depth": items[name].depth[sel] if items[name].depth is not None else None,
+                },
+            )
+        return _LazyMapping(list(items.keys()), lambda name: _object_view(handler, name, items[name], sel))
+
+    return _LazyMapping(["objects", "robots", "cameras"], category_view)
@@ -0,0 +1,163 @@
+"""Unit tests for the columnar trajectory format."""
+
+from __future__ import annotations
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from metasim.utils.demo_util.columnar import (
+    ColumnarTraj,
+    LazyDemos,
+    columnar_traj_path,
+    convert_traj_file_to_columnar,
+    get_traj_columnar,
+    is_columnar_fresh,
+    save_traj_columnar,
+)
+from metasim.utils.demo_util.demo_util_v2 import get_traj_v2
+from metasim.utils.demo_util.loader import save_traj_file
+
+ROBOT = "franka"
+JOINTS = ["panda_joint1", "panda_joint2", "panda_finger_joint1"]
+
+
+def _obj_state(step: int, offset: float, joints: list[str] | None = None) -> dict:
+    state = {"pos": [offset + step, 0.5, -0.25], "rot": [1.0, 0.0, 0.0, 0.0]}
+    if joints is not None:
+        state["dof_pos"] = {jn: 0.1 * i + step for i, jn in enumerate(joints)}
+    return state
+
+
+def _make_demo(demo_idx: int, num_steps: int) -> dict:
+    def state(step):
+        states = {"cube": _obj_state(step, demo_idx), ROBOT: _obj_state(step, 10 + demo_idx, JOINTS)}
+        if step % 2 == 0:
+            ## A key present in some steps only
+            states["drawer"] = _obj_state(step, 20, ["slide"])
+        return states
+
+    return {
+        "init_state": state(0),
+        "actions": [{"dof_pos_target": {jn: 0.01 * step for jn in JOINTS}} for step in range(num_steps)],
+        "states": [state(step) for step in range(num_steps)],
+        "extra": {"demo": demo_idx},
+    }
+
+
+def _to_lists(value):
+    """Turn the tensors of a nested demo into lists, for comparison."""
+    if isinstance(value, dict):
+        return {k: _to_lists(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_lists(v) for v in value]
+    if isinstance(value, torch.Tensor):
+        return value.tolist()
+    return value
+
+
+@pytest.fixture
+def traj_file(tmp_path):
+    """Write a v2 trajectory file of three demos of different lengths."""
+    path = str(tmp_path / "trajectory-franka_v2.pkl")
+    save_traj_file({ROBOT: [_make_demo(i, n) for i, n in enumerate([3, 5, 1])]}, path)
+    return path
+
+
+class TestColumnarRoundTrip:
+    """Test suite for converting trajectories to the columnar format and reading them back."""
+
+    def test_convert_and_decode(self, traj_file):
+        """Every demo decodes to the demo it was converted from."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        assert dst == columnar_traj_path(traj_file)
+        traj = ColumnarTraj(os.path.join(dst, ROBOT))
+        assert traj.num_demos == 3
+        for demo_idx, n in enumerate([3, 5, 1]):
+            demo = _make_demo(demo_idx, n)
+            assert traj.init_state(demo_idx) == demo["init_state"]
+            assert traj.actions(demo_idx) == demo["actions"]
+            assert traj.states(demo_idx) == demo["states"]
+            assert traj.extra(demo_idx) == demo["extra"]
+            assert traj.num_steps(demo_idx) == n
+
+    def test_matches_v2_loader(self, traj_file):
+        """get_traj_v2 returns the same demos from the columnar copy as from the source file."""
+        task = SimpleNamespace(traj_filepath=traj_file)
+        robot = SimpleNamespace(name=ROBOT)
+        expected = [_to_lists(list(x)) for x in get_traj_v2(task, robot)]
+
+        convert_traj_file_to_columnar(traj_file)
+        loaded = get_traj_v2(task, robot)
+        assert all(isinstance(x, LazyDemos) for x in loaded)
+        assert [_to_lists(list(x)) for x in loaded] == expected
+
+    def test_save_v3_demos(self, tmp_path):
+        """Demos in the v3 format are stored in the v2 layout."""
+        demo = _make_demo(0, 2)
+        v3_state = {"objects": {"cube": demo["init_state"]["cube"]}, "robots": {ROBOT: demo["init_state"][ROBOT]}}
+        path = str(tmp_path / "demo.traj")
+        save_traj_columnar(path, ROBOT, [v3_state], [[{ROBOT: a} for a in demo["actions"]]])
+        init_states, all_actions, all_states = get_traj_columnar(path, ROBOT)
+        assert _to_lists(init_states[0]) == {"cube": demo["init_state"]["cube"], ROBOT: demo["init_state"][ROBOT]}
+        assert all_actions[0] == demo["actions"]
+        assert all_states is None
+
+    def test_lazy_demos(self, traj_file):
+        """Demos are decoded on access, cached, and slices share the cache."""
+        init_states, _, _ = get_traj_columnar(convert_traj_file_to_columnar(traj_file), ROBOT)
+        assert len(init_states) == 3
+        assert init_states[1] is init_states[1]
+        tail = init_states[1:]
+        assert len(tail) == 2
+        assert tail[0] is init_states[1]
+
+
+class TestColumnarFreshness:
+    """Test suite for detecting a columnar copy that no longer matches its source."""
+
+    def test_fresh_after_conversion(self, traj_file):
+        """A copy converted from the current source is fresh."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        assert is_columnar_fresh(dst, ROBOT, traj_file)
+
+    def test_missing_copy(self, traj_file):
+        """Without a copy there is nothing fresh to load."""
+        assert not is_columnar_fresh(columnar_traj_path(traj_file), ROBOT, traj_file)
+
+    def test_changed_source(self, traj_file):
+        """A source rewritten after the conversion makes the copy stale, and the loader falls back to it."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        save_traj_file({ROBOT: [_make_demo(7, 2)]}, traj_file)
+        assert not is_columnar_fresh(dst, ROBOT, traj_file)
+
+        init_states, _, _ = get_traj_v2(SimpleNamespace(traj_filepath=traj_file), SimpleNamespace(name=ROBOT))
+        assert len(init_states) == 1
+        assert init_states[0]["cube"]["pos"].tolist() == [7.0, 0.5, -0.25]
+
+    def test_touched_source(self, traj_file):
+        """A source whose mtime changed makes the copy stale."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        st = os.stat(traj_file)
+        os.utime(traj_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert not is_columnar_fresh(dst, ROBOT, traj_file)
+
+    def test_copy_without_source(self, traj_file):
+        """A copy whose source is gone is the only copy, and is used."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        os.remove(traj_file)
+        assert is_columnar_fresh(dst, ROBOT, traj_file)
+
+    def test_copy_without_recorded_source(self, traj_file):
+        """A copy that does not record its source is not trusted while the source exists."""
+        dst = convert_traj_file_to_columnar(traj_file)
+        meta_path = os.path.join(dst, ROBOT, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        del meta["source"]
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        assert not is_columnar_fresh(dst, ROBOT, traj_file)
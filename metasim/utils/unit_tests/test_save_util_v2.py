@@ -0,0 +1,191 @@
+"""Unit tests for the streaming writer of v2 demos."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import imageio as iio
+import numpy as np
+import pytest
+import torch
+
+from metasim.utils.io_util import read_16bit_depth_video, write_16bit_depth_video
+from metasim.utils.save_util.save_util_v2 import DemoWriterV2, save_demo_v2
+
+ROBOT = "franka"
+JOINTS = ["panda_joint2", "panda_joint1", "panda_finger_joint1"]
+HEIGHT, WIDTH = 48, 64
+
+
+def _make_demo(num_steps: int, seed: int = 0) -> list[dict]:
+    generator = torch.Generator().manual_seed(seed)
+
+    def rand(*shape):
+        return torch.rand(*shape, generator=generator)
+
+    demo = []
+    for _ in range(num_steps):
+        robot = {
+            "pos": rand(3),
+            "rot": rand(4),
+            "vel": rand(3),
+            "ang_vel": rand(3),
+            "dof_pos": {jn: rand(1).item() for jn in JOINTS},
+            "dof_pos_target": {jn: rand(1).item() for jn in JOINTS},
+        }
+        camera = {
+            "rgb": (rand(HEIGHT, WIDTH, 3) * 255).to(torch.uint8),
+            "depth": rand(HEIGHT, WIDTH) * 3 + 0.5,
+            "cam_pos": rand(3),
+            "cam_look_at": rand(3),
+            "cam_intr": rand(3, 3),
+            "cam_extr": rand(4, 4),
+        }
+        demo.append({"objects": {}, "robots": {ROBOT: robot}, "cameras": {"camera0": camera}})
+    return demo
+
+
+def _reference_save_demo_v2(save_dir: str, demo: list[dict]) -> None:
+    """The v2 demo layout written in one pass over the whole demo, as before the streaming writer."""
+    os.makedirs(save_dir, exist_ok=True)
+    jsondata = {
+        key: []
+        for key in (
+            "depth_min",
+            "depth_max",
+            "cam_pos",
+            "cam_look_at",
+            "cam_intr",
+            "cam_extr",
+            "joint_qpos_target",
+            "joint_qpos",
+            "robot_ee_state",
+            "robot_ee_state_target",
+            "robot_root_state",
+            "robot_body_state",
+        )
+    }
+    rgbs, depths = [], []
+    for i, state in enumerate(demo):
+        robot_state = state["robots"][ROBOT]
+        camera_state = state["cameras"]["camera0"]
+        next_robot_state = demo[min(i + 1, len(demo) - 1)]["robots"][ROBOT]
+
+        rgbs.append(camera_state["rgb"].numpy())
+        depth = camera_state["depth"].numpy()
+        depths.append((depth - depth.min()) / (depth.max() - depth.min()))
+        jsondata["depth_min"].append(depth.min().item())
+        jsondata["depth_max"].append(depth.max().item())
+        for key in ("cam_pos", "cam_look_at", "cam_intr", "cam_extr"):
+            jsondata[key].append(camera_state[key].tolist())
+
+        joint_names = sorted(robot_state["dof_pos"])
+        jsondata["joint_qpos"].append([robot_state["dof_pos"][k] for k in joint_names])
+        jsondata["joint_qpos_target"].append([next_robot_state["dof_pos_target"][k] for k in joint_names])
+        for key, src in (("robot_ee_state", robot_state), ("robot_ee_state_target", next_robot_state)):
+            jsondata[key].append(
+                torch.cat([src["pos"], src["rot"], torch.tensor([src["dof_pos"][joint_names[-1]]])]).tolist()
+            )
+        jsondata["robot_root_state"].append(
+            torch.cat([robot_state["pos"], robot_state["rot"], robot_state["vel"], robot_state["ang_vel"]]).tolist()
+        )
+
+    iio.mimsave(os.path.join(save_dir, "rgb.mp4"), rgbs, fps=30, quality=10)
+    write_16bit_depth_video(os.path.join(save_dir, "depth_uint16.mkv"), depths, fps=30)
+    iio.mimsave(
+        os.path.join(save_dir, "depth_uint8.mp4"), [(d * 255).astype(np.uint8) for d in depths], fps=30, quality=10
+    )
+    with open(os.path.join(save_dir, "metadata.json"), "w") as f:
+        json.dump(jsondata, f)
+    with open(os.path.join(save_dir, "status.txt"), "w+") as f:
+        f.write("success")
+
+
+def _read_video(path: str) -> np.ndarray:
+    with iio.get_reader(path) as reader:
+        return np.stack(list(reader.iter_data()))
+
+
+def _assert_same_demo(actual_dir: str, expected_dir: str) -> None:
+    with open(os.path.join(actual_dir, "metadata.json")) as f:
+        actual = json.load(f)
+    with open(os.path.join(expected_dir, "metadata.json")) as f:
+        expected = json.load(f)
+    assert actual == expected
+    for video in ("rgb.mp4", "depth_uint8.mp4"):
+        np.testing.assert_array_equal(
+            _read_video(os.path.join(actual_dir, video)), _read_video(os.path.join(expected_dir, video))
+        )
+    np.testing.assert_array_equal(
+        np.stack(read_16bit_depth_video(os.path.join(actual_dir, "depth_uint16.mkv"))),
+        np.stack(read_16bit_depth_video(os.path.join(expected_dir, "depth_uint16.mkv"))),
+    )
+    with open(os.path.join(actual_dir, "status.txt")) as f:
+        assert f.read() == "success"
+    assert sorted(os.listdir(actual_dir)) == sorted(os.listdir(expected_dir))
+
+
+class TestDemoWriterV2:
+    """Test suite for the streaming v2 demo writer."""
+
+    @pytest.fixture
+    def demo(self):
+        """Create a demo longer than one chunk of rows."""
+        return _make_demo(num_steps=7)
+
+    @pytest.fixture
+    def reference_dir(self, tmp_path, demo):
+        """Save the demo with the one-pass reference."""
+        path = str(tmp_path / "reference")
+        _reference_save_demo_v2(path, demo)
+        return path
+
+    @pytest.mark.parametrize("max_streaming", [16, 0], ids=["streaming", "spooled"])
+    def test_matches_reference(self, tmp_path, monkeypatch, demo, reference_dir, max_streaming):
+        """Whether frames are encoded as they arrive or spooled, the demo matches the one-pass reference."""
+        monkeypatch.setattr(DemoWriterV2, "max_streaming", max_streaming)
+        path = str(tmp_path / "demo")
+        writer = DemoWriterV2(path, chunk_size=3)
+        for state in demo:
+            writer.append(state)
+        assert not os.path.exists(os.path.join(path, "status.txt"))
+        writer.finalize()
+
+        assert writer.num_steps == len(demo)
+        assert DemoWriterV2._num_streaming == 0
+        _assert_same_demo(path, reference_dir)
+
+    def test_save_demo_v2(self, tmp_path, demo, reference_dir):
+        """The one-call helper writes the same demo."""
+        path = str(tmp_path / "demo")
+        save_demo_v2(path, demo)
+        _assert_same_demo(path, reference_dir)
+
+    def test_streaming_slots_are_bounded(self, tmp_path, monkeypatch, demo):
+        """Demos beyond the limit spool their frames instead of keeping encoders open."""
+        monkeypatch.setattr(DemoWriterV2, "max_streaming", 1)
+        writers = [DemoWriterV2(str(tmp_path / f"demo_{i}")) for i in range(3)]
+        for writer in writers:
+            writer.append(demo[0])
+        assert [writer._streaming for writer in writers] == [True, False, False]
+        assert DemoWriterV2._num_streaming == 1
+        assert os.path.exists(os.path.join(writers[1].save_dir, "rgb.spool"))
+        for writer in writers:
+            writer.finalize()
+        assert DemoWriterV2._num_streaming == 0
+        for writer in writers:
+            assert not os.path.exists(os.path.join(writer.save_dir, "rgb.spool"))
+            assert len(_read_video(os.path.join(writer.save_dir, "rgb.mp4"))) == 1
+
+    @pytest.mark.parametrize("max_streaming", [16, 0], ids=["streaming", "spooled"])
+    def test_abort(self, tmp_path, monkeypatch, demo, max_streaming):
+        """Aborting removes the partial files and frees the streaming slot."""
+        monkeypatch.setattr(DemoWriterV2, "max_streaming", max_streaming)
+        path = str(tmp_path / "demo")
+        writer = DemoWriterV2(path, chunk_size=2)
+        for state in demo:
+            writer.append(state)
+        writer.abort()
+        assert os.listdir(path) == []
+        assert DemoWriterV2._num_streaming == 0
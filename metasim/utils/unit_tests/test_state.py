@@ -0,0 +1,165 @@
+"""Unit tests for the tensor state conversions, slicing and scattering."""
+
+from __future__ import annotations
+
+from dataclasses import fields
+
+import pytest
+import torch
+
+from metasim.utils.state import (
+    ObjectState,
+    RobotState,
+    TensorState,
+    list_state_to_tensor,
+    nested_state_view,
+    scatter_tensor_state,
+    slice_tensor_state,
+    state_tensor_to_nested,
+)
+
+NUM_ENVS = 5
+JOINT_NAMES = {"franka": ["panda_joint2", "panda_joint1", "panda_finger"], "drawer": ["slide"], "cube": []}
+BODY_NAMES = {"franka": ["panda_link1", "panda_hand", "panda_link0"], "drawer": [], "cube": []}
+
+
+class _NamesHandler:
+    """The part of a handler the conversions read: joint and body names, in simulator order."""
+
+    def get_joint_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        names = list(JOINT_NAMES[obj_name])
+        return sorted(names) if sort else names
+
+    def get_body_names(self, obj_name: str, sort: bool = True) -> list[str]:
+        names = list(BODY_NAMES[obj_name])
+        return sorted(names) if sort else names
+
+
+def _make_states(seed: int = 0) -> TensorState:
+    generator = torch.Generator().manual_seed(seed)
+
+    def rand(*shape):
+        return torch.rand(*shape, generator=generator)
+
+    num_dof = len(JOINT_NAMES["franka"])
+    robot = RobotState(
+        root_state=rand(NUM_ENVS, 13),
+        body_names=sorted(BODY_NAMES["franka"]),
+        body_state=rand(NUM_ENVS, len(BODY_NAMES["franka"]), 13),
+        joint_pos=rand(NUM_ENVS, num_dof),
+        joint_vel=rand(NUM_ENVS, num_dof),
+        joint_pos_target=rand(NUM_ENVS, num_dof),
+        joint_vel_target=rand(NUM_ENVS, num_dof),
+        joint_effort_target=rand(NUM_ENVS, num_dof),
+    )
+    objects = {
+        "cube": ObjectState(root_state=rand(NUM_ENVS, 13)),
+        "drawer": ObjectState(root_state=rand(NUM_ENVS, 13), joint_pos=rand(NUM_ENVS, 1), joint_vel=rand(NUM_ENVS, 1)),
+    }
+    return TensorState(objects=objects, robots={"franka": robot}, cameras={}, sensors={})
+
+
+def _assert_items_equal(actual, expected):
+    for f in fields(expected):
+        expected_value = getattr(expected, f.name)
+        actual_value = getattr(actual, f.name)
+        if isinstance(expected_value, torch.Tensor):
+            assert isinstance(actual_value, torch.Tensor), f.name
+            torch.testing.assert_close(actual_value, expected_value, msg=f.name)
+        elif f.name != "body_names":
+            assert actual_value is None, f.name
+
+
+def _assert_states_equal(actual: TensorState, expected: TensorState):
+    for category in ("objects", "robots"):
+        assert getattr(actual, category).keys() == getattr(expected, category).keys()
+        for name, item in getattr(expected, category).items():
+            _assert_items_equal(getattr(actual, category)[name], item)
+
+
+class TestNestedConversion:
+    """Test suite for the conversions between tensor states and nested states."""
+
+    @pytest.fixture
+    def handler(self):
+        """Create a handler that only provides the joint and body names."""
+        return _NamesHandler()
+
+    def test_tensor_to_nested_layout(self, handler):
+        """Nested states follow the sorted joint and body order of the tensors."""
+        states = _make_states()
+        nested = state_tensor_to_nested(handler, states)
+        assert len(nested) == NUM_ENVS
+        robot = nested[2]["robots"]["franka"]
+        joint_names = sorted(JOINT_NAMES["franka"])
+        assert list(robot["dof_pos"]) == joint_names
+        for i, joint_name in enumerate(joint_names):
+            assert robot["dof_pos"][joint_name] == pytest.approx(states.robots["franka"].joint_pos[2, i].item())
+        torch.testing.assert_close(robot["rot"], states.robots["franka"].root_state[2, 3:7])
+        torch.testing.assert_close(robot["body"]["panda_link0"]["pos"], states.robots["franka"].body_state[2, 1, :3])
+        assert "dof_pos" not in nested[0]["objects"]["cube"]
+        assert nested[0]["objects"]["drawer"]["dof_pos"]["slide"] == pytest.approx(
+            states.objects["drawer"].joint_pos[0, 0].item()
+        )
+
+    def test_round_trip(self, handler):
+        """Converting to nested states and back gives the original tensors."""
+        states = _make_states()
+        restored = list_state_to_tensor(handler, state_tensor_to_nested(handler, states))
+        _assert_states_equal(restored, states)
+
+    def test_view_matches_nested(self, handler):
+        """The lazy nested view reads the same values as the eager conversion."""
+        states = _make_states()
+        nested = state_tensor_to_nested(handler, states)
+        for env_id in range(NUM_ENVS):
+            view = nested_state_view(handler, states, env_id)
+            for category in ("objects", "robots"):
+                for name, obj in nested[env_id][category].items():
+                    obj_view = view[category][name]
+                    for key in ("pos", "rot", "vel", "ang_vel"):
+                        torch.testing.assert_close(obj_view[key], obj[key])
+                    for joint_name, value in (obj.get("dof_pos") or {}).items():
+                        assert obj_view["dof_pos"][joint_name].item() == pytest.approx(value)
+
+
+class TestSliceScatter:
+    """Test suite for selecting environments of a tensor state and writing them back."""
+
+    @pytest.mark.parametrize("env_ids", [[0], [3, 1], [0, 1, 2, 3, 4]])
+    def test_slice(self, env_ids):
+        """Slicing keeps the rows of ``env_ids``, in their order."""
+        states = _make_states()
+        sliced = slice_tensor_state(states, env_ids)
+        torch.testing.assert_close(sliced.robots["franka"].joint_pos, states.robots["franka"].joint_pos[env_ids])
+        torch.testing.assert_close(sliced.objects["cube"].root_state, states.objects["cube"].root_state[env_ids])
+        assert sliced.objects["cube"].joint_pos is None
+        assert sliced.robots["franka"].body_names == states.robots["franka"].body_names
+
+    @pytest.mark.parametrize("env_ids", [[0], [3, 1], [0, 1, 2, 3, 4]])
+    def test_scatter_inverts_slice(self, env_ids):
+        """Scattering a slice onto the state it was taken from gives that state back."""
+        states = _make_states()
+        restored = scatter_tensor_state(slice_tensor_state(states, env_ids), env_ids, NUM_ENVS, base=states)
+        _assert_states_equal(restored, states)
+
+    def test_scatter_onto_base(self):
+        """Rows outside ``env_ids`` come from the base, which is left unchanged."""
+        base = _make_states(seed=0)
+        base_copy = _make_states(seed=0)
+        update = slice_tensor_state(_make_states(seed=1), [4, 2])
+        merged = scatter_tensor_state(update, [4, 2], NUM_ENVS, base=base)
+
+        joint_pos = merged.robots["franka"].joint_pos
+        torch.testing.assert_close(joint_pos[[4, 2]], update.robots["franka"].joint_pos)
+        torch.testing.assert_close(joint_pos[[0, 1, 3]], base.robots["franka"].joint_pos[[0, 1, 3]])
+        _assert_states_equal(base, base_copy)
+
+    def test_scatter_without_base(self):
+        """Without a base, rows outside ``env_ids`` are zeros."""
+        update = slice_tensor_state(_make_states(), [1])
+        merged = scatter_tensor_state(update, [1], NUM_ENVS)
+        root_state = merged.objects["drawer"].root_state
+        assert root_state.shape == (NUM_ENVS, 13)
+        torch.testing.assert_close(root_state[1], update.objects["drawer"].root_state[0])
+        assert not root_state[[0, 2, 3, 4]].any()
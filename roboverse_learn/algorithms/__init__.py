@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from .base_runner import PolicyRunner
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .base_runner import PolicyRunner
+
+
+def __getattr__(name):
+    ## Imported on first access, so that light modules such as obs_history do not pull in the policy dependencies
+    if name == "PolicyRunner":
+        from .base_runner import PolicyRunner
+
+        return PolicyRunner
+    raise AttributeError(f"Module {__name__} has no attribute {name}")
 
 
 def get_runner(algo: str) -> type[PolicyRunner]:
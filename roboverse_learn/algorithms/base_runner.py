@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from metasim.cfg.policy.base_policy import BasePolicyCfg
 
 try:
@@ -30,8 +32,11 @@ class PolicyRunner:
         self.scenario = scenario
         self.policy_cfg: BasePolicyCfg = None
         self.step = 0
-        self.device = kwargs.get("device", "cuda:0")
+        self.device = kwargs.get("device", "cuda:0" if torch.cuda.is_available() else "cpu")
         self.task_name = kwargs.get("task_name")
+        # Column order of joint targets, shared with the handlers' tensor action path
+        self.joint_names = sorted(self.scenario.robots[0].joint_limits.keys())
+        self.num_dof = len(self.joint_names)
         self._init_policy(**kwargs)
         self.robot_ik = None
         self.curobo_n_dof = None
@@ -47,6 +52,9 @@ class PolicyRunner:
             *_, self.robot_ik = get_curobo_models(self.scenario.robots[0])
             self.curobo_n_dof = len(self.robot_ik.robot_config.cspace.joint_names)
             self.ee_n_dof = len(self.scenario.robots[0].gripper_open_q)
+            self.ik_device = self.robot_ik.tensor_args.device
+            self.gripper_open_q = torch.tensor(self.scenario.robots[0].gripper_open_q, device=self.device)
+            self.gripper_close_q = torch.tensor(self.scenario.robots[0].gripper_close_q, device=self.device)
 
         if self.policy_cfg.action_config.temporal_agg:
             self.all_time_actions = torch.zeros(
@@ -115,8 +123,7 @@ class PolicyRunner:
             {
                 self.scenario.robots[0].name: {
                     "dof_pos_target": {
-                        joint_name: curr_action[i, index]
-                        for index, joint_name in enumerate(sorted(self.scenario.robots[0].joint_limits.keys()))
+                        joint_name: curr_action[i, index] for index, joint_name in enumerate(self.joint_names)
                     }
                 }
             }
@@ -156,9 +163,12 @@ class PolicyRunner:
 
         return raw_action
 
-    def get_action(self, obs):
+    def get_action(self, obs, as_tensor: bool = False):
         """Returns a single action to be directly executed. For action chunking policies it either uses an previsouly
         predicted action chunk, or if it has exausted all of those actions, it queries the model for a new chunk and returns the first one
+
+        With ``as_tensor``, the joint targets are returned as a (num_envs, num_dof) tensor in sorted joint order, which
+        can be passed to ``env.step`` directly instead of per-env action dicts.
         """
         if len(self.action_cache) > 0:
             curr_action = self.action_cache.pop(0)
@@ -177,10 +187,12 @@ class PolicyRunner:
                 curr_action = self.action_cache.pop(0)
 
         self.step += 1
-        assert curr_action.shape == (self.num_envs, len(self.scenario.robots[0].joint_limits.keys())), (
-            f"Expected num_envs X n_dof : {self.num_envs} X {len(self.scenario.robots[0].joint_limits.keys())}, got {curr_action.shape} instead"
+        assert curr_action.shape == (self.num_envs, self.num_dof), (
+            f"Expected num_envs X n_dof : {self.num_envs} X {self.num_dof}, got {curr_action.shape} instead"
         )
 
+        if as_tensor:
+            return curr_action
         actions = self.action_to_dict(curr_action)
         return actions
 
@@ -188,9 +200,13 @@ class PolicyRunner:
         raise NotImplementedError
 
     def _solve_ik(self, action, curr_ee_pos_local, curr_ee_quat_local, curr_robot_q):
-        """Solves IK for the given action end-effector action, in either delta or absolute control"""
-        assert action.shape == (self.num_envs, self.policy_cfg.action_config.action_dim), (
-            f"Expected num_envs X action_dim : {self.num_envs} X {self.policy_cfg.action_config.action_dim}, got {action.shape} instead"
+        """Solves IK for the given action end-effector action, in either delta or absolute control
+
+        ``action`` may stack several steps of an action chunk as (T * num_envs, action_dim), with the current
+        end-effector pose and joint positions repeated accordingly, so that the whole chunk is solved in one batch.
+        """
+        assert action.ndim == 2 and action.shape[1] == self.policy_cfg.action_config.action_dim, (
+            f"Expected batch X action_dim : batch X {self.policy_cfg.action_config.action_dim}, got {action.shape} instead"
         )
         if self.policy_cfg.action_config.ee_cfg.rotation_rep == "quaternion":
             ee_quat_action = action[:, 3:7]
@@ -209,17 +225,13 @@ class PolicyRunner:
         # Solve IK
         seed_config = curr_robot_q[:, : self.curobo_n_dof].unsqueeze(1).tile([1, self.robot_ik._num_seeds, 1])
         result = self.robot_ik.solve_batch(
-            Pose(ee_pos_target.cuda(0), ee_quat_target.cuda(0)), seed_config=seed_config.cuda(0)
+            Pose(ee_pos_target.to(self.ik_device), ee_quat_target.to(self.ik_device)),
+            seed_config=seed_config.to(self.ik_device),
         )
 
         if self.policy_cfg.action_config.ee_cfg.gripper_rep == "strength":
-            gripper_pos = 1 - action[:, -1]
-            gripper_widths = torch.zeros(self.num_envs, self.ee_n_dof, device=self.device)
-            for i in range(self.num_envs):
-                if gripper_pos[i] < 0.5:
-                    gripper_widths[i] = torch.tensor(self.scenario.robots[0].gripper_close_q, device=self.device)
-                else:
-                    gripper_widths[i] = torch.tensor(self.scenario.robots[0].gripper_open_q, device=self.device)
+            gripper_closed = (1 - action[:, -1:]) < 0.5
+            gripper_widths = torch.where(gripper_closed, self.gripper_close_q, self.gripper_open_q)
         else:
             gripper_widths = action[:, -self.ee_n_dof :]
 
@@ -229,7 +241,9 @@ class PolicyRunner:
             log.warning(f"IK failed: {ik_succ}")
             log.info("Trying to POS delta: ", action[:, :3])
 
-        q[ik_succ, : self.curobo_n_dof] = result.solution.to(self.device)[ik_succ, 0].clone()
+        q[:, : self.curobo_n_dof] = torch.where(
+            ik_succ[:, None], result.solution[:, 0].to(self.device), q[:, : self.curobo_n_dof]
+        )
         q[:, -self.ee_n_dof :] = gripper_widths
         return q
 
@@ -245,7 +259,6 @@ class PolicyRunner:
         if self.policy_cfg.action_config.action_type == "joint_pos":
             qpos_action_chunk = action_chunk
         elif self.policy_cfg.action_config.action_type == "ee":
-            qpos_action_chunk = []
             robot_ee_state = obs["robot_ee_state"].to(self.device)
             robot_root_state = obs["robot_root_state"].to(self.device)
             robot_pos, robot_quat = robot_root_state[:, 0:3], robot_root_state[:, 3:7]
@@ -255,9 +268,15 @@ class PolicyRunner:
             )
             curr_ee_quat_local = transforms.quaternion_multiply(transforms.quaternion_invert(robot_quat), curr_ee_quat)
             curr_robot_q = obs["joint_qpos"].to(self.device)
-            for action in action_chunk:
-                target_qpos = self._solve_ik(action, curr_ee_pos_local, curr_ee_quat_local, curr_robot_q)
-                qpos_action_chunk.append(target_qpos)
+            # Every step of the chunk is relative to the current state, so the whole chunk is solved as one batch
+            n_steps = len(action_chunk)
+            target_qpos = self._solve_ik(
+                torch.cat(action_chunk, dim=0),
+                curr_ee_pos_local.repeat(n_steps, 1),
+                curr_ee_quat_local.repeat(n_steps, 1),
+                curr_robot_q.repeat(n_steps, 1),
+            )
+            qpos_action_chunk = list(target_qpos.split(self.num_envs, dim=0))
 
         if self.policy_cfg.action_config.interpolate_chunk:
             return self._interpolate_chunk(obs["joint_qpos"].to(self.device), qpos_action_chunk)
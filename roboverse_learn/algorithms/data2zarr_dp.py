@@ -3,6 +3,8 @@ import json
 import logging
 import os
 import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import imageio.v2 as iio
 import numpy as np
@@ -16,6 +18,172 @@ except ImportError:
     pass
 
 
+def _init_worker():
+    # Episodes are processed in parallel, so each worker should not spawn its own threads
+    torch.set_num_threads(1)
+
+
+def _to_robot_frame(robot_root_state: torch.Tensor, ee_state: torch.Tensor):
+    """Express end-effector poses in the robot root frame, for all frames of an episode at once.
+
+    Args:
+        robot_root_state: (T, >=7) robot root states, position then wxyz quaternion.
+        ee_state: (T, >=7) end-effector states, position then wxyz quaternion.
+
+    Returns:
+        Local positions (T, 3) and quaternions (T, 4).
+    """
+    robot_pos = robot_root_state[:, 0:3]
+    robot_quat_inv = transforms.quaternion_invert(robot_root_state[:, 3:7])
+    local_pos = transforms.quaternion_apply(robot_quat_inv, ee_state[:, 0:3] - robot_pos)
+    local_quat = transforms.quaternion_multiply(robot_quat_inv, ee_state[:, 3:7])
+    return local_pos, local_quat
+
+
+def _pad_joints(joint_pos: np.ndarray, padding: int) -> np.ndarray:
+    if padding > 0 and joint_pos.shape[1] < padding:
+        joint_pos = np.pad(joint_pos, ((0, 0), (0, padding - joint_pos.shape[1])))
+    return joint_pos
+
+
+def process_episode(demo_dir: str, args: argparse.Namespace):
+    """Decode and convert one episode.
+
+    Returns:
+        head camera frames (T, C, H, W), states (T, D_state) and actions (T, D_action).
+    """
+    with open(os.path.join(demo_dir, "metadata.json"), encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    ## Decode the video frame by frame, keeping only the downsampled frames
+    reader = iio.get_reader(os.path.join(demo_dir, "rgb.mp4"))
+    rgbs = [rgb for i, rgb in enumerate(reader) if i % args.downsample_ratio == 0]
+    reader.close()
+    frame_ids = np.arange(len(rgbs)) * args.downsample_ratio
+    head_camera = np.moveaxis(np.stack(rgbs), -1, 1)  # NHWC -> NCHW
+
+    def select(key):
+        return np.asarray(metadata[key])[frame_ids]
+
+    # you can change state and action here
+    if args.observation_space == "ee" or args.action_space == "ee":
+        robot_root_state = torch.tensor(select("robot_root_state"), dtype=torch.float32)
+        local_ee_pos, local_ee_quat = _to_robot_frame(
+            robot_root_state, torch.tensor(select("robot_ee_state"), dtype=torch.float32)
+        )
+
+    if args.observation_space == "joint_pos":
+        state = _pad_joints(select("joint_qpos"), args.joint_pos_padding)
+    elif args.observation_space == "ee":
+        gripper_state = select("joint_qpos")[:, -2:]
+        state = np.concatenate([local_ee_pos.numpy(), local_ee_quat.numpy(), gripper_state], axis=1)
+        assert state.shape[1] == 9
+    else:
+        raise ValueError(f"Unknown observation space: {args.observation_space}")
+
+    if args.action_space == "joint_pos":
+        action = _pad_joints(select("joint_qpos_target"), args.joint_pos_padding)
+    elif args.action_space == "ee":
+        local_next_ee_pos, local_next_ee_quat = _to_robot_frame(
+            robot_root_state, torch.tensor(select("robot_ee_state_target"), dtype=torch.float32)
+        )
+        gripper_action = select("joint_qpos_target")[:, -2:]
+
+        if not args.delta_ee:
+            action = np.concatenate([local_next_ee_pos.numpy(), local_next_ee_quat.numpy(), gripper_action], axis=1)
+        else:
+            # Compute the delta in local coordinates
+            local_ee_delta_pos = local_next_ee_pos - local_ee_pos
+            local_ee_delta_quat = transforms.quaternion_multiply(
+                transforms.quaternion_invert(local_ee_quat), local_next_ee_quat
+            )
+            action = np.concatenate([local_ee_delta_pos.numpy(), local_ee_delta_quat.numpy(), gripper_action], axis=1)
+
+        assert action.shape[1] == 9, f"Action shape is {action.shape}, expected (T, 9)"
+    else:
+        raise ValueError(f"Unknown action space: {args.action_space}")
+
+    return head_camera, state.astype(np.float32), action.astype(np.float32)
+
+
+class ZarrEpisodeWriter:
+    """Append episodes to the zarr arrays in episode order.
+
+    Rows are buffered until they fill whole chunks, so every chunk is compressed exactly once and at most one chunk
+    plus one episode is held in memory.
+    """
+
+    def __init__(self, zarr_data, zarr_meta, compressor, chunk_len: int):
+        self.zarr_data = zarr_data
+        self.zarr_meta = zarr_meta
+        self.compressor = compressor
+        self.chunk_len = chunk_len
+        self.buffers = {"head_camera": [], "state": [], "action": []}
+        self.n_buffered = 0
+        self.episode_ends = []
+        self.total_count = 0
+
+    def _create(self, head_camera, state, action):
+        zarr_data, compressor, chunk_len = self.zarr_data, self.compressor, self.chunk_len
+        zarr_data.create_dataset(
+            "head_camera",
+            shape=(0, *head_camera.shape[1:]),
+            chunks=(chunk_len, *head_camera.shape[1:]),
+            dtype=head_camera.dtype,
+            compressor=compressor,
+            overwrite=True,
+        )
+        zarr_data.create_dataset(
+            "state",
+            shape=(0, state.shape[1]),
+            chunks=(chunk_len, state.shape[1]),
+            dtype="float32",
+            compressor=compressor,
+            overwrite=True,
+        )
+        zarr_data.create_dataset(
+            "action",
+            shape=(0, action.shape[1]),
+            chunks=(chunk_len, action.shape[1]),
+            dtype="float32",
+            compressor=compressor,
+            overwrite=True,
+        )
+        self.zarr_meta.create_dataset(
+            "episode_ends",
+            shape=(0,),
+            chunks=(chunk_len,),
+            dtype="int64",
+            compressor=compressor,
+            overwrite=True,
+        )
+
+    def append(self, head_camera, state, action):
+        if self.total_count == 0 and "head_camera" not in self.zarr_data:
+            self._create(head_camera, state, action)
+        for key, value in zip(self.buffers, (head_camera, state, action)):
+            self.buffers[key].append(value)
+        self.n_buffered += len(head_camera)
+        self.total_count += len(head_camera)
+        self.episode_ends.append(self.total_count)
+        if self.n_buffered >= self.chunk_len:
+            self._flush(final=False)
+
+    def _flush(self, final: bool):
+        n_write = self.n_buffered if final else self.n_buffered // self.chunk_len * self.chunk_len
+        for key, buffer in self.buffers.items():
+            rows = np.concatenate(buffer)
+            self.zarr_data[key].append(rows[:n_write])
+            self.buffers[key] = [rows[n_write:]]
+        self.n_buffered -= n_write
+
+    def close(self):
+        if len(self.episode_ends) == 0:
+            return
+        self._flush(final=True)
+        self.zarr_meta["episode_ends"].append(np.array(self.episode_ends))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Process Meta Data To ZARR For Diffusion Policy.")
     parser.add_argument(
@@ -67,6 +235,20 @@ def main():
         help="If > 0, pad joint positions to this length when using joint_pos observation/action space",
     )
 
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Number of processes that decode and convert episodes in parallel",
+    )
+    parser.add_argument(
+        "--max_in_flight",
+        type=int,
+        default=None,
+        help="Maximum number of episodes submitted but not yet written, each holding its decoded frames in memory."
+        " Defaults to num_workers + 1",
+    )
+
     args = parser.parse_args()
 
     task_name = args.task_name
@@ -85,184 +267,39 @@ def main():
     zarr_data = zarr_root.create_group("data")
     zarr_meta = zarr_root.create_group("meta")
 
-    # ZARR datasets will be created dynamically during the first batch write
+    # ZARR datasets will be created dynamically during the first write
     compressor = zarr.Blosc(cname="zstd", clevel=3, shuffle=1)
-
-    # Batch processing settings
-    batch_size = 100
-    head_camera_arrays = []
-    action_arrays = []
-    state_arrays = []
-    episode_ends_arrays = []
-    total_count = 0
-    current_batch = 0
-    # current_demo_index = 0
+    writer = ZarrEpisodeWriter(zarr_data, zarr_meta, compressor, chunk_len=100)
 
     if args.joint_pos_padding > 0 and args.observation_space == "ee" and args.action_space == "ee":
         logging.warning("Padding is not supported for ee observation and action spaces.")
 
-    for current_ep in tqdm(range(num), desc=f"Processing {num} MetaData"):
-        demo_id = str(current_ep).zfill(4)
-        demo_dir = os.path.join(load_dir, f"demo_{demo_id}")
-        # current_ep += 1
-
+    demo_dirs = []
+    for current_ep in range(num):
+        demo_dir = os.path.join(load_dir, f"demo_{str(current_ep).zfill(4)}")
         if not os.path.isdir(demo_dir):
             print(f"Skipping episode {current_ep} as it does not exist.")
             continue
-        else:
-            demo_id = str(current_ep).zfill(4)
-            demo_dir = os.path.join(load_dir, f"demo_{demo_id}")
-            # current_demo_index += 1
-
-        with open(os.path.join(demo_dir, "metadata.json"), encoding="utf-8") as f:
-            # print("metadata load dir:", demo_dir)
-            metadata = json.load(f)
-        data_length = len(metadata["joint_qpos"])
-        rgbs = iio.mimread(os.path.join(demo_dir, "rgb.mp4"))
-        for i, rgb in enumerate(rgbs):
-            if i % downsample_ratio != 0:
-                continue
-
-            # you can change state and action here
-            if args.observation_space == "joint_pos":
-                state = metadata["joint_qpos"][i]
-                # Apply padding if specified and using joint_pos
-                if args.joint_pos_padding > 0 and len(state) < args.joint_pos_padding:
-                    padding = np.zeros(args.joint_pos_padding - len(state))
-                    state = np.concatenate([state, padding])
-            elif args.observation_space == "ee":
-                robot_pos, robot_quat = (
-                    torch.tensor(metadata["robot_root_state"][i][0:3]),
-                    torch.tensor(metadata["robot_root_state"][i][3:7]),
-                )
-
-                # Convert both current and next EE state into local coordinates
-                local_ee_pos = transforms.quaternion_apply(
-                    transforms.quaternion_invert(robot_quat),
-                    torch.tensor(metadata["robot_ee_state"][i][0:3]) - robot_pos,
-                )
-                local_ee_quat = transforms.quaternion_multiply(
-                    transforms.quaternion_invert(robot_quat), torch.tensor(metadata["robot_ee_state"][i][3:7])
-                )
-
-                gripper_state = metadata["joint_qpos"][i][-2:]
-                state = np.concatenate([local_ee_pos, local_ee_quat, gripper_state])
-                assert state.shape == (9,)
-            else:
-                raise ValueError(f"Unknown observation space: {args.observation_space}")
-
-            if args.action_space == "joint_pos":
-                action = metadata["joint_qpos_target"][i]
-                # Apply padding if specified and using joint_pos
-                if args.joint_pos_padding > 0 and len(action) < args.joint_pos_padding:
-                    padding = np.zeros(args.joint_pos_padding - len(action))
-                    action = np.concatenate([action, padding])
-            elif args.action_space == "ee":
-                robot_pos, robot_quat = (
-                    torch.tensor(metadata["robot_root_state"][i][0:3]),
-                    torch.tensor(metadata["robot_root_state"][i][3:7]),
-                )
-
-                # Convert both current and next EE state into local coordinates
-                local_ee_pos = transforms.quaternion_apply(
-                    transforms.quaternion_invert(robot_quat),
-                    torch.tensor(metadata["robot_ee_state"][i][0:3]) - robot_pos,
-                )
-                local_next_ee_pos = transforms.quaternion_apply(
-                    transforms.quaternion_invert(robot_quat),
-                    torch.tensor(metadata["robot_ee_state_target"][i][0:3]) - robot_pos,
-                )
-
-                local_ee_quat = transforms.quaternion_multiply(
-                    transforms.quaternion_invert(robot_quat), torch.tensor(metadata["robot_ee_state"][i][3:7])
-                )
-                local_next_ee_quat = transforms.quaternion_multiply(
-                    transforms.quaternion_invert(robot_quat), torch.tensor(metadata["robot_ee_state_target"][i][3:7])
-                )
-                gripper_action = metadata["joint_qpos_target"][i][-2:]
-
-                if not args.delta_ee:
-                    action = np.concatenate([local_next_ee_pos, local_next_ee_quat, gripper_action])
-                else:
-                    # Compute the delta in local coordinates
-                    local_ee_delta_pos = local_next_ee_pos - local_ee_pos
-                    local_ee_delta_quat = transforms.quaternion_multiply(
-                        transforms.quaternion_invert(local_ee_quat), local_next_ee_quat
-                    )
-                    action = np.concatenate([local_ee_delta_pos, local_ee_delta_quat, gripper_action])
-
-                assert action.shape == (9,), f"Action shape is {action.shape}, expected (9,)"
-            else:
-                raise ValueError(f"Unknown action space: {args.action_space}")
-
-            action = list(action)
-            # Append data to batch arrays
-            head_camera_arrays.append(rgb)
-            state_arrays.append(state)
-            action_arrays.append(action)
-            total_count += 1
-
-        episode_ends_arrays.append(total_count)
-
-        # Write to ZARR if batch is full or if this is the last episode
-        if (current_ep + 1) % batch_size == 0 or (current_ep + 1) == num:
-            # Convert arrays to NumPy and format head_camera
-            head_camera_arrays = np.array(head_camera_arrays)
-            head_camera_arrays = np.moveaxis(head_camera_arrays, -1, 1)  # NHWC -> NCHW
-            # print(head_camera_arrays)
-            action_arrays = np.array(action_arrays)
-            state_arrays = np.array(state_arrays)
-            episode_ends_arrays = np.array(episode_ends_arrays)
-
-            # Create datasets dynamically during the first write
-            if current_batch == 0:
-                zarr_data.create_dataset(
-                    "head_camera",
-                    shape=(0, *head_camera_arrays.shape[1:]),
-                    chunks=(batch_size, *head_camera_arrays.shape[1:]),
-                    dtype=head_camera_arrays.dtype,
-                    compressor=compressor,
-                    overwrite=True,
-                )
-                zarr_data.create_dataset(
-                    "state",
-                    shape=(0, state_arrays.shape[1]),
-                    chunks=(batch_size, state_arrays.shape[1]),
-                    dtype="float32",
-                    compressor=compressor,
-                    overwrite=True,
-                )
-                zarr_data.create_dataset(
-                    "action",
-                    shape=(0, action_arrays.shape[1]),
-                    chunks=(batch_size, action_arrays.shape[1]),
-                    dtype="float32",
-                    compressor=compressor,
-                    overwrite=True,
-                )
-                zarr_meta.create_dataset(
-                    "episode_ends",
-                    shape=(0,),
-                    chunks=(batch_size,),
-                    dtype="int64",
-                    compressor=compressor,
-                    overwrite=True,
-                )
-
-            # Append data to ZARR datasets
-            zarr_data["head_camera"].append(head_camera_arrays)
-            zarr_data["state"].append(state_arrays)
-            zarr_data["action"].append(action_arrays)
-            zarr_meta["episode_ends"].append(episode_ends_arrays)
-
-            print(f"Batch {current_batch + 1} written with {len(head_camera_arrays)} samples.")
-
-            # Clear arrays for next batch
-            head_camera_arrays = []
-            action_arrays = []
-            state_arrays = []
-            episode_ends_arrays = []
-            current_batch += 1
+        demo_dirs.append(demo_dir)
+
+    ## Episodes are converted in parallel and written in order, with a bounded number of episodes in flight
+    max_in_flight = args.num_workers + 1 if args.max_in_flight is None else args.max_in_flight
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+    pbar = tqdm(total=len(demo_dirs), desc=f"Processing {num} MetaData")
+    with ProcessPoolExecutor(max_workers=args.num_workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for demo_dir in demo_dirs:
+            pending.append(pool.submit(process_episode, demo_dir, args))
+            if len(pending) >= max_in_flight:
+                writer.append(*pending.popleft().result())
+                pbar.update()
+        while pending:
+            writer.append(*pending.popleft().result())
+            pbar.update()
+    pbar.close()
+    writer.close()
+    print(f"{writer.total_count} samples of {len(writer.episode_ends)} episodes written.")
 
     # Save metadata to a JSON file
     metadata = {
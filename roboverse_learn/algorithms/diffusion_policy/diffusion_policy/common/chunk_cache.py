@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+import numpy as np
+import zarr
+
+
+class ChunkCachedArray:
+    """
+    Read-only view of an on-disk zarr array, chunked along the first (time) axis.
+    Chunks are decompressed on demand into an LRU cache bounded by max_bytes,
+    and can be prefetched in background threads.
+    """
+
+    def __init__(self, arr: zarr.Array, max_bytes: int, num_workers: int = 2):
+        self.arr = arr
+        self.shape = arr.shape
+        self.dtype = arr.dtype
+        self.chunk_len = arr.chunks[0]
+        chunk_nbytes = self.chunk_len * int(np.prod(self.shape[1:])) * self.dtype.itemsize
+        self.max_chunks = max(1, max_bytes // max(chunk_nbytes, 1))
+
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._pending: dict[int, Future] = dict()
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=num_workers) if num_workers > 0 else None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getstate__(self):
+        # worker processes get an empty cache of their own
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        state["_pending"] = dict()
+        state["_lock"] = None
+        state["_executor"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _load(self, chunk_idx: int) -> np.ndarray:
+        start = chunk_idx * self.chunk_len
+        return self.arr[start : min(start + self.chunk_len, self.shape[0])]
+
+    def _get_chunk(self, chunk_idx: int) -> np.ndarray:
+        with self._lock:
+            chunk = self._cache.get(chunk_idx)
+            if chunk is not None:
+                self._cache.move_to_end(chunk_idx)
+                return chunk
+            future = self._pending.get(chunk_idx)
+        if future is not None:
+            return future.result()
+        chunk = self._load(chunk_idx)
+        self._store(chunk_idx, chunk)
+        return chunk
+
+    def _store(self, chunk_idx: int, chunk: np.ndarray):
+        with self._lock:
+            self._pending.pop(chunk_idx, None)
+            self._cache[chunk_idx] = chunk
+            self._cache.move_to_end(chunk_idx)
+            while len(self._cache) > self.max_chunks:
+                self._cache.popitem(last=False)
+
+    def _on_prefetched(self, chunk_idx: int, future: Future):
+        if future.exception() is None:
+            self._store(chunk_idx, future.result())
+        else:
+            with self._lock:
+                self._pending.pop(chunk_idx, None)
+
+    def chunk_ids(self, start: int, stop: int) -> range:
+        return range(start // self.chunk_len, (stop - 1) // self.chunk_len + 1)
+
+    def prefetch(self, chunk_ids: Iterable[int]):
+        """
+        Start decompressing the given chunks in the background.
+        At most max_chunks are prefetched, so prefetching never evicts itself.
+        """
+        if self._executor is None:
+            return
+        with self._lock:
+            for chunk_idx in list(dict.fromkeys(chunk_ids))[: self.max_chunks]:
+                if chunk_idx in self._cache or chunk_idx in self._pending:
+                    continue
+                future = self._executor.submit(self._load, chunk_idx)
+                self._pending[chunk_idx] = future
+                future.add_done_callback(lambda f, chunk_idx=chunk_idx: self._on_prefetched(chunk_idx, f))
+
+    def read(self, start: int, stop: int, out: np.ndarray):
+        """
+        Copy rows [start, stop) into out.
+        """
+        for chunk_idx in self.chunk_ids(start, stop):
+            chunk_start = chunk_idx * self.chunk_len
+            lo = max(start, chunk_start)
+            hi = min(stop, chunk_start + self.chunk_len)
+            out[lo - start : hi - start] = self._get_chunk(chunk_idx)[lo - chunk_start : hi - chunk_start]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) and key.step in (None, 1):
+            start, stop, _ = key.indices(self.shape[0])
+            out = np.empty((max(stop - start, 0), *self.shape[1:]), dtype=self.dtype)
+            if stop > start:
+                self.read(start, stop, out)
+            return out
+        return self.arr[key]
+
+
+def lazy_batch_sample_sequence(
+    data: np.ndarray,
+    input_arr: ChunkCachedArray,
+    indices: np.ndarray,
+    idx: np.ndarray,
+    sequence_length: int,
+):
+    """
+    Same as batch_sample_sequence, reading from a ChunkCachedArray.
+    """
+    for i in range(len(idx)):
+        buffer_start_idx, buffer_end_idx, sample_start_idx, sample_end_idx = indices[idx[i]]
+        input_arr.read(buffer_start_idx, buffer_end_idx, data[i, sample_start_idx:sample_end_idx])
+        if sample_start_idx > 0:
+            data[i, :sample_start_idx] = data[i, sample_start_idx]
+        if sample_end_idx < sequence_length:
+            data[i, sample_end_idx:] = data[i, sample_end_idx - 1]
+
+
+def prefetch_batch(input_arr: ChunkCachedArray, indices: np.ndarray, idx: np.ndarray):
+    """
+    Prefetch the chunks read by lazy_batch_sample_sequence for the same indices.
+    """
+    chunk_ids = []
+    for i in idx:
+        buffer_start_idx, buffer_end_idx = indices[i][:2]
+        chunk_ids.extend(input_arr.chunk_ids(buffer_start_idx, buffer_end_idx))
+    input_arr.prefetch(chunk_ids)
@@ -4,6 +4,8 @@ from typing import Dict
 import numba
 import numpy as np
 import torch
+import zarr
+from diffusion_policy.common.chunk_cache import ChunkCachedArray, lazy_batch_sample_sequence, prefetch_batch
 from diffusion_policy.common.normalize_util import get_image_range_normalizer
 from diffusion_policy.common.pytorch_util import dict_apply
 from diffusion_policy.common.replay_buffer import ReplayBuffer
@@ -28,16 +30,28 @@ class RobotImageDataset(BaseImageDataset):
         val_ratio=0.0,
         batch_size=64,
         max_train_episodes=None,
+        lazy=False,
+        cache_size_mb=2048,
+        prefetch_workers=2,
     ):
+        """
+        lazy: instead of loading the whole store into memory, keep it on disk and read
+            image chunks through a cache of at most cache_size_mb per key, prefetching
+            the chunks of the next batch with prefetch_workers threads.
+        """
 
         super().__init__()
         # cprint(zarr_path, "red")
         # cprint(batch_size, "red")
-        self.replay_buffer = ReplayBuffer.copy_from_path(
-            zarr_path,
-            # keys=['head_camera', 'front_camera', 'left_camera', 'right_camera', 'state', 'action'],
-            keys=["head_camera", "state", "action"],
-        )
+        keys = ["head_camera", "state", "action"]
+        if lazy:
+            self.replay_buffer = self._open_lazy(zarr_path, keys, cache_size_mb * 2**20, prefetch_workers)
+        else:
+            self.replay_buffer = ReplayBuffer.copy_from_path(
+                zarr_path,
+                # keys=['head_camera', 'front_camera', 'left_camera', 'right_camera', 'state', 'action'],
+                keys=keys,
+            )
 
         val_mask = get_val_mask(n_episodes=self.replay_buffer.n_episodes, val_ratio=val_ratio, seed=seed)
         train_mask = ~val_mask
@@ -65,6 +79,29 @@ class RobotImageDataset(BaseImageDataset):
         for v in self.buffers_torch.values():
             v.pin_memory()
 
+    @staticmethod
+    def _open_lazy(zarr_path, keys, max_bytes, prefetch_workers):
+        """
+        Open the store read-only, loading low-dimensional keys and wrapping image keys in a chunk cache.
+        """
+        group = zarr.open(zarr_path, mode="r")
+        data = dict()
+        for key in keys:
+            arr = group["data"][key]
+            if arr.ndim >= 4:  # T, H, W, C
+                data[key] = ChunkCachedArray(arr, max_bytes=max_bytes, num_workers=prefetch_workers)
+            else:
+                data[key] = arr[:]
+        return ReplayBuffer(root={"data": data, "meta": {"episode_ends": group["meta"]["episode_ends"][:]}})
+
+    def prefetch(self, idx: np.ndarray):
+        """
+        Start reading the chunks of a batch that will be requested soon (lazy mode only).
+        """
+        for v in self.sampler.replay_buffer.values():
+            if isinstance(v, ChunkCachedArray):
+                prefetch_batch(v, self.sampler.indices, idx)
+
     def get_validation_dataset(self):
         val_set = copy.copy(self)
         val_set.sampler = SequenceSampler(
@@ -118,7 +155,8 @@ class RobotImageDataset(BaseImageDataset):
             # print(self.batch_size)
             assert len(idx) == self.batch_size
             for k, v in self.sampler.replay_buffer.items():
-                batch_sample_sequence(
+                sample_fn = lazy_batch_sample_sequence if isinstance(v, ChunkCachedArray) else batch_sample_sequence
+                sample_fn(
                     self.buffers[k],
                     v,
                     self.sampler.indices,
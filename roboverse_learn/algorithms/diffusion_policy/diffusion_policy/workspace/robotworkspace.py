@@ -292,6 +292,7 @@ class BatchSampler:
         shuffle: bool = False,
         seed: int = 0,
         drop_last: bool = True,
+        prefetch_fn=None,
     ):
         assert drop_last
         self.data_size = data_size
@@ -300,6 +301,8 @@ class BatchSampler:
         self.discard = data_size - batch_size * self.num_batch
         self.shuffle = shuffle
         self.rng = np.random.default_rng(seed) if shuffle else None
+        # called with the indices of the next batch before yielding the current one
+        self.prefetch_fn = prefetch_fn
 
     def __iter__(self):
         if self.shuffle:
@@ -310,6 +313,8 @@ class BatchSampler:
             perm = perm[: -self.discard]
         perm = perm.reshape(self.num_batch, self.batch_size)
         for i in range(self.num_batch):
+            if self.prefetch_fn is not None and i + 1 < self.num_batch:
+                self.prefetch_fn(perm[i + 1])
             yield perm[i]
 
     def __len__(self):
@@ -327,7 +332,11 @@ def create_dataloader(
     seed: int = 0,
 ):
     # print("create_dataloader_batch_size", batch_size)
-    batch_sampler = BatchSampler(len(dataset), batch_size, shuffle=shuffle, seed=seed, drop_last=True)
+    # prefetching only reaches the dataset when batches are loaded in this process
+    prefetch_fn = getattr(dataset, "prefetch", None) if num_workers == 0 else None
+    batch_sampler = BatchSampler(
+        len(dataset), batch_size, shuffle=shuffle, seed=seed, drop_last=True, prefetch_fn=prefetch_fn
+    )
 
     def collate(x):
         assert len(x) == 1
@@ -1,14 +1,14 @@
-from collections import deque
+from __future__ import annotations
 
 import dill
 import hydra
-import numpy as np
 import torch
 from diffusion_policy import RobotWorkspace
 
 from metasim.cfg.policy import DiffusionPolicyCfg
 
 from .base_runner import PolicyRunner
+from .obs_history import ObsHistory
 
 
 class DPRunner(PolicyRunner):
@@ -46,47 +46,20 @@ class DPRunner(PolicyRunner):
         self.policy_cfg.obs_config.obs_dim = cfg.shape_meta.obs.agent_pos.shape[0]
         self.policy_cfg.action_config.action_dim = cfg.shape_meta.action.shape[0]
 
-        self.obs = deque(maxlen=cfg.n_obs_steps + 1)
+        self.obs = ObsHistory(cfg.n_obs_steps, self.device)
         self.env = None
 
-    def _stack_last_n_obs(self, all_obs, n_steps):
-        assert len(all_obs) > 0
-        all_obs = list(all_obs)
-        if isinstance(all_obs[0], np.ndarray):
-            result = np.zeros((n_steps,) + all_obs[-1].shape, dtype=all_obs[-1].dtype)
-            start_idx = -min(n_steps, len(all_obs))
-            result[start_idx:] = np.array(all_obs[start_idx:])
-            if n_steps > len(all_obs):
-                # pad
-                result[:start_idx] = result[start_idx]
-            result = np.swapaxes(result, 0, 1)  # Policy expects (Batch_size, n_steps, ...)
-        elif isinstance(all_obs[0], torch.Tensor):
-            result = torch.zeros((n_steps,) + all_obs[-1].shape, dtype=all_obs[-1].dtype)
-            start_idx = -min(n_steps, len(all_obs))
-            result[start_idx:] = torch.stack(all_obs[start_idx:])
-            if n_steps > len(all_obs):
-                # pad
-                result[:start_idx] = result[start_idx]
-            result = result.transpose(0, 1)  # Policy expects (Batch_size, n_steps, ...)
-        else:
-            raise RuntimeError(f"Unsupported obs type {type(all_obs[0])}")
-        return result
-
-    def reset(self):
-        self.obs.clear()
-        super().reset()
+    def reset(self, env_ids: list[int] | None = None):
+        """Reset the runner, or only the observation history of ``env_ids`` when envs finish at different times."""
+        self.obs.reset(env_ids)
+        if env_ids is None:
+            super().reset()
 
     def update_obs(self, current_obs):
         self.obs.append(current_obs)
 
     def _get_n_steps_obs(self):
-        assert len(self.obs) > 0, "no observation is recorded, please update obs first"
-
-        result = dict()
-        for key in self.obs[0].keys():
-            result[key] = self._stack_last_n_obs([obs[key] for obs in self.obs], self.yaml_cfg.n_obs_steps)
-
-        return result
+        return self.obs.get()
 
     def predict_action(self, observaton=None):
         if observaton is not None:
@@ -0,0 +1,61 @@
+"""Observation history of the policy runners, kept free of the policy dependencies."""
+
+from __future__ import annotations
+
+import torch
+
+
+class ObsHistory:
+    """Fixed-length history of dict observations for every env, kept on the policy device.
+
+    Each key is stored in a preallocated buffer of shape (num_envs, 2 * n_steps, ...), where every observation is
+    written twice, ``n_steps`` slots apart, so that the last ``n_steps`` observations are always a contiguous slice
+    and :meth:`get` returns views without copying. After a (per-env) reset, the first observation fills the whole
+    history, i.e. short histories are padded with their oldest observation. The same holds for all envs when a key
+    first appears after earlier observations without it.
+    """
+
+    def __init__(self, n_steps: int, device: str | torch.device):
+        self.n_steps = n_steps
+        self.device = device
+        self._buffers: dict[str, torch.Tensor] = {}
+        self._fresh: torch.Tensor | None = None  # envs without any observation since their reset
+        self._head = 0  # slot of the latest observation
+
+    def __len__(self) -> int:
+        return 0 if self._fresh is None or self._fresh.all() else self.n_steps
+
+    def append(self, obs: dict) -> None:
+        """Add one observation of all envs, each value of shape (num_envs, ...)."""
+        head = (self._head + 1) % self.n_steps
+        fresh = self._fresh
+        for key, value in obs.items():
+            value = torch.as_tensor(value, device=self.device)
+            if fresh is None:
+                fresh = torch.ones(value.shape[0], dtype=torch.bool, device=self.device)
+            if key not in self._buffers:
+                ## The buffer has no history yet for any env, so it is padded like a reset of all envs
+                self._buffers[key] = value.unsqueeze(1).repeat(1, 2 * self.n_steps, *([1] * (value.ndim - 1)))
+                continue
+            buf = self._buffers[key]
+            buf[:, head] = value
+            buf[:, head + self.n_steps] = value
+            if fresh.any():
+                buf[fresh] = value[fresh].unsqueeze(1)
+        self._fresh = torch.zeros_like(fresh)
+        self._head = head
+
+    def get(self) -> dict[str, torch.Tensor]:
+        """Last ``n_steps`` observations of each key, oldest first, with shape (num_envs, n_steps, ...)."""
+        assert len(self) > 0, "no observation is recorded, please update obs first"
+        start = self._head + 1
+        return {key: buf[:, start : start + self.n_steps] for key, buf in self._buffers.items()}
+
+    def reset(self, env_ids: list[int] | torch.Tensor | None = None) -> None:
+        """Forget the history of the given envs, or of all envs if ``env_ids`` is None."""
+        if self._fresh is None:
+            return
+        if env_ids is None:
+            self._fresh[:] = True
+        else:
+            self._fresh[env_ids] = True
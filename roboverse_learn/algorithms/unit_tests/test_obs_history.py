@@ -0,0 +1,100 @@
+"""Unit tests for the observation history of the policy runners."""
+
+from __future__ import annotations
+
+import pytest
+import torch
+
+from roboverse_learn.algorithms.obs_history import ObsHistory
+
+NUM_ENVS = 3
+N_STEPS = 4
+
+
+def _obs(step: int) -> dict[str, torch.Tensor]:
+    """Observation whose values encode the step and the env, to check where each one ends up."""
+    env = torch.arange(NUM_ENVS, dtype=torch.float32)
+    return {
+        "joint_qpos": (step * 10 + env).unsqueeze(-1).repeat(1, 2),
+        "rgb": (step * 10 + env).view(NUM_ENVS, 1, 1, 1).expand(NUM_ENVS, 2, 2, 3).to(torch.uint8),
+    }
+
+
+def _steps(history: ObsHistory, key: str = "joint_qpos") -> torch.Tensor:
+    """The step of each history slot of each env, shape (num_envs, n_steps)."""
+    return torch.div(history.get()[key].flatten(2)[:, :, 0], 10, rounding_mode="floor").long()
+
+
+class TestObsHistory:
+    """Test suite for the fixed-length observation history."""
+
+    @pytest.fixture
+    def history(self):
+        """Create an empty history on cpu."""
+        return ObsHistory(N_STEPS, device="cpu")
+
+    def test_empty(self, history):
+        """A history without observations has no length and cannot be read."""
+        assert len(history) == 0
+        with pytest.raises(AssertionError):
+            history.get()
+
+    def test_first_observation_pads_history(self, history):
+        """The first observation fills every slot."""
+        history.append(_obs(1))
+        assert len(history) == N_STEPS
+        out = history.get()
+        assert out["joint_qpos"].shape == (NUM_ENVS, N_STEPS, 2)
+        assert out["rgb"].shape == (NUM_ENVS, N_STEPS, 2, 2, 3)
+        assert out["rgb"].dtype == torch.uint8
+        assert (_steps(history) == 1).all()
+
+    def test_rolling_window(self, history):
+        """The history keeps the last ``n_steps`` observations, oldest first, padded with the oldest one."""
+        for step in range(1, 3):
+            history.append(_obs(step))
+        assert _steps(history).tolist() == [[1, 1, 1, 2]] * NUM_ENVS
+        for step in range(3, 8):
+            history.append(_obs(step))
+        assert _steps(history).tolist() == [[4, 5, 6, 7]] * NUM_ENVS
+        torch.testing.assert_close(history.get()["joint_qpos"][:, -1], _obs(7)["joint_qpos"])
+
+    def test_values_per_env(self, history):
+        """Each env reads its own observations."""
+        for step in range(1, 6):
+            history.append(_obs(step))
+        env_ids = history.get()["joint_qpos"][:, :, 0].long() % 10
+        assert env_ids.tolist() == [[env] * N_STEPS for env in range(NUM_ENVS)]
+
+    def test_reset_some_envs(self, history):
+        """After a reset, the next observation of the reset envs fills their history, the others keep theirs."""
+        for step in range(1, 6):
+            history.append(_obs(step))
+        history.reset([1])
+        history.append(_obs(6))
+        assert _steps(history).tolist() == [[3, 4, 5, 6], [6, 6, 6, 6], [3, 4, 5, 6]]
+        assert _steps(history, "rgb").tolist() == _steps(history).tolist()
+
+    def test_reset_all_envs(self, history):
+        """A full reset empties the history until the next observation."""
+        history.append(_obs(1))
+        history.reset()
+        assert len(history) == 0
+        history.append(_obs(2))
+        assert (_steps(history) == 2).all()
+
+    def test_reset_before_first_observation(self, history):
+        """Resetting an empty history is a no-op."""
+        history.reset([0])
+        history.append(_obs(1))
+        assert (_steps(history) == 1).all()
+
+    def test_key_added_later(self, history):
+        """A key that first appears after other observations is padded with its first value for every env."""
+        history.append({"joint_qpos": _obs(1)["joint_qpos"]})
+        history.append({"joint_qpos": _obs(2)["joint_qpos"]})
+        history.append(_obs(3))
+        assert _steps(history, "rgb").tolist() == [[3, 3, 3, 3]] * NUM_ENVS
+        assert _steps(history).tolist() == [[1, 1, 2, 3]] * NUM_ENVS
+        history.append(_obs(4))
+        assert _steps(history, "rgb").tolist() == [[3, 3, 3, 4]] * NUM_ENVS
@@ -153,7 +153,8 @@ def main():
             }
 
             images_list.append(np.array(new_obs["rgb"].cpu()))
-            action = policyRunner.get_action(new_obs)
+            # IsaacLab reads action tensors in actuator order, the other handlers in sorted joint order
+            action = policyRunner.get_action(new_obs, as_tensor=scenario.sim != "isaaclab")
 
             for round_i in range(action_set_steps):
                 obs, reward, success, time_out, extras = env.step(action)
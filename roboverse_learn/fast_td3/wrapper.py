@@ -7,6 +7,7 @@ from torchvision.utils import make_grid
 from metasim.cfg.scenario import ScenarioCfg
 from metasim.constants import SimType
 from metasim.utils.demo_util import get_traj
+from metasim.utils.profiler import profiled
 from metasim.utils.setup_util import get_sim_env_class
 from metasim.utils.state import list_state_to_tensor
 
@@ -34,6 +35,8 @@ class FastTD3EnvWrapper:
         self.num_envs = scenario.num_envs
         self.robot = scenario.robots[0]
         self.task = scenario.task
+        # Reward functions are built once, they keep their resolved constants across steps
+        self.reward_fns = [reward_fn(self.robot.name) for reward_fn in self.task.reward_functions]
         # ----------- initial states --------------------------------------------------
         initial_states, _, _ = get_traj(self.task, self.robot, self.env.handler)
         # Duplicate / trim list so that its length matches num_envs
@@ -134,10 +137,11 @@ class FastTD3EnvWrapper:
         """Flatten humanoid states and move them onto the training device."""
         return self.task.humanoid_obs_flatten_func(states).to(self.device)
 
+    @profiled("reward")
     def get_humanoid_reward(self, states) -> torch.Tensor:
         total_reward = torch.zeros(self.num_envs, device=self.device)
-        for reward_fn, weight in zip(self.task.reward_functions, self.task.reward_weights):
-            total_reward += reward_fn(self.robot.name)(states).to(self.device) * weight
+        for reward_fn, weight in zip(self.reward_fns, self.task.reward_weights):
+            total_reward += reward_fn(states).to(self.device) * weight
         return total_reward
 
     def _unnormalise_action(self, action: torch.Tensor) -> torch.Tensor:
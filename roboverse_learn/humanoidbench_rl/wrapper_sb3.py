@@ -10,6 +10,7 @@ from stable_baselines3.common.vec_env.base_vec_env import VecEnv
 from metasim.cfg.scenario import ScenarioCfg
 from metasim.constants import SimType
 from metasim.utils.demo_util import get_traj
+from metasim.utils.profiler import profiled
 from metasim.utils.setup_util import get_robot, get_sim_env_class, get_task
 from metasim.utils.state import list_state_to_tensor
 
@@ -25,6 +26,8 @@ class Sb3EnvWrapper(VecEnv):
         self.num_envs = scenario.num_envs
         self.robot = scenario.robots[0]
         self.task = scenario.task
+        # Reward functions are built once, they keep their resolved constants across steps
+        self.reward_fns = [reward_func(self.robot.name) for reward_func in self.task.reward_functions]
 
         env_class = get_sim_env_class(SimType(scenario.sim))
         self.env = env_class(scenario)
@@ -211,11 +214,12 @@ class Sb3EnvWrapper(VecEnv):
         gym_observation = self.task.humanoid_obs_flatten_func(states)
         return gym_observation
 
+    @profiled("reward")
     def get_humanoid_reward(self, states):
         # NOTE: For IsaacLab, metasim_reward is None, so calculate reward here
         final_reward = torch.zeros(self.num_envs, device=self.sim_device)
-        for reward_func, reward_weight in zip(self.task.reward_functions, self.task.reward_weights):
-            final_reward += reward_func(self.robot.name)(states) * reward_weight
+        for reward_fn, reward_weight in zip(self.reward_fns, self.task.reward_weights):
+            final_reward += reward_fn(states) * reward_weight
         return final_reward
 
     def render(self):
@@ -14,6 +14,7 @@ import torch
 
 from metasim.sim.env_wrapper import GymEnvWrapper
 from metasim.types import Obs
+from metasim.utils.profiler import span
 
 # Import tasks to ensure registration
 from .task_registry import get_task_wrapper
@@ -419,17 +420,20 @@ class RLEnvWrapper:
             if hasattr(self.task_wrapper, "update_prev_actions"):
                 self.task_wrapper.update_prev_actions(processed_action)
 
-            reward = self.task_wrapper.compute_reward(states, action_dict, states).to(self.device)
+            with span("reward"):
+                reward = self.task_wrapper.compute_reward(states, action_dict, states).to(self.device)
             termination = self.task_wrapper.check_termination(states).to(self.device)
         else:
-            reward = self.env.handler.task.reward_fn(self.env.handler.get_states(), action_dict).to(self.device)
+            with span("reward"):
+                reward = self.env.handler.task.reward_fn(self.env.handler.get_states(), action_dict).to(self.device)
             termination = (
                 self.env.handler.task.termination_fn(self.env.handler.get_states()).to(self.device)
                 if hasattr(self.env.handler.task, "termination_fn")
                 else torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
             )
 
-        success = self.env.handler.checker.check(self.env.handler).to(self.device)
+        with span("checker.check"):
+            success = self.env.handler.checker.check(self.env.handler).to(self.device)
         timeout = (self.env._episode_length_buf >= self.env.handler.scenario.episode_length).to(self.device)
         done = (success | timeout | termination).int()
 